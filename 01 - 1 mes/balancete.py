@@ -1,11 +1,26 @@
 import os
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import io
 import locale
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterable, Iterator, NamedTuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pc = None
 
 locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
 
@@ -17,23 +32,92 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# Nível do log vem de BALANCETE_LOG (DEBUG, INFO, WARNING...); em INFO
+# aparece o tempo de cada etapa, em DEBUG também o conteúdo lido
+logger = logging.getLogger("balancete")
+logger.setLevel(os.environ.get("BALANCETE_LOG", "WARNING").upper())
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+
+@contextmanager
+def medir_etapa(etapa):
+    """Mede o tempo do bloco `with` e o registra em INFO"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info("etapa %s: %.1f ms", etapa, (time.perf_counter() - inicio) * 1000)
+
+
+COLUNAS_VALORES = ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]
+COLUNAS_BALANCETE = ["GRUPO SALDO"] + COLUNAS_VALORES
+
+# Linhas de cabeçalho da tabela, uma por linha no TXT exportado
+ROTULOS_CABECALHO = frozenset(COLUNAS_BALANCETE)
+
+# Linha com valor monetário, ex.: "R$ -1.827,39"
+_PADRAO_VALOR = re.compile(r"^(R\$)?\s*-?\s*[\d.,]+$")
+
+
+class LinhaBalancete(NamedTuple):
+    """Registro de um grupo do balancete em um período"""
+
+    periodo: str
+    grupo: str
+    saldo_anterior: float
+    creditos: float
+    debitos: float
+    saldo_atual: float
+
+
 def formatar_moeda_locale(valor):
     return locale.currency(valor, grouping=True, symbol=False)
 
+# Posições onde entra o ponto de milhar: "1234567" -> "1.234.567"
+_PADRAO_MILHAR = r"\B(?=(\d{3})+(?!\d))"
+
+
+@lru_cache(maxsize=4096)
+def _formatar_centavos(centavos):
+    sinal = "-" if centavos < 0 else ""
+    reais, resto = divmod(abs(centavos), 100)
+    return f"R$ {sinal}{reais:,}".replace(",", ".") + f",{resto:02d}"
+
+
 # Função para formatar valores monetários
 def formatar_moeda(valor):
     """Formata valores para moeda brasileira"""
     if pd.isna(valor) or valor == 0:
         return "R$ 0,00"
 
-    if valor < 0:
-        return (
-            f"R$ {valor:,.2f}".replace(",", "X")
-            .replace(".", ",")
-            .replace("X", ".")
-        )
-    else:
-        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return _formatar_centavos(int(round(valor * 100)))
+
+
+def formatar_moeda_vetor(valores):
+    """
+    Formata um array inteiro de valores de uma vez.
+
+    Cada valor distinto é formatado uma única vez, com operações de string
+    vetorizadas do pandas, e o resultado é espalhado de volta para as
+    posições originais. Nulos viram "R$ 0,00", como em formatar_moeda.
+    """
+    codigos, unicos = pd.factorize(pd.Series(valores))
+    centavos = np.rint(np.asarray(unicos, dtype="float64") * 100).astype("int64")
+    absolutos = np.abs(centavos)
+
+    reais = pd.Series(absolutos // 100).astype(str).str.replace(_PADRAO_MILHAR, ".", regex=True)
+    resto = pd.Series(absolutos % 100).astype(str).str.zfill(2)
+    sinal = pd.Series(np.where(centavos < 0, "-", ""))
+    textos = ("R$ " + sinal + reais + "," + resto).to_numpy(dtype=object)
+
+    resultado = np.full(len(codigos), "R$ 0,00", dtype=object)
+    validos = codigos >= 0
+    resultado[validos] = textos[codigos[validos]]
+    return resultado
 
 
 def converter_valor_moeda(texto):
@@ -64,73 +148,183 @@ def converter_valor_moeda(texto):
         return 0.0
 
 
+def _decodificar_generico(texto):
+    """
+    Float64 de cada célula e máscara das inválidas, com as regras de
+    converter_valor_moeda; usado para os formatos fora do padrão exportado.
+    """
+    texto = texto.str.replace(r"R\$|\s", "", regex=True)
+    vazio = texto.isna() | (texto == "")
+
+    # Formato brasileiro: remove pontos de milhares e troca a vírgula decimal
+    tem_virgula = texto.str.contains(",", regex=False, na=False)
+    texto = texto.where(
+        ~tem_virgula,
+        texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+    )
+
+    numeros = pd.to_numeric(texto, errors="coerce").astype("float64")
+    invalidos = numeros.isna() & ~vazio
+    return numeros.fillna(0.0).to_numpy(), invalidos.to_numpy()
+
+
+# Formato exportado: "R$ ", sinal opcional, milhares com ponto e duas casas
+_PADRAO_MOEDA_EXPORTADA = r"^R\$ -?[\d.]+,\d\d$"
+
+
+def _decodificar_centavos_arrow(valores):
+    """
+    Centavos das células no formato exportado ("R$ -1.234,56"), lidos como
+    inteiros: sem o "R$ ", os pontos e a vírgula sobram o sinal e os
+    dígitos, que o pyarrow converte para int64 de uma vez.
+
+    Returns:
+        tuple: (numpy.ndarray int64, máscara das células no formato; as
+               outras ficam com zero)
+    """
+    texto = pa.array(valores, type=pa.string(), from_pandas=True)
+    no_formato = pc.fill_null(pc.match_substring_regex(texto, _PADRAO_MOEDA_EXPORTADA), False)
+
+    # A vírgula está sempre a três caracteres do fim e o "R$ " no começo
+    digitos = pc.replace_substring(texto, ".", "")
+    digitos = pc.utf8_replace_slice(digitos, -3, -2, "")
+    digitos = pc.utf8_replace_slice(digitos, 0, 3, "")
+
+    centavos = pc.cast(pc.if_else(no_formato, digitos, "0"), pa.int64())
+    return np.array(centavos), no_formato.to_numpy(zero_copy_only=False)
+
+
+def decodificar_coluna_moeda(valores, centavos=False):
+    """
+    Converte uma coluna inteira de strings de moeda ("R$ -1.234,56") em
+    números numa única passada vetorizada.
+
+    Com o pyarrow, as células no formato exportado são lidas como
+    inteiros em centavos, sem passar por float; só as demais (vazias, sem
+    as duas casas decimais ou inválidas) usam a conversão genérica.
+
+    Args:
+        valores (array-like): Strings de moeda; vazios valem zero.
+        centavos (bool): Se True, devolve inteiros exatos em centavos (int64).
+
+    Returns:
+        tuple: (numpy.ndarray com float64 ou int64, lista com as posições
+               das células que não puderam ser lidas). As células inválidas
+               ficam com zero no array, mas são sempre reportadas.
+    """
+    if pa is not None:
+        try:
+            inteiros, no_formato = _decodificar_centavos_arrow(valores)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Células que não são texto: tudo pela conversão genérica
+            pass
+        else:
+            resultado = inteiros if centavos else inteiros / 100
+            restantes = np.flatnonzero(~no_formato)
+            if not len(restantes):
+                return resultado, []
+
+            texto = pd.Series(np.asarray(valores, dtype=object)[restantes], dtype="string")
+            numeros, mascara = _decodificar_generico(texto)
+            resultado[restantes] = np.rint(numeros * 100).astype(np.int64) if centavos else numeros
+            return resultado, restantes[mascara].tolist()
+
+    numeros, mascara = _decodificar_generico(pd.Series(valores, dtype="string"))
+    if centavos:
+        numeros = np.rint(numeros * 100).astype(np.int64)
+
+    return numeros, np.flatnonzero(mascara).tolist()
+
+
+def _eh_linha_periodo(linha):
+    texto = linha.lower()
+    return "até" in texto or "período" in texto
+
+
+def _iterar_linhas_brutas(linhas: Iterable[str]) -> Iterator[tuple]:
+    """
+    Percorre as linhas uma única vez e devolve (periodo, grupo, valores),
+    onde valores são as quatro strings monetárias do grupo.
+
+    Funciona como uma máquina de estados: só lê grupos depois do
+    cabeçalho da tabela; qualquer linha que não seja valor passa a ser o
+    grupo corrente, e o grupo é emitido ao completar quatro valores.
+    Um novo período reinicia a leitura, então vários blocos podem ser
+    processados na mesma passada.
+    """
+    periodo = ""
+    dentro_tabela = False
+    grupo = None
+    valores = []
+
+    for linha in linhas:
+        linha = linha.strip()
+        if not linha:
+            continue
+
+        if linha in ROTULOS_CABECALHO:
+            dentro_tabela = True
+            grupo = None
+            valores = []
+            continue
+
+        if _PADRAO_VALOR.match(linha):
+            if dentro_tabela and grupo is not None:
+                valores.append(linha)
+                if len(valores) == len(COLUNAS_VALORES):
+                    yield periodo, grupo, valores
+                    grupo = None
+                    valores = []
+            continue
+
+        if _eh_linha_periodo(linha):
+            periodo = linha
+            dentro_tabela = False
+            grupo = None
+            valores = []
+            continue
+
+        if dentro_tabela:
+            # Nome de grupo (ou linha extra de título, substituída pela próxima)
+            grupo = linha
+            valores = []
+
+
+def iterar_registros_balancete(linhas: Iterable[str]) -> Iterator[LinhaBalancete]:
+    """
+    Gera um LinhaBalancete para cada grupo encontrado nas linhas.
+
+    Aceita qualquer iterável de linhas, inclusive um arquivo aberto, sem
+    carregar o conteúdo inteiro na memória.
+    """
+    for periodo, grupo, valores in _iterar_linhas_brutas(linhas):
+        yield LinhaBalancete(periodo, grupo, *(converter_valor_moeda(v) for v in valores))
+
+
 def processar_balancete_txt(conteudo):
     """Processa arquivo TXT de balancete"""
     try:
-        linhas = conteudo.strip().split("\n")
-
-        # Encontra o período do balancete
-        periodo = ""
-        for linha in linhas[:5]:
-            if "até" in linha.lower() or "período" in linha.lower():
-                periodo = linha.strip()
-                break
-
-        # Encontra os dados do balancete
-        header = []
-        dados_balancete = []
-        header_encontrado = False
-
-        for linha in linhas:
-            linha = linha.strip()
-
-            # Pula linhas vazias e cabeçalhos
-            if not linha or "GRUPO SALDO" in linha or "SALDO ANTERIOR" in linha:
-                if "GRUPO" in linha:
-                    header_encontrado = True
-                
-            # Processa linhas de dados após encontrar header
-            if header_encontrado and linha:
-                if linha.startswith(("GRUPO SALDO", "SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL")):
-                    header.append(linha)
-            
-            # Para no Condomínio
-            if linha.startswith("Condomínio"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[8:13]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Fundo de Reserva"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[13:18]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Fundo de Obras"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[18:23]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Retenção de Tributos e Impost"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[23:28]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Conta Op - 13 Salario com Encargos"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[28:33]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Total"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[33:38]]
-                dados_balancete.append(linhas_transformadas)
-
-        if not dados_balancete:
+        registros = list(_iterar_linhas_brutas(conteudo.splitlines()))
+
+        if not registros:
             return None, None
 
+        periodo = registros[0][0]
+
         # Cria DataFrame
         df = pd.DataFrame(
-            dados_balancete,
-            columns=header
+            [[grupo, *valores] for _, grupo, valores in registros],
+            columns=COLUNAS_BALANCETE,
         )
 
-        # Converte valores monetários
-        for col in ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]:
-            df[col] = df[col].apply(converter_valor_moeda)
+        # Converte as quatro colunas monetárias de uma só vez
+        brutos = df[COLUNAS_VALORES].to_numpy().ravel()
+        numeros, invalidos = decodificar_coluna_moeda(brutos)
+        df[COLUNAS_VALORES] = numeros.reshape(len(df), len(COLUNAS_VALORES))
+
+        if invalidos:
+            linhas_invalidas = sorted({i // len(COLUNAS_VALORES) for i in invalidos})
+            st.warning(f"Valores monetários inválidos nas linhas {linhas_invalidas} do período '{periodo}'")
 
         return df, periodo
 
@@ -186,7 +380,7 @@ def criar_graficos_balancete(df):
         st.subheader("📊 Saldo Atual por Grupo")
 
         # Cria cores baseadas em valores positivos/negativos
-        cores = ["red" if x < 0 else "green" for x in df_grafico["SALDO ATUAL"]]
+        cores = np.where(df_grafico["SALDO ATUAL"] < 0, "red", "green")
 
         fig_saldo = go.Figure(
             data=[
@@ -194,7 +388,7 @@ def criar_graficos_balancete(df):
                     x=df_grafico["GRUPO SALDO"],
                     y=df_grafico["SALDO ATUAL"],
                     marker_color=cores,
-                    text=[formatar_moeda(x) for x in df_grafico["SALDO ATUAL"]],
+                    text=formatar_moeda_vetor(df_grafico["SALDO ATUAL"]),
                     textposition="outside",
                 )
             ]
@@ -265,7 +459,7 @@ def criar_graficos_balancete(df):
             df_grafico["SALDO ATUAL"] - df_grafico["SALDO ANTERIOR"]
         )
 
-        cores_var = ["red" if x < 0 else "green" for x in df_grafico["Variacao"]]
+        cores_var = np.where(df_grafico["Variacao"] < 0, "red", "green")
 
         fig_var = go.Figure(
             data=[
@@ -273,7 +467,7 @@ def criar_graficos_balancete(df):
                     x=df_grafico["GRUPO SALDO"],
                     y=df_grafico["Variacao"],
                     marker_color=cores_var,
-                    text=[formatar_moeda(x) for x in df_grafico["Variacao"]],
+                    text=formatar_moeda_vetor(df_grafico["Variacao"]),
                     textposition="outside",
                 )
             ]
@@ -300,7 +494,7 @@ def criar_tabela_balancete(df):
 
     # Formata valores monetários
     for col in ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]:
-        df_formatado[col] = df_formatado[col].apply(formatar_moeda)
+        df_formatado[col] = formatar_moeda_vetor(df_formatado[col])
 
     # Destaca linha total
     def destacar_total(row):
@@ -315,73 +509,189 @@ def criar_tabela_balancete(df):
     )
 
 
-# Interface principal
-st.title("💰 Dashboard Balancete Financeiro")
-st.markdown("---")
+# Acima disso, a lista de grupos vira uma tabela em vez de texto
+LIMITE_LISTA_MARKDOWN = 30
 
+ORDENACOES_ANALISE = ["Maior valor absoluto", "Nome do grupo", "Ordem do balancete"]
 
-arquivo = 'dados/dados.txt'
 
-try:
-    with open(arquivo, 'r', encoding='utf-8') as arquivo:
-        conteudo = arquivo.read()
-        print("Conteúdo completo do arquivo:")
-        print(conteudo)
-except FileNotFoundError:
-    print(f"Erro: O arquivo '{arquivo}' não foi encontrado.")
-except Exception as e:
-    print(f"Ocorreu um erro ao ler o arquivo: {e}")
+def separar_grupos_por_saldo(df, ordenacao="Maior valor absoluto", limite=None):
+    """
+    Separa os grupos (sem a linha Total) com saldo atual positivo e negativo.
 
-df_balancete, periodo = processar_balancete_txt(conteudo)
+    O sinal é calculado uma única vez para a coluna inteira e reaproveitado
+    nas duas partições.
 
-if df_balancete is not None:
-    # Cabeçalho com período
-    if periodo:
-        st.subheader(f"📅 {periodo}")
-    else:
-        st.subheader("📅 Balancete Analítico")
+    Returns:
+        tuple: (positivos, negativos, total de positivos, total de
+               negativos); as partições já vêm ordenadas e cortadas em
+               `limite` linhas, com GRUPO SALDO e SALDO ATUAL.
+    """
+    df_analise = df.loc[
+        ~df["GRUPO SALDO"].str.contains("Total", case=False, na=False),
+        ["GRUPO SALDO", "SALDO ATUAL"],
+    ]
+    sinal = np.sign(df_analise["SALDO ATUAL"].to_numpy())
 
-    # Métricas principais
-    st.subheader("📊 Resumo Financeiro")
-    criar_metricas_financeiras(df_balancete)
+    particoes = []
+    for parte in (df_analise[sinal > 0], df_analise[sinal < 0]):
+        if ordenacao == "Maior valor absoluto":
+            parte = parte.sort_values("SALDO ATUAL", key=np.abs, ascending=False, kind="stable")
+        elif ordenacao == "Nome do grupo":
+            parte = parte.sort_values("GRUPO SALDO", kind="stable")
+        particoes.append(parte)
 
-    st.markdown("---")
+    positivos, negativos = particoes
+    total_positivos, total_negativos = len(positivos), len(negativos)
+    if limite:
+        positivos, negativos = positivos.head(limite), negativos.head(limite)
 
-    # Tabela do balancete
-    st.subheader("📋 Balancete Detalhado")
-    criar_tabela_balancete(df_balancete)
+    return positivos, negativos, total_positivos, total_negativos
 
-    st.markdown("---")
 
-    # Gráficos
-    st.subheader("📈 Análises Visuais")
-    criar_graficos_balancete(df_balancete)
+def _exibir_grupos(grupos, total, mensagem_vazia):
+    """Envia a lista de grupos como um único elemento"""
+    if grupos.empty:
+        st.write(mensagem_vazia)
+        return
 
-    # Análise adicional
-    st.markdown("---")
-    st.subheader("🔍 Análise Detalhada")
+    valores = formatar_moeda_vetor(grupos["SALDO ATUAL"])
+    restantes = total - len(grupos)
 
-    # Remove total para análise
-    df_analise = df_balancete[
-        ~df_balancete["GRUPO SALDO"].str.contains("Total", case=False, na=False)
-    ]
+    if len(grupos) <= LIMITE_LISTA_MARKDOWN:
+        linhas = [f"• {grupo}: {valor}" for grupo, valor in zip(grupos["GRUPO SALDO"], valores)]
+        if restantes:
+            linhas.append(f"_… e mais {restantes} grupos_")
+        st.markdown("  \n".join(linhas))
+    else:
+        st.dataframe(
+            pd.DataFrame({"GRUPO SALDO": grupos["GRUPO SALDO"].to_numpy(), "SALDO ATUAL": valores}),
+            use_container_width=True,
+            hide_index=True,
+        )
+        if restantes:
+            st.caption(f"… e mais {restantes} grupos")
+
+
+def criar_analise_detalhada(df):
+    """Cria a lista de grupos com saldo positivo e negativo"""
+    if df is None or df.empty:
+        return
+
+    col_ordem, col_limite = st.columns(2)
+    ordenacao = col_ordem.selectbox("Ordenar por", ORDENACOES_ANALISE)
+    limite = col_limite.number_input("Mostrar até (0 = todos)", min_value=0, value=0, step=5)
+
+    positivos, negativos, total_positivos, total_negativos = separar_grupos_por_saldo(
+        df, ordenacao, limite
+    )
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.write("**📈 Grupos com Saldo Positivo:**")
-        positivos = df_analise[df_analise["SALDO ATUAL"] > 0]
-        if not positivos.empty:
-            for _, row in positivos.iterrows():
-                st.write(f"• {row['GRUPO SALDO']}: {formatar_moeda(row['SALDO ATUAL'])}")
-        else:
-            st.write("Nenhum grupo com saldo positivo")
+        _exibir_grupos(positivos, total_positivos, "Nenhum grupo com saldo positivo")
 
     with col2:
         st.write("**📉 Grupos com Saldo Negativo:**")
-        negativos = df_analise[df_analise["SALDO ATUAL"] < 0]
-        if not negativos.empty:
-            for _, row in negativos.iterrows():
-                st.write(f"• {row['GRUPO SALDO']}: {formatar_moeda(row['SALDO ATUAL'])}")
+        _exibir_grupos(negativos, total_negativos, "Nenhum grupo com saldo negativo")
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def processar_balancete_em_cache(conteudo):
+    """
+    processar_balancete_txt guardado pelo conteúdo, para as novas execuções
+    do script (a cada clique) não processarem o texto de novo.
+    """
+    return processar_balancete_txt(conteudo)
+
+
+# Segundos entre duas verificações do arquivo pelo observador
+INTERVALO_OBSERVADOR = 2.0
+
+
+def _ler_e_processar(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        processar_balancete_em_cache(f.read())
+
+
+@st.cache_resource(show_spinner=False)
+def observar_arquivo(caminho):
+    """
+    Inicia, uma vez por processo, a thread que processa o arquivo sempre
+    que a data de modificação ou o tamanho mudam. O resultado vai para o
+    cache de processar_balancete_em_cache, então quem abre o dashboard
+    depois de uma atualização já encontra o balancete pronto.
+    """
+    def observar():
+        assinatura_anterior = None
+        while True:
+            try:
+                info = os.stat(caminho)
+                assinatura = (info.st_mtime_ns, info.st_size)
+                if assinatura != assinatura_anterior:
+                    # Com falha também: só tenta de novo quando o arquivo mudar
+                    assinatura_anterior = assinatura
+                    with medir_etapa("observador"):
+                        _ler_e_processar(caminho)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                logger.exception("Falha ao processar '%s' em segundo plano", caminho)
+            time.sleep(INTERVALO_OBSERVADOR)
+
+    thread = threading.Thread(target=observar, name="observador-dados", daemon=True)
+    thread.start()
+    return thread
+
+
+SECAO_TABELA = "📋 Balancete Detalhado"
+SECAO_GRAFICOS = "📈 Análises Visuais"
+SECAO_ANALISE = "🔍 Análise Detalhada"
+SECOES = [SECAO_TABELA, SECAO_GRAFICOS, SECAO_ANALISE]
+
+
+# Interface principal
+st.title("💰 Dashboard Balancete Financeiro")
+st.markdown("---")
+
+
+arquivo = 'dados/dados.txt'
+observar_arquivo(os.path.abspath(arquivo))
+
+try:
+    with medir_etapa("ler"), open(arquivo, 'r', encoding='utf-8') as f:
+        conteudo = f.read()
+    logger.debug("Conteúdo completo do arquivo:\n%s", conteudo)
+except FileNotFoundError:
+    logger.error("Erro: O arquivo '%s' não foi encontrado.", arquivo)
+except Exception as e:
+    logger.error("Ocorreu um erro ao ler o arquivo: %s", e)
+
+with medir_etapa("processar"):
+    df_balancete, periodo = processar_balancete_em_cache(conteudo)
+
+with medir_etapa("renderizar"):
+    if df_balancete is not None:
+        # Cabeçalho com período
+        if periodo:
+            st.subheader(f"📅 {periodo}")
+        else:
+            st.subheader("📅 Balancete Analítico")
+
+        # Métricas principais
+        st.subheader("📊 Resumo Financeiro")
+        criar_metricas_financeiras(df_balancete)
+
+        st.markdown("---")
+
+        # Só a seção escolhida é montada e enviada ao navegador
+        secao = st.radio("Seção", SECOES, horizontal=True, key="secao", label_visibility="collapsed")
+        st.subheader(secao)
+
+        if secao == SECAO_TABELA:
+            criar_tabela_balancete(df_balancete)
+        elif secao == SECAO_GRAFICOS:
+            criar_graficos_balancete(df_balancete)
         else:
-            st.write("Nenhum grupo com saldo negativo")
+            criar_analise_detalhada(df_balancete)
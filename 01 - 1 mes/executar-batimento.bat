@@ -1,6 +1,6 @@
 @echo off
-REM Altera para o diretório do seu projeto
-cd "C:\Users\albuq\OneDrive\Documentos\BALANCETE-FINANCEIRO\01 - 1 mes"
+REM Altera para a pasta deste script (onde fica a pasta dados)
+cd /d "%~dp0"
 
 REM Executa o Streamlit
 REM Certifique-se de que 'python.exe' está no seu PATH ou use o caminho completo, ex: "C:\Program Files\Python313\python.exe"
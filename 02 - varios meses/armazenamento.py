@@ -0,0 +1,214 @@
+"""
+Armazenamento colunar dos balancetes mensais já processados.
+
+Cada mês processado vira um conjunto de linhas (período, grupo e os quatro
+valores em centavos) gravado em arquivos Feather sem compressão, que são
+abertos com memory-map. Assim o dashboard não precisa reprocessar o texto
+dos meses que já estão guardados. Sem o pyarrow instalado, o mesmo DataFrame é
+gravado em pickle.
+
+O armazenamento é uma pasta com uma parte por gravação: os meses novos vão
+para uma parte nova, sem reescrever os já guardados, e o custo de acrescentar
+um mês não cresce com o histórico. Quando as partes passam de LIMITE_PARTES,
+elas são juntadas numa só.
+"""
+import os
+
+import pandas as pd
+
+from instrumentacao import obter_logger
+from processamento import COLUNAS_BALANCETE, COLUNAS_VALORES
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import feather
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pc = None
+    feather = None
+
+logger = obter_logger(__name__)
+
+# HASH_BLOCO identifica o texto de origem; se o bloco mudar, o mês é refeito
+COLUNAS_ARMAZEM = ["PERIODO", "HASH_BLOCO"] + COLUNAS_BALANCETE
+
+# Partes acumuladas antes de juntá-las numa só
+LIMITE_PARTES = 16
+
+EXTENSAO_PARTE = ".feather" if feather is not None else ".pkl"
+
+
+def caminho_armazem(diretorio_cache):
+    """Caminho da pasta do armazenamento colunar dentro da pasta de cache"""
+    return os.path.join(diretorio_cache, "balancetes")
+
+
+def _partes(caminho):
+    """Arquivos das partes, da mais antiga para a mais nova"""
+    try:
+        nomes = os.listdir(caminho)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    return sorted(os.path.join(caminho, nome) for nome in nomes if nome.endswith(EXTENSAO_PARTE))
+
+
+def _esquema_valido(colunas, tipos):
+    # Arquivos antigos guardavam reais em float; esses meses são refeitos
+    return list(colunas) == COLUNAS_ARMAZEM and all(tipos[col] == "int64" for col in COLUNAS_VALORES)
+
+
+def _abrir_parte(arquivo):
+    """Tabela pyarrow mapeada (ou DataFrame, sem o pyarrow) de uma parte, ou None"""
+    try:
+        if feather is not None:
+            parte = feather.read_table(arquivo, memory_map=True)
+            tipos = {campo.name: str(campo.type) for campo in parte.schema}
+            colunas = parte.column_names
+        else:
+            parte = pd.read_pickle(arquivo)
+            tipos = parte.dtypes.astype(str)
+            colunas = parte.columns
+    except FileNotFoundError:
+        # Apagada por uma compactação durante a leitura
+        return None
+    except Exception as e:
+        logger.warning("Ocorreu um erro ao ler o armazenamento '%s': %s", arquivo, e)
+        return None
+
+    return parte if _esquema_valido(colunas, tipos) else None
+
+
+def _hashes_da_parte(parte):
+    if feather is not None:
+        return set(pc.unique(parte["HASH_BLOCO"]).to_pylist())
+    return set(parte["HASH_BLOCO"].unique())
+
+
+def _linhas_dos_hashes(parte, hashes):
+    """DataFrame com as linhas da parte desses blocos; o filtro é feito na tabela mapeada"""
+    if feather is not None:
+        conjunto = pa.array(list(hashes), type=parte.schema.field("HASH_BLOCO").type)
+        return parte.filter(pc.is_in(parte["HASH_BLOCO"], value_set=conjunto)).to_pandas()
+    return parte[parte["HASH_BLOCO"].isin(list(hashes))].reset_index(drop=True)
+
+
+def carregar_armazem(caminho, hashes=None):
+    """
+    Abre as partes do armazenamento com memory-map.
+
+    Args:
+        hashes (iterável, opcional): Só os meses desses blocos são
+            convertidos para DataFrame; o filtro é feito nas tabelas
+            mapeadas, sem copiar o resto dos arquivos. Sem hashes, as
+            partes são mescladas como em mesclar_armazem.
+
+    Returns:
+        DataFrame: Linhas mensais guardadas, ou None se nada for
+                   encontrado.
+    """
+    if hashes is None:
+        armazem = None
+        for arquivo in _partes(caminho):
+            parte = _abrir_parte(arquivo)
+            if parte is not None:
+                df = parte.to_pandas() if feather is not None else parte
+                armazem = mesclar_armazem(armazem, df)
+        return armazem
+
+    hashes = set(hashes)
+    encontradas = []
+    vistos = set()
+    # Da parte mais nova para a mais antiga: um bloco guardado em duas
+    # partes (antes de uma compactação terminar) vale pela mais nova
+    for arquivo in reversed(_partes(caminho)):
+        parte = _abrir_parte(arquivo)
+        if parte is None:
+            continue
+        hashes_parte = _hashes_da_parte(parte)
+        desejados = (hashes_parte & hashes) - vistos
+        if desejados:
+            encontradas.append(_linhas_dos_hashes(parte, desejados))
+        vistos |= hashes_parte
+
+    if not encontradas:
+        return None
+    return pd.concat(encontradas[::-1], ignore_index=True)
+
+
+def hashes_do_armazem(caminho):
+    """
+    Hashes dos blocos guardados, lendo só a coluna HASH_BLOCO de cada parte.
+
+    Returns:
+        set: Vazio se não houver parte que possa ser lida.
+    """
+    hashes = set()
+    for arquivo in _partes(caminho):
+        parte = _abrir_parte(arquivo)
+        if parte is not None:
+            hashes |= _hashes_da_parte(parte)
+    return hashes
+
+
+def _gravar_parte(df_mensal, arquivo):
+    """Grava a parte num temporário e depois o troca de uma vez"""
+    temporario = arquivo + ".tmp"
+    df_mensal = df_mensal[COLUNAS_ARMAZEM].reset_index(drop=True)
+
+    if feather is not None:
+        tabela = pa.Table.from_pandas(df_mensal, preserve_index=False)
+        feather.write_feather(tabela, temporario, compression="uncompressed")
+    else:
+        df_mensal.to_pickle(temporario)
+
+    os.replace(temporario, arquivo)
+
+
+def _proxima_parte(caminho, partes):
+    numero = int(os.path.basename(partes[-1]).split(".")[0]) + 1 if partes else 0
+    return os.path.join(caminho, f"{numero:08d}{EXTENSAO_PARTE}")
+
+
+def acrescentar_armazem(df_novos, caminho):
+    """
+    Grava os meses novos numa parte nova, sem reescrever as já guardadas;
+    passando de LIMITE_PARTES, junta as partes com compactar_armazem.
+    """
+    os.makedirs(caminho, exist_ok=True)
+    partes = _partes(caminho)
+    _gravar_parte(df_novos, _proxima_parte(caminho, partes))
+
+    if len(partes) + 1 > LIMITE_PARTES:
+        compactar_armazem(caminho)
+
+
+def compactar_armazem(caminho):
+    """
+    Junta as partes numa só (com um período guardado mais de uma vez
+    valendo pela versão mais nova) e apaga as antigas.
+    """
+    partes = _partes(caminho)
+    if len(partes) < 2:
+        return
+
+    armazem = carregar_armazem(caminho)
+    if armazem is not None:
+        # A parte compactada é a mais nova: até as antigas serem apagadas,
+        # quem as ler continua vendo a versão mais nova de cada bloco
+        _gravar_parte(armazem, _proxima_parte(caminho, partes))
+    for arquivo in partes:
+        os.remove(arquivo)
+    logger.info("%d partes do armazenamento compactadas", len(partes))
+
+
+def mesclar_armazem(armazem, df_novos):
+    """
+    Acrescenta meses ao armazenamento; um período já guardado é substituído
+    pela versão nova.
+    """
+    if armazem is None or armazem.empty:
+        return df_novos[COLUNAS_ARMAZEM].reset_index(drop=True)
+
+    mantidos = armazem[~armazem["PERIODO"].isin(df_novos["PERIODO"].unique())]
+    return pd.concat([mantidos, df_novos[COLUNAS_ARMAZEM]], ignore_index=True)
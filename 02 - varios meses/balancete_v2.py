@@ -1,142 +1,46 @@
 import os
+import hashlib
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 import io
 import locale
-
-locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-
-# Configuração da página
-st.set_page_config(
-    page_title="Balancete Financeiro",
-    page_icon="💰",
-    layout="wide",
-    initial_sidebar_state="expanded",
+import threading
+
+from ingestao_incremental import carregar_balancetes_mensais, hash_do_arquivo, ingerir_incremental
+from ingestao_pdf import processar_pdf_bytes
+from consolidacao import (
+    consolidar_balancetes_mensais,
+    consolidar_blocos,
+    ordenar_por_competencia,
+    resumir_balancete,
+)
+from banco import abrir_banco, bloquear_escrita, carregar_balancetes, consultar_consolidado, consultar_sql
+from cubo import montar_cubo
+from formatacao import formatar_moeda, formatar_moeda_vetor, formatar_tabela_balancete
+from graficos import construir_figuras_balancete, construir_figuras_series
+from inadimplencia import FAIXAS_ATRASO, ingerir_pasta, posicao_inadimplencia, resumir_inadimplencia
+from instrumentacao import configurar_logging, medir_etapa
+from lancamentos import consultar_lancamentos, ler_lancamentos_csv, montar_livro, totais_por_categoria
+from observador import ObservadorExportacoes
+from processamento import (
+    COLUNAS_BALANCETE,
+    calcular_hash_arquivo,
+    iterar_blocos_de_bytes,
+    iterar_blocos_do_arquivo,
+    montar_balancetes_mensais,
+)
+from series_temporais import (
+    competencias_da_serie,
+    filtrar_serie,
+    grupos_da_serie,
+    montar_serie_longa,
+    sparklines_por_grupo,
 )
 
-def formatar_moeda_locale(valor):
-    return locale.currency(valor, grouping=True, symbol=False)
-
-# Função para formatar valores monetários
-def formatar_moeda(valor):
-    """Formata valores para moeda brasileira"""
-    if pd.isna(valor) or valor == 0:
-        return "R$ 0,00"
-
-    if valor < 0:
-        return (
-            f"R$ {valor:,.2f}".replace(",", "X")
-            .replace(".", ",")
-            .replace("X", ".")
-        )
-    else:
-        return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-
-def converter_valor_moeda(texto):
-    """Converte string de moeda para float"""
-    if pd.isna(texto) or texto == "":
-        return 0.0
-
-    # Remove R$, espaços e converte vírgula para ponto
-    valor_limpo = str(texto).replace("R$", "").replace(" ", "").strip()
-
-    # Trata valores negativos
-    negativo = valor_limpo.startswith("-")
-    if negativo:
-        valor_limpo = valor_limpo[1:]
-
-    # Converte pontos de milhares e vírgula decimal
-    if "," in valor_limpo and "." in valor_limpo:
-        # Formato brasileiro: 1.234.567,89
-        valor_limpo = valor_limpo.replace(".", "").replace(",", ".")
-    elif "," in valor_limpo:
-        # Apenas vírgula decimal: 1234,89
-        valor_limpo = valor_limpo.replace(",", ".")
-
-    try:
-        valor = float(valor_limpo)
-        return -valor if negativo else valor
-    except:
-        return 0.0
-
-
-def processar_balancete_txt(conteudo):
-    """Processa arquivo TXT de balancete"""
-    try:
-        linhas = conteudo.strip().split("\n")
-
-        # Encontra o período do balancete
-        periodo = ""
-        for linha in linhas[:5]:
-            if "até" in linha.lower() or "período" in linha.lower():
-                periodo = linha.strip()
-                break
-
-        # Encontra os dados do balancete
-        header = []
-        dados_balancete = []
-        header_encontrado = False
-
-        for linha in linhas:
-            linha = linha.strip()
-
-            # Pula linhas vazias e cabeçalhos
-            if not linha or "GRUPO SALDO" in linha or "SALDO ANTERIOR" in linha:
-                if "GRUPO" in linha:
-                    header_encontrado = True
-                
-            # Processa linhas de dados após encontrar header
-            if header_encontrado and linha:
-                if linha.startswith(("GRUPO SALDO", "SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL")):
-                    header.append(linha)
-            
-            # Para no Condomínio
-            if linha.startswith("Condomínio"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[8:13]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Fundo de Reserva"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[13:18]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Fundo de Obras"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[18:23]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Retenção de Tributos e Impost"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[23:28]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Conta Op - 13 Salario com Encargos"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[28:33]]
-                dados_balancete.append(linhas_transformadas)
-
-            if linha.startswith("Total"):
-                linhas_transformadas = [linha.rstrip('\r') for linha in linhas[33:38]]
-                dados_balancete.append(linhas_transformadas)
-
-        if not dados_balancete:
-            return None, None
-
-        # Cria DataFrame
-        df = pd.DataFrame(
-            dados_balancete,
-            columns=header
-        )
-
-        # Converte valores monetários
-        for col in ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]:
-            df[col] = df[col].apply(converter_valor_moeda)
-
-        return df, periodo
-
-    except Exception as e:
-        st.error(f"Erro ao processar arquivo: {str(e)}")
-        return None, None
+def formatar_moeda_locale(centavos):
+    return locale.currency(centavos / 100, grouping=True, symbol=False)
 
 
 def criar_metricas_financeiras(df):
@@ -144,150 +48,88 @@ def criar_metricas_financeiras(df):
     if df is None or df.empty:
         return
 
-    # Remove linha total se existir
-    df_sem_total = df[~df["GRUPO SALDO"].str.contains("Total", case=False, na=False)]
+    resumo = resumir_balancete(df)
 
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        total_creditos = df_sem_total["CRÉDITOS"].sum()
-        st.metric("💰 Total Créditos", formatar_moeda(total_creditos), delta=None)
+        st.metric("💰 Total Créditos", formatar_moeda(resumo["creditos"]), delta=None)
 
     with col2:
-        total_debitos = df_sem_total["DÉBITOS"].sum()
-        st.metric("💸 Total Débitos", formatar_moeda(total_debitos), delta=None)
+        st.metric("💸 Total Débitos", formatar_moeda(resumo["debitos"]), delta=None)
 
     with col3:
-        saldo_atual = df_sem_total["SALDO ATUAL"].sum()
-        delta_saldo = saldo_atual - df_sem_total["SALDO ANTERIOR"].sum()
         st.metric(
             "📊 Saldo Atual",
-            formatar_moeda(saldo_atual),
-            delta=formatar_moeda_locale(delta_saldo)
+            formatar_moeda(resumo["saldo_atual"]),
+            delta=formatar_moeda_locale(resumo["variacao_saldo"])
             #delta=round(delta_saldo,2),
         )
 
     with col4:
-        movimento_total = total_creditos + total_debitos
-        st.metric("🔄 Movimento Total", formatar_moeda(movimento_total), delta=None)
+        st.metric("🔄 Movimento Total", formatar_moeda(resumo["movimento"]), delta=None)
+
+
+def hash_dataframe(df):
+    """Hash do conteúdo (valores e índice) de um DataFrame ou Series; None vira None"""
+    if df is None:
+        return None
+    nomes = df.columns if isinstance(df, pd.DataFrame) else [df.name]
+    hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.sha256(hashes.tobytes() + "|".join(map(str, nomes)).encode()).hexdigest()
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def construir_figuras_em_cache(chave, _df):
+    """
+    Figuras do balancete guardadas pela chave (hash dos dados de entrada),
+    para as novas execuções do script não as montarem de novo.
+    """
+    return construir_figuras_balancete(_df)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def construir_figuras_series_em_cache(chave, _serie):
+    """Mesmo que construir_figuras_em_cache, para as figuras mês a mês"""
+    return construir_figuras_series(_serie)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def formatar_tabela_em_cache(chave, _df):
+    """formatar_tabela_balancete guardado pelo hash do balancete"""
+    return formatar_tabela_balancete(_df)
 
 
 def criar_graficos_balancete(df):
-    """Cria gráficos específicos para o balancete"""
+    """
+    Cria gráficos específicos para o balancete. A evolução compara o saldo
+    anterior com o atual; o mês a mês fica na seção própria.
+    """
     if df is None or df.empty:
         return
 
-    # Remove linha total para os gráficos
-    df_grafico = df[~df["GRUPO SALDO"].str.contains("Total", case=False, na=False)].copy()
+    figuras = construir_figuras_em_cache(hash_dataframe(df), df)
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("📊 Saldo Atual por Grupo")
-
-        # Cria cores baseadas em valores positivos/negativos
-        cores = ["red" if x < 0 else "green" for x in df_grafico["SALDO ATUAL"]]
-
-        fig_saldo = go.Figure(
-            data=[
-                go.Bar(
-                    x=df_grafico["GRUPO SALDO"],
-                    y=df_grafico["SALDO ATUAL"],
-                    marker_color=cores,
-                    text=[formatar_moeda(x) for x in df_grafico["SALDO ATUAL"]],
-                    textposition="outside",
-                )
-            ]
-        )
-
-        fig_saldo.update_layout(
-            title="Saldo Atual por Grupo",
-            xaxis_title="Grupos",
-            yaxis_title="Valor (R$)",
-            xaxis_tickangle=-45,
-            height=400,
-        )
-
-        st.plotly_chart(fig_saldo, use_container_width=True)
+        st.plotly_chart(figuras["saldo"], use_container_width=True)
 
     with col2:
         st.subheader("🔄 Movimentação Financeira")
-
-        # Agrupa créditos e débitos
-        movimentacao = pd.DataFrame(
-            {
-                "Tipo": ["CRÉDITOS", "DÉBITOS"],
-                "Valor": [df_grafico["CRÉDITOS"].sum(), df_grafico["DÉBITOS"].sum()],
-            }
-        )
-
-        fig_mov = px.pie(
-            movimentacao,
-            values="Valor",
-            names="Tipo",
-            title="Distribuição Créditos vs Débitos",
-            color_discrete_map={"CRÉDITOS": "green", "DÉBITOS": "red"},
-        )
-
-        st.plotly_chart(fig_mov, use_container_width=True)
+        st.plotly_chart(figuras["movimentacao"], use_container_width=True)
 
     # Segunda linha de gráficos
     col3, col4 = st.columns(2)
 
     with col3:
         st.subheader("📈 Evolução dos Saldos")
-
-        # Cria gráfico comparativo saldo anterior vs atual
-        df_evolucao = df_grafico.melt(
-            id_vars=["GRUPO SALDO"],
-            value_vars=["SALDO ANTERIOR", "SALDO ATUAL"],
-            var_name="Período",
-            value_name="Valor",
-        )
-
-        fig_evolucao = px.bar(
-            df_evolucao,
-            x="GRUPO SALDO",
-            y="Valor",
-            color="Período",
-            barmode="group",
-            title="Comparação Saldo Anterior vs Atual",
-        )
-
-        fig_evolucao.update_layout(xaxis_tickangle=-45, height=400)
-        st.plotly_chart(fig_evolucao, use_container_width=True)
+        st.plotly_chart(figuras["evolucao"], use_container_width=True)
 
     with col4:
         st.subheader("💹 Variação por Grupo")
-
-        # Calcula variação
-        df_grafico["Variacao"] = (
-            df_grafico["SALDO ATUAL"] - df_grafico["SALDO ANTERIOR"]
-        )
-
-        cores_var = ["red" if x < 0 else "green" for x in df_grafico["Variacao"]]
-
-        fig_var = go.Figure(
-            data=[
-                go.Bar(
-                    x=df_grafico["GRUPO SALDO"],
-                    y=df_grafico["Variacao"],
-                    marker_color=cores_var,
-                    text=[formatar_moeda(x) for x in df_grafico["Variacao"]],
-                    textposition="outside",
-                )
-            ]
-        )
-
-        fig_var.update_layout(
-            title="Variação do Período",
-            xaxis_title="Grupos",
-            yaxis_title="Variação (R$)",
-            xaxis_tickangle=-45,
-            height=400,
-        )
-
-        st.plotly_chart(fig_var, use_container_width=True)
+        st.plotly_chart(figuras["variacao"], use_container_width=True)
 
 
 def criar_tabela_balancete(df):
@@ -295,12 +137,8 @@ def criar_tabela_balancete(df):
     if df is None or df.empty:
         return
 
-    # Cria cópia para formatação
-    df_formatado = df.copy()
-
-    # Formata valores monetários
-    for col in ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]:
-        df_formatado[col] = df_formatado[col].apply(formatar_moeda)
+    # Cópia com os valores monetários formatados
+    df_formatado = formatar_tabela_em_cache(hash_dataframe(df), df)
 
     # Destaca linha total
     def destacar_total(row):
@@ -315,163 +153,532 @@ def criar_tabela_balancete(df):
     )
 
 
-def ler_arquivo_e_separar_por_blocos(caminho_do_arquivo):
+JANELAS_CONSOLIDADO = {"Intervalo inteiro": None, "Ano": "Y", "Trimestre": "Q", "Mês": "M"}
+
+
+def criar_consolidado_intervalo(cubo, inicio, fim, grupos):
+    """
+    Tabela consolidada do intervalo filtrado; os filtros e a agregação são
+    feitos no banco SQLite compartilhado, que lê só as faixas do índice
+    """
+    rotulo = st.radio("Consolidar por", list(JANELAS_CONSOLIDADO), horizontal=True)
+    conexao = abrir_banco_em_cache(hash_dataframe(cubo.niveis["M"]), cubo)
+    df_consolidado = consultar_consolidado(
+        conexao, inicio, fim, janela=JANELAS_CONSOLIDADO[rotulo], grupos=grupos
+    ).drop(columns="CONDOMINIO")
+
+    for col in ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]:
+        df_consolidado[col] = formatar_moeda_vetor(df_consolidado[col])
+
+    st.dataframe(df_consolidado, use_container_width=True, hide_index=True)
+
+
+def criar_evolucao_mensal(serie, cubo=None):
+    """Filtros de competência e grupo e os gráficos mês a mês"""
+    if serie is None or len(competencias_da_serie(serie)) < 2:
+        return
+
+    competencias = list(competencias_da_serie(serie))
+    grupos = grupos_da_serie(serie)
+
+    col_periodo, col_grupos = st.columns(2)
+    inicio, fim = col_periodo.select_slider(
+        "Competências",
+        options=competencias,
+        value=(competencias[0], competencias[-1]),
+        format_func=lambda competencia: competencia.strftime("%m/%Y"),
+    )
+    selecionados = col_grupos.multiselect("Grupos", grupos, default=grupos)
+    if not selecionados:
+        st.info("Selecione ao menos um grupo.")
+        return
+
+    serie_filtrada = filtrar_serie(serie, inicio, fim, selecionados)
+    figuras = construir_figuras_series_em_cache(hash_dataframe(serie_filtrada), serie_filtrada)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.plotly_chart(figuras["evolucao"], use_container_width=True)
+
+    with col2:
+        st.plotly_chart(figuras["fluxo"], use_container_width=True)
+
+    sparklines = sparklines_por_grupo(serie_filtrada)
+    sparklines["SALDO ATUAL"] = formatar_moeda_vetor(sparklines["SALDO ATUAL"])
+    st.dataframe(
+        sparklines,
+        column_config={"EVOLUÇÃO": st.column_config.LineChartColumn("Evolução do Saldo Atual")},
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    if cubo is not None:
+        criar_consolidado_intervalo(cubo, inicio, fim, selecionados)
+
+
+# Acima disso, a lista de grupos vira uma tabela em vez de texto
+LIMITE_LISTA_MARKDOWN = 30
+
+ORDENACOES_ANALISE = ["Maior valor absoluto", "Nome do grupo", "Ordem do balancete"]
+
+
+def separar_grupos_por_saldo(df, ordenacao="Maior valor absoluto", limite=None):
     """
-    Lê um arquivo de texto e o divide em blocos de texto,
-    onde cada bloco é separado por uma ou mais linhas em branco.
+    Separa os grupos (sem a linha Total) com saldo atual positivo e negativo.
 
-    Args:
-        caminho_do_arquivo (Path ou str): O caminho para o arquivo de texto.
+    O sinal é calculado uma única vez para a coluna inteira e reaproveitado
+    nas duas partições.
 
     Returns:
-        list: Uma lista de strings, onde cada string é um bloco de texto.
-              Linhas vazias dentro dos blocos são mantidas, mas linhas
-              em branco que separam os blocos são usadas como delimitadores.
+        tuple: (positivos, negativos, total de positivos, total de
+               negativos); as partições já vêm ordenadas e cortadas em
+               `limite` linhas, com GRUPO SALDO e SALDO ATUAL.
     """
-    blocos = []
-    bloco_atual = []
+    df_analise = df.loc[
+        ~df["GRUPO SALDO"].str.contains("Total", case=False, na=False),
+        ["GRUPO SALDO", "SALDO ATUAL"],
+    ]
+    sinal = np.sign(df_analise["SALDO ATUAL"].to_numpy())
 
-    try:
-        with open(caminho_do_arquivo, 'r', encoding='utf-8') as f:
-            for linha in f:
-                # Remove espaços e quebras de linha no final para verificar se a linha está vazia
-                linha_limpa = linha.strip()
-
-                if linha_limpa:
-                    # Se a linha não está em branco, adicione-a ao bloco atual
-                    bloco_atual.append(linha) # Adiciona a linha original com sua quebra de linha
-                else:
-                    # Se a linha está em branco e temos um bloco acumulado
-                    if bloco_atual:
-                        # Junte as linhas do bloco atual em uma única string e adicione à lista de blocos
-                        blocos.append("".join(bloco_atual).strip()) # .strip() final para remover quebras de linha extras no final do bloco
-                        bloco_atual = [] # Reinicia o bloco atual
-            
-            # Após o loop, adicione o último bloco se houver
-            if bloco_atual:
-                blocos.append("".join(bloco_atual).strip())
-
-    except FileNotFoundError:
-        print(f"Erro: O arquivo '{caminho_do_arquivo}' não foi encontrado.")
-        return []
-    except Exception as e:
-        print(f"Ocorreu um erro ao ler o arquivo '{caminho_do_arquivo}': {e}")
-        return []
-    
-    return blocos
+    particoes = []
+    for parte in (df_analise[sinal > 0], df_analise[sinal < 0]):
+        if ordenacao == "Maior valor absoluto":
+            parte = parte.sort_values("SALDO ATUAL", key=np.abs, ascending=False, kind="stable")
+        elif ordenacao == "Nome do grupo":
+            parte = parte.sort_values("GRUPO SALDO", kind="stable")
+        particoes.append(parte)
 
-def formatar_periodo( inicial , final):
-    periodo_inicial_str = inicial.split(' até ')
-    periodo_final_str = final.split(' até ')
+    positivos, negativos = particoes
+    total_positivos, total_negativos = len(positivos), len(negativos)
+    if limite:
+        positivos, negativos = positivos.head(limite), negativos.head(limite)
 
-    return f"{periodo_inicial_str[0]} até {periodo_final_str[1]}"
+    return positivos, negativos, total_positivos, total_negativos
 
-def consolidar_blocos(blocos):
-    df_balancetes = []
-    periodos = []
 
-    for bloco in blocos:
-        df_balancete, periodo = processar_balancete_txt(bloco)
+def _exibir_grupos(grupos, total, mensagem_vazia):
+    """Envia a lista de grupos como um único elemento"""
+    if grupos.empty:
+        st.write(mensagem_vazia)
+        return
 
-        df_balancetes.append(df_balancete)
-        periodos.append(periodo)
+    valores = formatar_moeda_vetor(grupos["SALDO ATUAL"])
+    restantes = total - len(grupos)
 
+    if len(grupos) <= LIMITE_LISTA_MARKDOWN:
+        linhas = [f"• {grupo}: {valor}" for grupo, valor in zip(grupos["GRUPO SALDO"], valores)]
+        if restantes:
+            linhas.append(f"_… e mais {restantes} grupos_")
+        st.markdown("  \n".join(linhas))
+    else:
+        st.dataframe(
+            pd.DataFrame({"GRUPO SALDO": grupos["GRUPO SALDO"].to_numpy(), "SALDO ATUAL": valores}),
+            use_container_width=True,
+            hide_index=True,
+        )
+        if restantes:
+            st.caption(f"… e mais {restantes} grupos")
 
-    df_concat_balancetes = pd.concat(df_balancetes, ignore_index=True)
-    print("DataFrame consolidado (antes do agrupamento e limpeza):")
-    print(df_concat_balancetes)
-    print("\nTipos de dados antes da conversão:")
-    print(df_concat_balancetes.dtypes)
-    print("-" * 50)
-    
-    colunas_numericas = ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]
 
-    for col in colunas_numericas:
-        df_concat_balancetes[col] = pd.to_numeric(df_concat_balancetes[col], errors='coerce')
+def criar_analise_detalhada(df):
+    """Cria a lista de grupos com saldo positivo e negativo"""
+    if df is None or df.empty:
+        return
 
-    df_concat_balancetes = df_concat_balancetes.fillna(0)
+    col_ordem, col_limite = st.columns(2)
+    ordenacao = col_ordem.selectbox("Ordenar por", ORDENACOES_ANALISE)
+    limite = col_limite.number_input("Mostrar até (0 = todos)", min_value=0, value=0, step=5)
 
-    print("\nDataFrame consolidado (após conversão e fillna):")
-    print(df_concat_balancetes)
-    print("\nTipos de dados após conversão:")
-    print(df_concat_balancetes.dtypes)
-    print("-" * 50)
+    positivos, negativos, total_positivos, total_negativos = separar_grupos_por_saldo(
+        df, ordenacao, limite
+    )
 
-    df_balancete_consolidado = df_concat_balancetes.groupby("GRUPO SALDO")[colunas_numericas].sum().reset_index()
+    col1, col2 = st.columns(2)
 
-    print("\nDataFrame Final Consolidado (df_balancete_sum):")
-    print(df_balancete_consolidado)
-    
-    periodo_consolidado = formatar_periodo( periodos[0] , periodos[-1])
+    with col1:
+        st.write("**📈 Grupos com Saldo Positivo:**")
+        _exibir_grupos(positivos, total_positivos, "Nenhum grupo com saldo positivo")
 
-    return df_balancete_consolidado, periodo_consolidado
+    with col2:
+        st.write("**📉 Grupos com Saldo Negativo:**")
+        _exibir_grupos(negativos, total_negativos, "Nenhum grupo com saldo negativo")
 
 
+def preparar_balancete(caminho_do_arquivo, incremental=True):
+    """
+    Lê, separa em blocos e consolida o arquivo de balancete. No modo
+    incremental só os blocos acrescentados desde a última leitura são
+    processados.
 
+    Não usa o Streamlit, para poder rodar na thread do observador.
 
+    Returns:
+        tuple: (DataFrame consolidado, período, série mensal em formato
+               longo e cubo de agregados, os dois None sem dados mensais).
+    """
+    if incremental:
+        df_balancete, periodo = ingerir_incremental(caminho_do_arquivo)
+        df_mensal = carregar_balancetes_mensais(caminho_do_arquivo)
+    else:
+        # Os blocos são separados à medida que são processados
+        df_balancete, periodo, df_mensal = consolidar_blocos(iterar_blocos_do_arquivo(caminho_do_arquivo))
 
-# Interface principal
-st.title("💰 Dashboard Balancete Financeiro")
-st.markdown("---")
+    if df_mensal is None:
+        return df_balancete, periodo, None, None
+    return df_balancete, periodo, montar_serie_longa(df_mensal), montar_cubo(df_mensal)
 
 
-arquivo = 'dados/dados.txt'
+@st.cache_resource(show_spinner=False)
+def iniciar_observador(diretorio):
+    """
+    Observador da pasta de dados, único no processo: os TXT novos ou
+    alterados são processados em segundo plano, antes de alguém abrir o
+    dashboard.
+    """
+    return ObservadorExportacoes(
+        [diretorio], preparar_balancete, extensoes=(".txt",), calcular_hash=hash_do_arquivo
+    ).iniciar()
 
-blocos = ler_arquivo_e_separar_por_blocos(arquivo)
 
-df_balancete, periodo = consolidar_blocos(blocos)
+@st.cache_data(max_entries=16, show_spinner="Processando balancete...")
+def carregar_balancete(caminho_do_arquivo, hash_conteudo, incremental=True):
+    """
+    Balancete do arquivo, com o hash do conteúdo na chave do cache: enquanto
+    o arquivo não muda, as novas execuções do script reaproveitam o
+    resultado; quando ele muda no disco, a chave muda. No modo incremental
+    o resultado vem do observador, normalmente já pronto.
 
+    Returns:
+        tuple: Mesmo formato de preparar_balancete.
+    """
+    if not incremental:
+        return preparar_balancete(caminho_do_arquivo, incremental=False)
 
+    observador = iniciar_observador(os.path.dirname(os.path.abspath(caminho_do_arquivo)))
+    return observador.obter(caminho_do_arquivo, hash_conteudo)
 
 
-if df_balancete is not None:
-    # Cabeçalho com período
-    if periodo:
-        st.subheader(f"📅 {periodo}")
-    else:
-        st.subheader("📅 Balancete Analítico")
+@st.cache_resource(max_entries=4, show_spinner="Carregando lançamentos...")
+def carregar_livro_lancamentos(caminho, hash_conteudo):
+    """Livro de lançamentos do CSV, compartilhado entre as sessões até o arquivo mudar"""
+    with medir_etapa("lancamentos"):
+        return montar_livro(ler_lancamentos_csv(caminho))
 
-    # Métricas principais
-    st.subheader("📊 Resumo Financeiro")
-    criar_metricas_financeiras(df_balancete)
 
-    st.markdown("---")
+def criar_receitas_despesas(livro):
+    """Receitas e despesas por categoria e os lançamentos do período"""
+    if livro is None or not len(livro):
+        st.info("Nenhum lançamento encontrado.")
+        return
 
-    # Tabela do balancete
-    st.subheader("📋 Balancete Detalhado")
-    criar_tabela_balancete(df_balancete)
+    primeira = pd.Timestamp(livro.datas[0]).date()
+    ultima = pd.Timestamp(livro.datas[-1]).date()
+    categorias = list(livro.por_categoria)
 
-    st.markdown("---")
+    col_periodo, col_categorias = st.columns(2)
+    datas = col_periodo.date_input(
+        "Período", value=(primeira, ultima), min_value=primeira, max_value=ultima, format="DD/MM/YYYY"
+    )
+    # Enquanto só a primeira data foi escolhida, o intervalo termina nela
+    inicio, fim = (datas[0], datas[-1]) if len(datas) else (primeira, ultima)
+    selecionadas = col_categorias.multiselect("Categorias", categorias, default=categorias)
+    if not selecionadas:
+        st.info("Selecione ao menos uma categoria.")
+        return
+
+    totais = totais_por_categoria(livro, inicio, fim)
+    totais = totais[totais["CATEGORIA"].isin(selecionadas)]
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("💰 Receitas", formatar_moeda_locale(totais["RECEITAS"].sum()))
+    col2.metric("💸 Despesas", formatar_moeda_locale(totais["DESPESAS"].sum()))
+    col3.metric("📊 Resultado", formatar_moeda_locale(totais["SALDO"].sum()))
 
-    # Gráficos
-    st.subheader("📈 Análises Visuais")
-    criar_graficos_balancete(df_balancete)
+    for col in ["RECEITAS", "DESPESAS", "SALDO"]:
+        totais[col] = formatar_moeda_vetor(totais[col])
+    st.dataframe(totais, use_container_width=True, hide_index=True)
+
+    df = consultar_lancamentos(livro, inicio, fim, categorias=selecionadas)
+    st.caption(f"{len(df)} lançamentos")
+    df["DATA"] = df["DATA"].dt.strftime("%d/%m/%Y")
+    df["VALOR"] = formatar_moeda_vetor(df["VALOR"])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+
+@st.cache_resource(show_spinner=False)
+def carteira_compartilhada(diretorio):
+    """
+    Carteira de inadimplência da pasta, única no processo e atualizada no
+    lugar: cada execução só lê os arquivos novos ou alterados.
+    """
+    return {"carteira": None, "trava": threading.Lock()}
+
+
+def carregar_inadimplencia(diretorio):
+    estado = carteira_compartilhada(diretorio)
+    with estado["trava"], medir_etapa("inadimplencia"):
+        estado["carteira"] = ingerir_pasta(diretorio, estado["carteira"])
+    return estado["carteira"]
+
+
+def criar_inadimplencia(carteira):
+    """Métricas, valores por faixa de atraso e a posição de cada unidade"""
+    data_referencia = st.date_input("Posição em", value=datetime.today(), format="DD/MM/YYYY")
+    posicao = posicao_inadimplencia(carteira, data_referencia)
+    if posicao.empty:
+        st.info("Nenhuma cobrança encontrada.")
+        return
+
+    resumo = resumir_inadimplencia(posicao)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("🚨 Total Vencido", formatar_moeda_locale(resumo["vencido"]))
+    col2.metric("📅 A Vencer", formatar_moeda_locale(resumo["a_vencer"]))
+    col3.metric(
+        "🏠 Unidades Inadimplentes",
+        f"{resumo['unidades_inadimplentes']} de {resumo['unidades']}",
+        f"{resumo['taxa']:.1%}",
+        delta_color="inverse",
+    )
+    col4.metric("💚 Créditos das Unidades", formatar_moeda_locale(resumo["credito"]))
+
+    faixas = posicao[FAIXAS_ATRASO[1:]].sum()
+    st.bar_chart(pd.DataFrame({"Valor (R$)": faixas.to_numpy() / 100}, index=faixas.index))
+
+    somente_inadimplentes = st.checkbox("Somente unidades com valor vencido", value=True)
+    if somente_inadimplentes:
+        posicao = posicao[posicao[FAIXAS_ATRASO[1:]].sum(axis=1) > 0]
+
+    posicao = posicao.copy()
+    for col in ["COBRADO", "PAGO", "SALDO", *FAIXAS_ATRASO]:
+        posicao[col] = formatar_moeda_vetor(posicao[col])
+    st.dataframe(posicao, use_container_width=True, hide_index=True)
+
+
+CONSULTA_SQL_EXEMPLO = """SELECT competencia, grupo, saldo_atual / 100.0 AS saldo_atual
+FROM balancetes
+WHERE grupo LIKE 'Fundo%'
+ORDER BY competencia, grupo"""
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def abrir_banco_em_cache(chave, _cubo):
+    """
+    Banco SQLite em memória com os meses do cubo, um por conjunto de dados
+    (chave) e compartilhado entre as sessões; só aceita leitura.
+    """
+    df_mensal = _cubo.niveis["M"].reset_index().rename(columns={"JANELA": "COMPETENCIA"})
+    conexao = abrir_banco()
+    carregar_balancetes(conexao, df_mensal)
+    return bloquear_escrita(conexao)
+
+
+def criar_consulta_sql(cubo):
+    """Consulta livre sobre os balancetes mensais (tabela balancetes)"""
+    if cubo is None or not st.toggle("Consulta SQL"):
+        return
 
-    # Análise adicional
+    conexao = abrir_banco_em_cache(hash_dataframe(cubo.niveis["M"]), cubo)
+    sql = st.text_area("Consulta", CONSULTA_SQL_EXEMPLO, height=120)
+    st.caption(
+        "Colunas: competencia, grupo, periodo, saldo_anterior, creditos, "
+        "debitos, saldo_atual (valores em centavos)."
+    )
+
+    try:
+        resultado = consultar_sql(conexao, sql)
+    except Exception as e:
+        st.error(f"Erro na consulta: {e}")
+        return
+
+    st.dataframe(resultado, use_container_width=True, hide_index=True)
+    if resultado.attrs.get("truncado"):
+        st.caption(f"Mostrando só as primeiras {len(resultado)} linhas; use LIMIT ou filtros para ver o restante.")
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def processar_arquivo_enviado(hash_conteudo, nome, _dados):
+    """
+    Balancetes mensais de um arquivo TXT ou PDF enviado pelo navegador,
+    processados em memória.
+
+    O cache é do processo e a chave é o hash do conteúdo, então várias
+    sessões (vários síndicos na mesma instância) compartilham o resultado
+    sem que os arquivos passem pelo disco.
+    """
+    if nome.lower().endswith(".pdf"):
+        return processar_pdf_bytes(_dados)
+
+    df_mensal, _ = montar_balancetes_mensais(iterar_blocos_de_bytes(_dados))
+    return df_mensal
+
+
+@st.cache_data(max_entries=16, show_spinner="Processando arquivos enviados...")
+def consolidar_arquivos_enviados(hashes, _partes):
+    """
+    Consolida os balancetes mensais de vários arquivos enviados; um mês
+    que aparece em mais de um arquivo vale pelo último.
+
+    Returns:
+        tuple: Mesmo formato de carregar_balancete.
+    """
+    df_mensal = pd.concat([parte[["PERIODO"] + COLUNAS_BALANCETE] for parte in _partes], ignore_index=True)
+    df_mensal = (
+        ordenar_por_competencia(df_mensal)
+        .drop_duplicates(["COMPETENCIA", "GRUPO SALDO"], keep="last")
+        .reset_index(drop=True)
+    )
+
+    df_balancete, periodo = consolidar_balancetes_mensais(df_mensal.copy())
+    return df_balancete, periodo, montar_serie_longa(df_mensal), montar_cubo(df_mensal)
+
+
+def carregar_arquivos_enviados(enviados):
+    """Processa cada arquivo enviado (com cache) e consolida todos"""
+    hashes = []
+    partes = []
+
+    for arquivo in enviados:
+        dados = arquivo.getvalue()
+        hash_conteudo = hashlib.sha256(dados).hexdigest()
+        try:
+            df_mensal = processar_arquivo_enviado(hash_conteudo, arquivo.name, dados)
+        except Exception as e:
+            st.warning(f"Não foi possível ler '{arquivo.name}': {e}")
+            continue
+
+        if df_mensal is None or df_mensal.empty:
+            st.warning(f"Nenhum balancete encontrado em '{arquivo.name}'")
+            continue
+
+        hashes.append(hash_conteudo)
+        partes.append(df_mensal)
+
+    if not partes:
+        return None, None, None, None
+
+    return consolidar_arquivos_enviados(tuple(hashes), partes)
+
+
+ORIGEM_PASTA = "Arquivo dados/dados.txt"
+ORIGEM_ENVIO = "Enviar arquivos"
+
+
+SECAO_TABELA = "📋 Balancete Detalhado"
+SECAO_GRAFICOS = "📈 Análises Visuais"
+SECAO_EVOLUCAO = "📆 Evolução Mês a Mês"
+SECAO_ANALISE = "🔍 Análise Detalhada"
+SECAO_LANCAMENTOS = "🧾 Receitas e Despesas"
+SECAO_INADIMPLENCIA = "🏠 Inadimplência"
+SECOES = [
+    SECAO_TABELA,
+    SECAO_GRAFICOS,
+    SECAO_EVOLUCAO,
+    SECAO_ANALISE,
+    SECAO_LANCAMENTOS,
+    SECAO_INADIMPLENCIA,
+]
+
+
+def main():
+    """Interface principal; executada pelo `streamlit run balancete_v2.py`"""
+    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
+
+    # Configuração da página
+    st.set_page_config(
+        page_title="Balancete Financeiro",
+        page_icon="💰",
+        layout="wide",
+        initial_sidebar_state="expanded",
+    )
+
+    configurar_logging()
+
+    st.title("💰 Dashboard Balancete Financeiro")
     st.markdown("---")
-    st.subheader("🔍 Análise Detalhada")
 
-    # Remove total para análise
-    df_analise = df_balancete[
-        ~df_balancete["GRUPO SALDO"].str.contains("Total", case=False, na=False)
-    ]
+    arquivo = 'dados/dados.txt'
+    arquivo_lancamentos = 'dados/lancamentos.csv'
+    diretorio_inadimplencia = 'dados/inadimplencia'
+    leitura_incremental = True
 
-    col1, col2 = st.columns(2)
+    # Sem o dados.txt (ex.: numa instância hospedada) o padrão é o envio
+    origens = [ORIGEM_PASTA, ORIGEM_ENVIO]
+    origem = st.sidebar.radio(
+        "Origem dos dados", origens, index=0 if os.path.exists(arquivo) else 1
+    )
 
-    with col1:
-        st.write("**📈 Grupos com Saldo Positivo:**")
-        positivos = df_analise[df_analise["SALDO ATUAL"] > 0]
-        if not positivos.empty:
-            for _, row in positivos.iterrows():
-                st.write(f"• {row['GRUPO SALDO']}: {formatar_moeda(row['SALDO ATUAL'])}")
-        else:
-            st.write("Nenhum grupo com saldo positivo")
+    if origem == ORIGEM_ENVIO:
+        enviados = st.sidebar.file_uploader(
+            "Balancetes (TXT ou PDF)", type=["txt", "pdf"], accept_multiple_files=True
+        )
+        if not enviados:
+            st.info("Envie um ou mais arquivos de balancete pela barra lateral.")
+            st.stop()
 
-    with col2:
-        st.write("**📉 Grupos com Saldo Negativo:**")
-        negativos = df_analise[df_analise["SALDO ATUAL"] < 0]
-        if not negativos.empty:
-            for _, row in negativos.iterrows():
-                st.write(f"• {row['GRUPO SALDO']}: {formatar_moeda(row['SALDO ATUAL'])}")
-        else:
-            st.write("Nenhum grupo com saldo negativo")
+        with medir_etapa("ler"):
+            df_balancete, periodo, serie_mensal, cubo = carregar_arquivos_enviados(enviados)
+    else:
+        # Daqui em diante as mudanças no dados.txt são processadas em segundo plano
+        iniciar_observador(os.path.dirname(os.path.abspath(arquivo)))
+        try:
+            with medir_etapa("ler"):
+                hash_conteudo = hash_do_arquivo(arquivo)
+        except FileNotFoundError:
+            st.error(f"Erro: O arquivo '{arquivo}' não foi encontrado.")
+            st.stop()
+
+        try:
+            df_balancete, periodo, serie_mensal, cubo = carregar_balancete(arquivo, hash_conteudo, leitura_incremental)
+        except (OSError, UnicodeDecodeError) as e:
+            # Um erro no meio do arquivo não vira um balancete parcial
+            st.error(f"Erro ao ler o arquivo '{arquivo}': {e}")
+            st.stop()
+
+    with medir_etapa("renderizar"):
+        if df_balancete is not None:
+            # Cabeçalho com período
+            if periodo:
+                st.subheader(f"📅 {periodo}")
+            else:
+                st.subheader("📅 Balancete Analítico")
+
+            # Métricas principais
+            st.subheader("📊 Resumo Financeiro")
+            criar_metricas_financeiras(df_balancete)
+
+            st.markdown("---")
+
+            # Só a seção escolhida é montada e enviada ao navegador
+            secoes = list(SECOES)
+            if serie_mensal is None or len(competencias_da_serie(serie_mensal)) < 2:
+                secoes.remove(SECAO_EVOLUCAO)
+            if not os.path.exists(arquivo_lancamentos):
+                secoes.remove(SECAO_LANCAMENTOS)
+            if not os.path.isdir(diretorio_inadimplencia):
+                secoes.remove(SECAO_INADIMPLENCIA)
+            secao = st.radio("Seção", secoes, horizontal=True, key="secao", label_visibility="collapsed")
+            st.subheader(secao)
+
+            if secao == SECAO_TABELA:
+                criar_tabela_balancete(df_balancete)
+            elif secao == SECAO_GRAFICOS:
+                criar_graficos_balancete(df_balancete)
+                if SECAO_EVOLUCAO in secoes:
+                    st.caption(f"O saldo de cada grupo mês a mês está na seção {SECAO_EVOLUCAO}.")
+            elif secao == SECAO_EVOLUCAO:
+                criar_evolucao_mensal(serie_mensal, cubo)
+            elif secao == SECAO_LANCAMENTOS:
+                livro = carregar_livro_lancamentos(
+                    arquivo_lancamentos, calcular_hash_arquivo(arquivo_lancamentos)
+                )
+                criar_receitas_despesas(livro)
+            elif secao == SECAO_INADIMPLENCIA:
+                criar_inadimplencia(carregar_inadimplencia(diretorio_inadimplencia))
+            else:
+                criar_analise_detalhada(df_balancete)
+                criar_consulta_sql(cubo)
+
+
+if __name__ == "__main__":
+    main()
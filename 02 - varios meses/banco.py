@@ -0,0 +1,299 @@
+"""
+Banco SQL embutido (SQLite) com os balancetes mensais processados.
+
+Cada linha é um grupo de um condomínio num mês, com os valores em centavos.
+A chave primária (condominio, competencia, grupo) é também o índice
+clusterizado da tabela (WITHOUT ROWID), e um índice em (grupo, competencia)
+atende as consultas de um grupo em todos os condomínios. Filtros e
+agregações são feitos pelo SQLite, que lê só as faixas do índice
+necessárias em vez de varrer o histórico inteiro.
+
+Usa só o sqlite3 da biblioteca padrão; o banco pode ficar em memória ou
+num arquivo reaproveitado entre execuções.
+"""
+import contextlib
+import re
+import sqlite3
+import threading
+
+import pandas as pd
+
+from consolidacao import ordenar_por_competencia
+from processamento import COLUNAS_VALORES
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS balancetes (
+    condominio TEXT NOT NULL,
+    competencia TEXT NOT NULL,
+    grupo TEXT NOT NULL,
+    periodo TEXT,
+    ordem INTEGER NOT NULL,
+    saldo_anterior INTEGER NOT NULL,
+    creditos INTEGER NOT NULL,
+    debitos INTEGER NOT NULL,
+    saldo_atual INTEGER NOT NULL,
+    PRIMARY KEY (condominio, competencia, grupo)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS balancetes_grupo ON balancetes (grupo, competencia);
+"""
+
+# Expressão da janela a partir de competencia ("AAAA-MM")
+JANELAS_SQL = {
+    None: "''",
+    "M": "competencia",
+    "Q": "substr(competencia, 1, 4) || 'Q' || ((CAST(substr(competencia, 6, 2) AS INTEGER) + 2) / 3)",
+    "Y": "substr(competencia, 1, 4)",
+}
+
+
+# Únicas ações liberadas numa conexão com bloquear_escrita: ler tabelas e
+# chamar funções. PRAGMA, ATTACH e qualquer escrita são negados.
+ACOES_LEITURA = frozenset(
+    {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+)
+
+# Limites de uma consulta livre: instruções da máquina virtual do SQLite
+# (conferidas a cada PASSO_OPERACOES), linhas devolvidas e tamanho de um
+# texto ou blob. Sem eles, uma CTE recursiva sem fim ou um randomblob
+# gigante travaria o processo inteiro, que é compartilhado pelas sessões.
+LIMITE_OPERACOES = 50_000_000
+PASSO_OPERACOES = 100_000
+LIMITE_LINHAS = 10_000
+LIMITE_TAMANHO = 1_000_000
+
+# Comentários no começo e a primeira palavra da consulta
+_INICIO_CONSULTA = re.compile(r"\s*(?:(?:--[^\n]*(?:\n|$)|/\*.*?\*/)\s*)*(\w+)", re.DOTALL)
+
+
+class ConexaoBanco(sqlite3.Connection):
+    """Conexão com uma trava, para threads que a compartilham não misturarem consultas"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.trava = threading.RLock()
+
+
+def _trava(conexao):
+    return getattr(conexao, "trava", None) or contextlib.nullcontext()
+
+
+def abrir_banco(caminho=":memory:"):
+    """Abre (ou cria) o banco e garante as tabelas e índices"""
+    conexao = sqlite3.connect(caminho, check_same_thread=False, factory=ConexaoBanco)
+    conexao.execute("PRAGMA journal_mode = WAL")
+    conexao.execute("PRAGMA synchronous = NORMAL")
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+
+def carregar_balancetes(conexao, df_mensal, condominio=""):
+    """
+    Grava os balancetes mensais no banco; um mês já gravado para o mesmo
+    condomínio e grupo é substituído.
+
+    Args:
+        df_mensal (DataFrame): Balancetes mensais com PERIODO ou
+            COMPETENCIA e, opcionalmente, CONDOMINIO (como o resultado de
+            processar_lote depois de reset_index()).
+        condominio (str, opcional): Usado quando não há a coluna CONDOMINIO.
+
+    Returns:
+        int: Número de linhas gravadas.
+    """
+    df = ordenar_por_competencia(df_mensal)
+    df = df[df["COMPETENCIA"].notna()]
+    if "CONDOMINIO" not in df:
+        df = df.assign(CONDOMINIO=condominio)
+    if "PERIODO" not in df:
+        df = df.assign(PERIODO=None)
+
+    # Posição do grupo dentro do mês, para devolver os grupos na ordem do balancete
+    ordem = df.groupby(["CONDOMINIO", "COMPETENCIA"], sort=False).cumcount()
+
+    linhas = zip(
+        df["CONDOMINIO"].astype(str),
+        df["COMPETENCIA"].astype(str),
+        df["GRUPO SALDO"].astype(str),
+        df["PERIODO"],
+        ordem.tolist(),
+        *(df[col].fillna(0).astype("int64").tolist() for col in COLUNAS_VALORES),
+    )
+
+    with conexao:
+        cursor = conexao.executemany(
+            "INSERT OR REPLACE INTO balancetes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", linhas
+        )
+    return cursor.rowcount
+
+
+def _filtros(inicio=None, fim=None, condominios=None, grupos=None):
+    """Cláusula WHERE e parâmetros; None não filtra"""
+    condicoes = []
+    parametros = []
+
+    if condominios is not None:
+        condominios = list(condominios)
+        condicoes.append(f"condominio IN ({', '.join('?' * len(condominios))})")
+        parametros.extend(condominios)
+    if inicio is not None:
+        condicoes.append("competencia >= ?")
+        parametros.append(str(pd.Period(inicio, freq="M")))
+    if fim is not None:
+        condicoes.append("competencia <= ?")
+        parametros.append(str(pd.Period(fim, freq="M")))
+    if grupos is not None:
+        grupos = list(grupos)
+        condicoes.append(f"grupo IN ({', '.join('?' * len(grupos))})")
+        parametros.extend(grupos)
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return where, parametros
+
+
+def consultar_consolidado(conexao, inicio=None, fim=None, janela=None, grupos=None, condominios=None):
+    """
+    Consolida no SQLite, com as regras de consolidar_periodos: primeiro
+    saldo anterior, soma dos movimentos e último saldo atual de cada
+    condomínio, grupo e janela.
+
+    Args:
+        inicio, fim (str ou pandas.Period, opcionais): Competências das
+            pontas, inclusive.
+        janela (str, opcional): "M", "Q" ou "Y"; None consolida o
+            intervalo inteiro.
+        grupos, condominios (list, opcionais): None não filtra.
+
+    Returns:
+        DataFrame: Colunas CONDOMINIO, JANELA (se pedida), GRUPO SALDO e os
+                   valores em centavos, com os grupos na ordem do balancete.
+    """
+    where, parametros = _filtros(inicio, fim, condominios, grupos)
+    # Movimentos somados no GROUP BY; os saldos do primeiro e do último mês
+    # vêm de buscas pela chave primária
+    sql = f"""
+        WITH agregado AS (
+            SELECT
+                condominio, grupo, {JANELAS_SQL[janela]} AS janela,
+                MIN(competencia) AS primeira, MAX(competencia) AS ultima,
+                SUM(creditos) AS creditos, SUM(debitos) AS debitos, MIN(ordem) AS ordem
+            FROM balancetes {where}
+            GROUP BY condominio, janela, grupo
+        )
+        SELECT
+            a.condominio AS "CONDOMINIO",
+            a.janela AS "JANELA",
+            a.grupo AS "GRUPO SALDO",
+            p.saldo_anterior AS "SALDO ANTERIOR",
+            a.creditos AS "CRÉDITOS",
+            a.debitos AS "DÉBITOS",
+            u.saldo_atual AS "SALDO ATUAL"
+        FROM agregado a
+        JOIN balancetes p
+            ON p.condominio = a.condominio AND p.competencia = a.primeira AND p.grupo = a.grupo
+        JOIN balancetes u
+            ON u.condominio = a.condominio AND u.competencia = a.ultima AND u.grupo = a.grupo
+        ORDER BY a.condominio, a.janela, a.ordem
+    """
+    with _trava(conexao):
+        df = pd.read_sql_query(sql, conexao, params=parametros)
+    df[COLUNAS_VALORES] = df[COLUNAS_VALORES].astype("int64")
+
+    if janela is None:
+        return df.drop(columns="JANELA")
+    return df
+
+
+def _autorizar_leitura(acao, *_):
+    return sqlite3.SQLITE_OK if acao in ACOES_LEITURA else sqlite3.SQLITE_DENY
+
+
+def bloquear_escrita(conexao):
+    """
+    A partir daqui a conexão só lê: comandos que alteram o banco, PRAGMA
+    (inclusive o que desligaria o query_only) e ATTACH falham, e nenhum
+    texto ou blob passa de LIMITE_TAMANHO bytes.
+    """
+    conexao.execute("PRAGMA query_only = ON")
+    conexao.set_authorizer(_autorizar_leitura)
+    conexao.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, LIMITE_TAMANHO)
+    return conexao
+
+
+def consultar_sql(
+    conexao, sql, parametros=(), limite_linhas=LIMITE_LINHAS, limite_operacoes=LIMITE_OPERACOES
+):
+    """
+    Executa uma consulta livre (SELECT ou WITH) sobre a tabela balancetes.
+
+    Args:
+        limite_linhas (int ou None): Linhas devolvidas no máximo; com mais,
+            o resultado é cortado e df.attrs["truncado"] fica True.
+        limite_operacoes (int ou None): Instruções do SQLite antes de a
+            consulta ser interrompida. None não limita.
+
+    Raises:
+        ValueError: Se o comando não for uma consulta.
+        sqlite3.Error: Se a consulta for inválida, passar dos limites ou
+            tentar alterar um banco com bloquear_escrita.
+    """
+    inicio = _INICIO_CONSULTA.match(sql)
+    if inicio is None or inicio.group(1).upper() not in ("SELECT", "WITH"):
+        raise ValueError("Só consultas SELECT são aceitas")
+    return _consultar_com_limites(conexao, sql, parametros, limite_linhas, limite_operacoes)
+
+
+def _consultar_com_limites(conexao, sql, parametros, limite_linhas, limite_operacoes):
+    passos = [0]
+
+    def conferir():
+        passos[0] += 1
+        # Diferente de zero interrompe a consulta
+        return passos[0] * PASSO_OPERACOES > limite_operacoes
+
+    with _trava(conexao):
+        if limite_operacoes is not None:
+            conexao.set_progress_handler(conferir, PASSO_OPERACOES)
+        cursor = conexao.cursor()
+        try:
+            cursor.execute(sql, parametros)
+            if limite_linhas is None:
+                linhas = cursor.fetchall()
+            else:
+                linhas = cursor.fetchmany(limite_linhas + 1)
+            colunas = [descricao[0] for descricao in cursor.description or ()]
+        except sqlite3.OperationalError:
+            if limite_operacoes is not None and passos[0] * PASSO_OPERACOES > limite_operacoes:
+                raise sqlite3.OperationalError(
+                    f"consulta interrompida: passou do limite de {limite_operacoes} operações"
+                ) from None
+            raise
+        finally:
+            cursor.close()
+            if limite_operacoes is not None:
+                conexao.set_progress_handler(None, 0)
+
+    truncado = limite_linhas is not None and len(linhas) > limite_linhas
+    df = pd.DataFrame.from_records(linhas[:limite_linhas] if truncado else linhas, columns=colunas)
+    df.attrs["truncado"] = truncado
+    return df
+
+
+def consultar_mensal(conexao, inicio=None, fim=None, grupos=None, condominios=None):
+    """Linhas mensais filtradas, no formato de processar_lote depois de reset_index()"""
+    where, parametros = _filtros(inicio, fim, condominios, grupos)
+    sql = f"""
+        SELECT
+            condominio AS "CONDOMINIO",
+            competencia AS "COMPETENCIA",
+            periodo AS "PERIODO",
+            grupo AS "GRUPO SALDO",
+            saldo_anterior AS "SALDO ANTERIOR",
+            creditos AS "CRÉDITOS",
+            debitos AS "DÉBITOS",
+            saldo_atual AS "SALDO ATUAL"
+        FROM balancetes {where}
+        ORDER BY condominio, competencia, ordem
+    """
+    with _trava(conexao):
+        return pd.read_sql_query(sql, conexao, params=parametros)
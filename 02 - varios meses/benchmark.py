@@ -0,0 +1,251 @@
+"""
+Benchmark das etapas do balancete com dados sintéticos.
+
+Gera arquivos dados.txt no formato atual (de 1 mês a 50 anos, para um ou
+vários condomínios), mede o tempo e o pico de memória de cada etapa e,
+opcionalmente, compara com uma referência gravada antes, falhando quando
+alguma etapa fica mais lenta que a tolerância.
+
+Uso:
+    python benchmark.py --meses 1 12 120 600 --condominios 1
+    python benchmark.py --meses 120 --condominios 200 --gravar-referencia ref.json
+    python benchmark.py --meses 120 --condominios 200 --referencia ref.json
+    python benchmark.py --meses 12 --celulas 1000000
+"""
+import argparse
+import calendar
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from consolidacao import consolidar_balancetes_mensais
+from formatacao import formatar_moeda
+from graficos import construir_figuras_balancete
+from lote import processar_lote
+from processamento import (
+    COLUNAS_BALANCETE,
+    converter_valor_centavos,
+    decodificar_coluna_moeda,
+    iterar_blocos_do_arquivo,
+    ler_arquivo_e_separar_por_blocos,
+    montar_balancetes_mensais,
+)
+
+
+GRUPOS = [
+    "Condomínio",
+    "Fundo de Reserva",
+    "Fundo de Obras",
+    "Retenção de Tributos e Impost",
+    "Conta Op - 13 Salario com Encargos",
+]
+
+NOMES_MESES = [
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho",
+    "agosto", "setembro", "outubro", "novembro", "dezembro",
+]
+
+
+def gerar_dados_txt(caminho, meses, inicio="2000-01", semente=0):
+    """
+    Escreve um dados.txt sintético com `meses` blocos mensais consecutivos.
+
+    Os valores são coerentes entre si: o saldo atual é o anterior mais
+    créditos menos débitos, o saldo anterior de um mês é o atual do mês
+    anterior e a linha Total soma os grupos.
+    """
+    rng = np.random.default_rng(semente)
+    competencia = pd.Period(inicio, freq="M")
+    saldos = rng.integers(-500_000, 2_000_000, len(GRUPOS))
+
+    with open(caminho, "w", encoding="utf-8") as f:
+        for indice in range(meses):
+            creditos = rng.integers(0, 5_000_000, len(GRUPOS))
+            debitos = rng.integers(0, 5_000_000, len(GRUPOS))
+            debitos[1:] = np.where(rng.random(len(GRUPOS) - 1) < 0.8, 0, debitos[1:])
+            atuais = saldos + creditos - debitos
+
+            ano, mes = competencia.year, competencia.month
+            ultimo_dia = calendar.monthrange(ano, mes)[1]
+            nome_mes = NOMES_MESES[mes - 1]
+
+            linhas = [
+                "Balancete Analítico",
+                f"01 de {nome_mes} de {ano} até {ultimo_dia} de {nome_mes} de {ano}",
+                f"{mes:02d}/{ano}",
+                *COLUNAS_BALANCETE,
+            ]
+            colunas = (saldos, creditos, debitos, atuais)
+            for i, grupo in enumerate(GRUPOS):
+                linhas.append(grupo)
+                linhas.extend(formatar_moeda(coluna[i]) for coluna in colunas)
+            linhas.append("Total")
+            linhas.extend(formatar_moeda(coluna.sum()) for coluna in colunas)
+
+            if indice:
+                f.write("\n\n")
+            f.write("\n".join(linhas))
+
+            saldos = atuais
+            competencia += 1
+
+
+def gerar_exportacoes(diretorio, condominios, meses):
+    """Cria uma subpasta com um dados.txt para cada condomínio"""
+    for indice in range(condominios):
+        pasta = os.path.join(diretorio, f"Condominio {indice:04d}")
+        os.makedirs(pasta, exist_ok=True)
+        gerar_dados_txt(os.path.join(pasta, "dados.txt"), meses, semente=indice)
+
+
+def _medir(funcao, repeticoes):
+    """Menor tempo entre as repetições e pico de memória de uma execução"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return resultado, min(tempos), pico
+
+
+def medir_cenario(diretorio, meses, condominios, repeticoes=3):
+    """
+    Mede as etapas para um cenário de `meses` meses e `condominios`
+    condomínios. As etapas de um único arquivo usam o primeiro condomínio.
+
+    Returns:
+        dict: etapa -> {"segundos": ..., "pico_mb": ...}
+    """
+    gerar_exportacoes(diretorio, condominios, meses)
+    caminho = os.path.join(diretorio, "Condominio 0000", "dados.txt")
+    resultados = {}
+
+    def registrar(etapa, funcao):
+        resultado, segundos, pico = _medir(funcao, repeticoes)
+        resultados[etapa] = {"segundos": segundos, "pico_mb": pico / 1e6}
+        return resultado
+
+    blocos = registrar("separar", lambda: ler_arquivo_e_separar_por_blocos(caminho))
+    df_mensal, _ = registrar("processar", lambda: montar_balancetes_mensais(blocos))
+    # Separar e processar em fluxo, sem a lista de blocos
+    registrar("processar_fluxo", lambda: montar_balancetes_mensais(iterar_blocos_do_arquivo(caminho)))
+
+    with open(caminho, "r", encoding="utf-8") as f:
+        valores = [linha.strip() for linha in f if linha.startswith("R$")]
+    registrar("converter_valor_centavos", lambda: [converter_valor_centavos(v) for v in valores])
+    registrar("decodificar_coluna_moeda", lambda: decodificar_coluna_moeda(valores, centavos=True))
+
+    consolidado, _ = registrar("consolidar", lambda: consolidar_balancetes_mensais(df_mensal.copy()))
+    registrar("graficos", lambda: construir_figuras_balancete(consolidado))
+
+    if condominios > 1:
+        registrar("lote", lambda: processar_lote(diretorio))
+
+    return resultados
+
+
+def medir_conversao_moeda(celulas, repeticoes=3, semente=0):
+    """
+    Compara a conversão célula a célula (como um df.apply) com
+    decodificar_coluna_moeda numa coluna de `celulas` strings de moeda.
+
+    Returns:
+        dict: etapa -> {"segundos": ..., "pico_mb": ...}
+    """
+    rng = np.random.default_rng(semente)
+    valores = pd.Series([formatar_moeda(int(v)) for v in rng.integers(-10**9, 10**9, celulas)])
+    resultados = {}
+
+    for etapa, funcao in [
+        ("apply", lambda: valores.apply(converter_valor_centavos).to_numpy()),
+        ("decodificar_coluna_moeda", lambda: decodificar_coluna_moeda(valores.to_numpy(), centavos=True)[0]),
+    ]:
+        resultado, segundos, pico = _medir(funcao, repeticoes)
+        resultados[etapa] = {"segundos": segundos, "pico_mb": pico / 1e6}
+
+    return resultados
+
+
+def comparar_com_referencia(resultados, referencia, tolerancia):
+    """
+    Lista as etapas mais lentas que a referência além da tolerância
+    (ex.: 0.25 = 25% mais lenta).
+    """
+    regressoes = []
+    for chave, medida in resultados.items():
+        anterior = referencia.get(chave)
+        if anterior is None:
+            continue
+        limite = anterior["segundos"] * (1 + tolerancia)
+        if medida["segundos"] > limite:
+            regressoes.append(
+                f"{chave}: {medida['segundos'] * 1000:.1f} ms "
+                f"(referência {anterior['segundos'] * 1000:.1f} ms)"
+            )
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do balancete.")
+    parser.add_argument("--meses", type=int, nargs="+", default=[1, 12, 120, 600])
+    parser.add_argument("--condominios", type=int, nargs="+", default=[1])
+    parser.add_argument(
+        "--celulas", type=int, nargs="*", default=[10_000, 200_000, 1_000_000],
+        help="Tamanhos de coluna para comparar a conversão de moeda",
+    )
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--referencia", help="JSON com medidas anteriores para comparar")
+    parser.add_argument("--gravar-referencia", help="Grava as medidas neste JSON")
+    parser.add_argument("--tolerancia", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    resultados = {}
+    for condominios in args.condominios:
+        for meses in args.meses:
+            with tempfile.TemporaryDirectory() as diretorio:
+                medidas = medir_cenario(diretorio, meses, condominios, args.repeticoes)
+            for etapa, medida in medidas.items():
+                chave = f"{meses}m x {condominios}c / {etapa}"
+                resultados[chave] = medida
+                print(f"{chave:<45} {medida['segundos'] * 1000:>10.1f} ms {medida['pico_mb']:>9.1f} MB")
+
+    for celulas in args.celulas:
+        medidas = medir_conversao_moeda(celulas, args.repeticoes)
+        for etapa, medida in medidas.items():
+            chave = f"moeda {celulas} células / {etapa}"
+            resultados[chave] = medida
+            print(f"{chave:<45} {medida['segundos'] * 1000:>10.1f} ms {medida['pico_mb']:>9.1f} MB")
+        ganho = medidas["apply"]["segundos"] / medidas["decodificar_coluna_moeda"]["segundos"]
+        print(f"{'':<45} {ganho:>10.1f}x mais rápido")
+
+    if args.gravar_referencia:
+        with open(args.gravar_referencia, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    if args.referencia:
+        with open(args.referencia, "r", encoding="utf-8") as f:
+            referencia = json.load(f)
+        regressoes = comparar_com_referencia(resultados, referencia, args.tolerancia)
+        if regressoes:
+            print("\nRegressões de desempenho:")
+            for regressao in regressoes:
+                print(f"  {regressao}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
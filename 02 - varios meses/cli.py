@@ -0,0 +1,165 @@
+"""
+Balancete consolidado pela linha de comando, sem o Streamlit.
+
+Processa uma pasta de exportações (uma subpasta por condomínio, como em
+lote.py) e grava o consolidado de cada condomínio em CSV, Parquet ou XLSX,
+conforme a extensão do arquivo de saída. Os valores saem em reais.
+
+Os balancetes mensais passam pelo banco SQLite de banco.py, e os filtros e
+a consolidação são feitos por ele. Com --banco o banco fica num arquivo:
+uma nova execução pode consultá-lo sem reprocessar as exportações, e
+--sql executa uma consulta livre sobre a tabela balancetes (valores em
+centavos).
+
+O pandas e os módulos de processamento só são importados depois de lidos os
+argumentos, então --help e erros de uso respondem na hora; Plotly e
+Streamlit nunca são importados. Parquet depende do pyarrow e XLSX do
+openpyxl, carregados pelo pandas só na gravação.
+
+Uso:
+    python cli.py exportacoes --saida consolidado.xlsx
+    python cli.py exportacoes --saida anual.parquet --janela Y
+    python cli.py exportacoes --saida mensal.csv --mensal --inicio 2024-01
+    python cli.py exportacoes --banco balancetes.sqlite --saida consolidado.csv
+    python cli.py --banco balancetes.sqlite --saida obras.csv \
+        --sql "SELECT condominio, SUM(debitos) FROM balancetes WHERE grupo = 'Fundo de Obras' GROUP BY 1"
+"""
+import argparse
+import os
+import sys
+
+
+FORMATOS = (".csv", ".parquet", ".xlsx")
+
+
+def consolidar_diretorio(
+    diretorio_raiz=None, janela=None, inicio=None, fim=None, mensal=False, processos=None,
+    banco=":memory:", sql=None,
+):
+    """
+    Processa as exportações da pasta e consulta o banco.
+
+    Args:
+        diretorio_raiz (Path ou str, opcional): Pasta de exportações; sem
+            ela, só o que já está no banco é consultado.
+        janela (str, opcional): "M", "Q" ou "Y" para uma linha por janela;
+            None consolida o intervalo inteiro.
+        inicio, fim (str, opcionais): Competências das pontas ("2024-01").
+        mensal (bool): Devolve as linhas mensais, sem consolidar.
+        banco (str): Arquivo SQLite, ou ":memory:".
+        sql (str, opcional): Consulta livre; ignora os demais filtros.
+
+    Returns:
+        tuple: (DataFrame com o resultado, RelatorioLote ou None).
+    """
+    from banco import (
+        abrir_banco,
+        bloquear_escrita,
+        carregar_balancetes,
+        consultar_consolidado,
+        consultar_mensal,
+        consultar_sql,
+    )
+    from lote import processar_lote
+
+    conexao = abrir_banco(banco)
+    relatorio = None
+
+    try:
+        if diretorio_raiz is not None:
+            df_lote, relatorio = processar_lote(diretorio_raiz, processos)
+            if not df_lote.empty:
+                carregar_balancetes(conexao, df_lote.reset_index())
+
+        bloquear_escrita(conexao)
+        if sql is not None:
+            # Na linha de comando o banco é do próprio usuário: sem limites
+            df = consultar_sql(conexao, sql, limite_linhas=None, limite_operacoes=None)
+        elif mensal:
+            df = consultar_mensal(conexao, inicio, fim)
+        else:
+            df = consultar_consolidado(conexao, inicio, fim, janela)
+    finally:
+        conexao.close()
+
+    return df, relatorio
+
+
+def gravar_resultado(df, caminho_saida):
+    """
+    Grava o resultado no formato da extensão de `caminho_saida`, com os
+    valores convertidos de centavos para reais.
+
+    Raises:
+        ValueError: Se a extensão não estiver em FORMATOS.
+    """
+    from processamento import COLUNAS_VALORES
+
+    extensao = os.path.splitext(caminho_saida)[1].lower()
+    if extensao not in FORMATOS:
+        raise ValueError(f"Formato de saída não suportado: '{extensao}'")
+
+    df = df.copy()
+    valores = [col for col in COLUNAS_VALORES if col in df]
+    df[valores] = df[valores] / 100
+    for col in ("JANELA", "COMPETENCIA"):
+        if col in df:
+            df[col] = df[col].astype(str)
+
+    if extensao == ".csv":
+        df.to_csv(caminho_saida, index=False, encoding="utf-8-sig")
+    elif extensao == ".parquet":
+        df.to_parquet(caminho_saida, index=False)
+    else:
+        df.to_excel(caminho_saida, index=False, sheet_name="Balancete")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o balancete consolidado de vários condomínios.")
+    parser.add_argument("diretorio", nargs="?", help="Pasta com uma subpasta por condomínio")
+    parser.add_argument("--saida", required=True, help="Arquivo .csv, .parquet ou .xlsx")
+    parser.add_argument("--janela", choices=["M", "Q", "Y"], help="Uma linha por mês, trimestre ou ano")
+    parser.add_argument("--inicio", help="Primeira competência (AAAA-MM)")
+    parser.add_argument("--fim", help="Última competência (AAAA-MM)")
+    parser.add_argument("--mensal", action="store_true", help="Grava as linhas mensais, sem consolidar")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos")
+    parser.add_argument("--banco", default=":memory:", help="Arquivo SQLite para guardar os balancetes")
+    parser.add_argument("--sql", help="Consulta livre sobre a tabela balancetes")
+    args = parser.parse_args(argv)
+
+    if os.path.splitext(args.saida)[1].lower() not in FORMATOS:
+        parser.error(f"--saida deve terminar em {', '.join(FORMATOS)}")
+    if args.diretorio is None and args.banco == ":memory:":
+        parser.error("informe a pasta de exportações ou um --banco já preenchido")
+    if args.diretorio is not None and not os.path.isdir(args.diretorio):
+        parser.error(f"pasta não encontrada: '{args.diretorio}'")
+
+    try:
+        df, relatorio = consolidar_diretorio(
+            args.diretorio, args.janela, args.inicio, args.fim, args.mensal, args.processos,
+            args.banco, args.sql,
+        )
+    except Exception as e:
+        if args.sql is None:
+            raise
+        print(f"Erro na consulta: {e}", file=sys.stderr)
+        return 1
+    if relatorio is not None:
+        print(relatorio, file=sys.stderr)
+
+    if df.empty:
+        print("Nenhum balancete encontrado.", file=sys.stderr)
+        return 1
+
+    try:
+        gravar_resultado(df, args.saida)
+    except ImportError as e:
+        # pyarrow (Parquet) e openpyxl (XLSX) são opcionais
+        print(f"Não foi possível gravar '{args.saida}': {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
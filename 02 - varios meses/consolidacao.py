@@ -0,0 +1,189 @@
+"""
+Consolidação dos balancetes mensais em períodos maiores.
+
+Somar os saldos de vários meses não faz sentido: o saldo anterior de um
+período é o do primeiro mês e o saldo atual é o do último. Só créditos e
+débitos, que são movimentos, são somados. Todas as funções recebem o
+DataFrame mensal empilhado (uma linha por grupo e mês, com PERIODO e/ou
+COMPETENCIA), montado uma única vez, e calculam qualquer janela a partir
+dele. Os valores são centavos inteiros, então as somas são exatas.
+"""
+import logging
+
+import pandas as pd
+
+from instrumentacao import medir_etapa, obter_logger
+from processamento import (
+    COLUNAS_VALORES,
+    competencia_dos_periodos,
+    montar_balancetes_mensais,
+)
+
+
+logger = obter_logger(__name__)
+
+# Como cada coluna se acumula ao juntar meses consecutivos
+AGREGACOES = {
+    "SALDO ANTERIOR": "first",
+    "CRÉDITOS": "sum",
+    "DÉBITOS": "sum",
+    "SALDO ATUAL": "last",
+}
+
+
+def formatar_periodo( inicial , final):
+    periodo_inicial_str = inicial.split(' até ')
+    periodo_final_str = final.split(' até ')
+
+    return f"{periodo_inicial_str[0]} até {periodo_final_str[1]}"
+
+
+def ordenar_por_competencia(df_mensal):
+    """
+    Ordena as linhas mensais por competência, mantendo a ordem original
+    dos grupos dentro de cada mês. Acrescenta a coluna COMPETENCIA a
+    partir de PERIODO quando ela não existe.
+    """
+    if "COMPETENCIA" not in df_mensal:
+        df_mensal = df_mensal.assign(COMPETENCIA=competencia_dos_periodos(df_mensal["PERIODO"]))
+
+    return df_mensal.sort_values("COMPETENCIA", kind="stable", na_position="last")
+
+
+def _agregar(df_ordenado, chaves):
+    """Primeiro saldo anterior, soma dos movimentos e último saldo atual"""
+    return (
+        df_ordenado.groupby(chaves, sort=False)[COLUNAS_VALORES]
+        .agg(AGREGACOES)
+        .reset_index()
+    )
+
+
+def consolidar_periodos(df_mensal, janela=None):
+    """
+    Consolida os balancetes mensais por grupo.
+
+    Args:
+        df_mensal (DataFrame): Balancetes mensais empilhados.
+        janela (str, opcional): None para o histórico inteiro, ou uma
+            frequência do pandas para consolidar por janela: "M" (mês),
+            "Q" (trimestre) ou "Y" (ano).
+
+    Returns:
+        DataFrame: Uma linha por grupo (e por janela, na coluna JANELA),
+                   na ordem em que aparecem no histórico.
+    """
+    df = ordenar_por_competencia(df_mensal)
+
+    if janela is None:
+        return _agregar(df, ["GRUPO SALDO"])
+
+    df = df.assign(JANELA=df["COMPETENCIA"].dt.asfreq(janela))
+    return _agregar(df, ["JANELA", "GRUPO SALDO"])
+
+
+def consolidar_janela_movel(df_mensal, meses=12):
+    """
+    Consolida, para cada competência, os últimos `meses` meses (ex.: os
+    últimos 12 meses de cada mês do histórico).
+
+    A janela conta linhas de cada grupo, então supõe que o grupo aparece em
+    todos os meses. Janelas incompletas no começo do histórico são
+    descartadas.
+    """
+    df = ordenar_por_competencia(df_mensal).reset_index(drop=True)
+    grupos = df.groupby("GRUPO SALDO", sort=False)
+
+    resultado = df[["COMPETENCIA", "GRUPO SALDO"]].copy()
+    resultado["SALDO ANTERIOR"] = grupos["SALDO ANTERIOR"].shift(meses - 1)
+    for col in ("CRÉDITOS", "DÉBITOS"):
+        resultado[col] = grupos[col].rolling(meses).sum().reset_index(level=0, drop=True)
+    resultado["SALDO ATUAL"] = df["SALDO ATUAL"]
+
+    resultado = resultado.dropna(subset=["SALDO ANTERIOR", "CRÉDITOS"]).reset_index(drop=True)
+    resultado[COLUNAS_VALORES] = resultado[COLUNAS_VALORES].astype("int64")
+    return resultado
+
+
+def mesclar_consolidados(anterior, posterior):
+    """
+    Junta dois consolidados de períodos consecutivos, como se o histórico
+    inteiro tivesse sido consolidado de uma vez.
+    """
+    return _agregar(pd.concat([anterior, posterior], ignore_index=True), ["GRUPO SALDO"])
+
+
+def consolidar_balancetes_mensais(df_concat_balancetes):
+    """Consolida os balancetes mensais empilhados no período completo"""
+    # Os DataFrames inteiros só são formatados em DEBUG
+    depurando = logger.isEnabledFor(logging.DEBUG)
+    if depurando:
+        logger.debug(
+            "DataFrame consolidado (antes do agrupamento e limpeza):\n%s\nTipos de dados:\n%s",
+            df_concat_balancetes,
+            df_concat_balancetes.dtypes,
+        )
+
+    for col in COLUNAS_VALORES:
+        df_concat_balancetes[col] = pd.to_numeric(df_concat_balancetes[col], errors='coerce')
+
+    df_concat_balancetes[COLUNAS_VALORES] = (
+        df_concat_balancetes[COLUNAS_VALORES].fillna(0).astype("int64")
+    )
+
+    df_ordenado = ordenar_por_competencia(df_concat_balancetes)
+    df_balancete_consolidado = _agregar(df_ordenado, ["GRUPO SALDO"])
+
+    if depurando:
+        logger.debug("DataFrame Final Consolidado:\n%s", df_balancete_consolidado)
+
+    periodos = df_ordenado["PERIODO"].unique()
+    periodo_consolidado = formatar_periodo( periodos[0] , periodos[-1])
+
+    return df_balancete_consolidado, periodo_consolidado
+
+
+def resumir_balancete(df):
+    """
+    Totais do balancete consolidado, sem a linha Total, em centavos.
+
+    Returns:
+        dict: "creditos", "debitos", "saldo_atual", "variacao_saldo" (saldo
+              atual menos o anterior) e "movimento" (créditos + débitos).
+    """
+    df_sem_total = df[~df["GRUPO SALDO"].str.contains("Total", case=False, na=False)]
+    creditos = int(df_sem_total["CRÉDITOS"].sum())
+    debitos = int(df_sem_total["DÉBITOS"].sum())
+    saldo_atual = int(df_sem_total["SALDO ATUAL"].sum())
+
+    return {
+        "creditos": creditos,
+        "debitos": debitos,
+        "saldo_atual": saldo_atual,
+        "variacao_saldo": saldo_atual - int(df_sem_total["SALDO ANTERIOR"].sum()),
+        "movimento": creditos + debitos,
+    }
+
+
+def consolidar_blocos(blocos):
+    """
+    Processa e consolida os blocos de um arquivo.
+
+    Args:
+        blocos (iterable): Textos dos blocos; com um gerador (ex.:
+            iterar_blocos_do_arquivo) o arquivo é lido e processado um
+            bloco por vez.
+
+    Returns:
+        tuple: (DataFrame consolidado, período consolidado, balancetes
+               mensais em ordem de competência), ou (None, None, None).
+    """
+    with medir_etapa("processar"):
+        df_concat_balancetes, _ = montar_balancetes_mensais(blocos)
+    if df_concat_balancetes is None:
+        return None, None, None
+
+    with medir_etapa("consolidar"):
+        df_mensal = ordenar_por_competencia(df_concat_balancetes).reset_index(drop=True)
+        df_balancete, periodo = consolidar_balancetes_mensais(df_mensal.copy())
+    return df_balancete, periodo, df_mensal
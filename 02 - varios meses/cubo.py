@@ -0,0 +1,152 @@
+"""
+Cubo de agregados pré-calculados dos balancetes.
+
+Os balancetes mensais (de um ou de vários condomínios) são consolidados uma
+única vez por mês, trimestre e ano, por condomínio e grupo. Cada nível fica
+num DataFrame com índice ordenado (JANELA, CONDOMINIO, GRUPO SALDO), nomes
+como categorias e valores em centavos int64. Uma consulta fatia o nível
+pré-calculado mais grosso que cobre exatamente o intervalo pedido e só
+agrega o que sobra, então o custo não cresce com o tamanho do histórico.
+
+Os níveis maiores são montados a partir do nível imediatamente menor, com
+as mesmas regras de consolidar_periodos (primeiro saldo anterior, soma dos
+movimentos, último saldo atual).
+"""
+from typing import NamedTuple
+
+import pandas as pd
+
+from consolidacao import AGREGACOES, ordenar_por_competencia
+from processamento import COLUNAS_VALORES
+
+
+# Do mais fino para o mais grosso
+NIVEIS = ["M", "Q", "Y"]
+
+INDICE_CUBO = ["JANELA", "CONDOMINIO", "GRUPO SALDO"]
+
+
+class CuboBalancete(NamedTuple):
+    """Um DataFrame de agregados por nível ("M", "Q", "Y")"""
+
+    niveis: dict
+
+    @property
+    def condominios(self):
+        return self.niveis["M"].index.get_level_values("CONDOMINIO").unique().tolist()
+
+    @property
+    def grupos(self):
+        return self.niveis["M"].index.get_level_values("GRUPO SALDO").unique().tolist()
+
+
+def _agregar_ordenado(df, chaves):
+    """_agregar de consolidacao, mantendo as chaves no índice"""
+    return df.groupby(chaves, sort=False, observed=True)[COLUNAS_VALORES].agg(AGREGACOES)
+
+
+def _categorias_em_ordem(coluna):
+    valores = coluna.astype(str).to_numpy()
+    return pd.Categorical(valores, categories=pd.unique(valores))
+
+
+def montar_cubo(df_mensal, condominio=""):
+    """
+    Monta o cubo a partir dos balancetes mensais.
+
+    Args:
+        df_mensal (DataFrame): Balancetes mensais com PERIODO ou
+            COMPETENCIA, como os de consolidar_blocos, ou o resultado de
+            processar_lote depois de reset_index().
+        condominio (str, opcional): Nome usado quando df_mensal não tem a
+            coluna CONDOMINIO.
+
+    Returns:
+        CuboBalancete
+    """
+    df = ordenar_por_competencia(df_mensal)
+    df = df[df["COMPETENCIA"].notna()]
+    if "CONDOMINIO" not in df:
+        df = df.assign(CONDOMINIO=condominio)
+
+    # Categorias na ordem em que aparecem, para o índice ordenado manter a
+    # ordem dos grupos no balancete
+    df = pd.DataFrame(
+        {
+            "JANELA": df["COMPETENCIA"].to_numpy(),
+            "CONDOMINIO": _categorias_em_ordem(df["CONDOMINIO"]),
+            "GRUPO SALDO": _categorias_em_ordem(df["GRUPO SALDO"]),
+            **{col: df[col].fillna(0).astype("int64").to_numpy() for col in COLUNAS_VALORES},
+        }
+    )
+
+    niveis = {"M": _agregar_ordenado(df, INDICE_CUBO).sort_index()}
+    for menor, maior in zip(NIVEIS, NIVEIS[1:]):
+        anterior = niveis[menor].reset_index()
+        anterior["JANELA"] = anterior["JANELA"].dt.asfreq(maior)
+        niveis[maior] = _agregar_ordenado(anterior, INDICE_CUBO).sort_index()
+
+    return CuboBalancete(niveis)
+
+
+def _nivel_alinhado(nivel, inicio, fim):
+    """Se [inicio, fim] começa e termina em fronteiras de `nivel`"""
+    inicio_ok = inicio is None or inicio.asfreq(nivel).asfreq("M", how="start") == inicio
+    fim_ok = fim is None or fim.asfreq(nivel).asfreq("M", how="end") == fim
+    return inicio_ok and fim_ok
+
+
+def escolher_nivel(inicio=None, fim=None, janela=None):
+    """
+    Nível pré-calculado mais grosso que responde à consulta: não pode ser
+    mais grosso que a janela pedida e precisa estar alinhado às pontas do
+    intervalo.
+    """
+    limite = NIVEIS.index(janela) if janela is not None else len(NIVEIS) - 1
+    for nivel in reversed(NIVEIS[: limite + 1]):
+        if _nivel_alinhado(nivel, inicio, fim):
+            return nivel
+    return "M"
+
+
+def consultar_cubo(cubo, inicio=None, fim=None, janela=None, grupos=None, condominios=None):
+    """
+    Consolida o intervalo [inicio, fim] a partir do cubo.
+
+    Args:
+        cubo (CuboBalancete): Resultado de montar_cubo.
+        inicio, fim (str ou pandas.Period, opcionais): Competências
+            mensais das pontas, inclusive; None não limita.
+        janela (str, opcional): "M", "Q" ou "Y" para uma linha por janela;
+            None consolida o intervalo inteiro.
+        grupos, condominios (list, opcionais): None não filtra.
+
+    Returns:
+        DataFrame: Colunas JANELA (se pedida), CONDOMINIO, GRUPO SALDO e os
+                   valores em centavos.
+    """
+    inicio = pd.Period(inicio, freq="M") if inicio is not None else None
+    fim = pd.Period(fim, freq="M") if fim is not None else None
+    nivel = escolher_nivel(inicio, fim, janela)
+
+    janela_inicio = inicio.asfreq(nivel) if inicio is not None else None
+    janela_fim = fim.asfreq(nivel) if fim is not None else None
+    fatia = pd.IndexSlice[
+        janela_inicio:janela_fim,
+        slice(None) if condominios is None else list(condominios),
+        slice(None) if grupos is None else list(grupos),
+    ]
+    df = cubo.niveis[nivel].loc[fatia].reset_index()
+
+    if janela is None:
+        resultado = _agregar_ordenado(df, ["CONDOMINIO", "GRUPO SALDO"])
+    elif janela == nivel:
+        resultado = df.set_index(INDICE_CUBO)
+    else:
+        df["JANELA"] = df["JANELA"].dt.asfreq(janela)
+        resultado = _agregar_ordenado(df, INDICE_CUBO)
+
+    resultado = resultado.reset_index()
+    for col in ("CONDOMINIO", "GRUPO SALDO"):
+        resultado[col] = resultado[col].astype(str)
+    return resultado
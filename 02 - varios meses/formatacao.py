@@ -0,0 +1,70 @@
+"""
+Formatação dos valores do balancete para exibição.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# Posições onde entra o ponto de milhar: "1234567" -> "1.234.567"
+_PADRAO_MILHAR = r"\B(?=(\d{3})+(?!\d))"
+
+
+@lru_cache(maxsize=4096)
+def _formatar_centavos(centavos):
+    sinal = "-" if centavos < 0 else ""
+    reais, resto = divmod(abs(centavos), 100)
+    return f"R$ {sinal}{reais:,}".replace(",", ".") + f",{resto:02d}"
+
+
+def formatar_moeda(centavos):
+    """
+    Formata valores para moeda brasileira.
+
+    Todos os valores do balancete circulam como centavos inteiros; a
+    conversão para reais acontece só aqui, na exibição, com aritmética
+    inteira para não haver arredondamento. Valores repetidos (saldos que
+    não mudam de um mês para outro) saem do cache.
+    """
+    if pd.isna(centavos) or centavos == 0:
+        return "R$ 0,00"
+
+    return _formatar_centavos(int(centavos))
+
+
+def formatar_moeda_vetor(centavos):
+    """
+    Formata um array inteiro de centavos de uma vez.
+
+    Cada valor distinto é formatado uma única vez, com operações de string
+    vetorizadas do pandas, e o resultado é espalhado de volta para as
+    posições originais. Nulos viram "R$ 0,00", como em formatar_moeda.
+
+    Returns:
+        numpy.ndarray: Array de strings (dtype object) do mesmo tamanho.
+    """
+    codigos, unicos = pd.factorize(pd.Series(centavos))
+    unicos = np.asarray(unicos)
+    if unicos.dtype.kind == "f":
+        unicos = np.rint(unicos)
+    unicos = unicos.astype("int64")
+    absolutos = np.abs(unicos)
+
+    reais = pd.Series(absolutos // 100).astype(str).str.replace(_PADRAO_MILHAR, ".", regex=True)
+    resto = pd.Series(absolutos % 100).astype(str).str.zfill(2)
+    sinal = pd.Series(np.where(unicos < 0, "-", ""))
+    textos = ("R$ " + sinal + reais + "," + resto).to_numpy(dtype=object)
+
+    resultado = np.full(len(codigos), "R$ 0,00", dtype=object)
+    validos = codigos >= 0
+    resultado[validos] = textos[codigos[validos]]
+    return resultado
+
+
+def formatar_tabela_balancete(df):
+    """Cópia do balancete com as colunas de valores formatadas como moeda"""
+    df_formatado = df.copy()
+    for col in ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]:
+        df_formatado[col] = formatar_moeda_vetor(df_formatado[col])
+    return df_formatado
@@ -0,0 +1,241 @@
+"""
+Construção das figuras Plotly do balancete.
+
+As funções daqui só montam as figuras; quem decide onde exibi-las é o
+dashboard (ou um relatório), então este módulo não depende do Streamlit.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from formatacao import formatar_moeda_vetor
+from series_temporais import competencias_da_serie, fluxo_caixa_acumulado
+
+
+# Acima desse total de pontos a figura usa traços WebGL (Scattergl)
+LIMITE_PONTOS_WEBGL = 1000
+
+# Máximo de pontos enviados ao navegador por traço de uma série temporal
+LIMITE_PONTOS_SERIE = 500
+
+
+def reduzir_lttb(x, y, limite):
+    """
+    Escolhe `limite` pontos de uma série com o Largest-Triangle-Three-Buckets.
+
+    O primeiro e o último ponto são mantidos; dos demais, cada faixa
+    contribui com o ponto que forma o maior triângulo com o ponto escolhido
+    na faixa anterior e a média da faixa seguinte, o que preserva picos e
+    vales que uma amostragem a intervalos fixos perderia.
+
+    Returns:
+        numpy.ndarray: Índices dos pontos escolhidos, em ordem crescente.
+    """
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+
+    # limite - 2 faixas entre o primeiro e o último ponto
+    bordas = np.linspace(1, n - 1, limite - 1).astype("int64")
+    indices = np.empty(limite, dtype="int64")
+    indices[0], indices[-1] = 0, n - 1
+
+    anterior = 0
+    for i in range(limite - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        fim_seguinte = bordas[i + 2] if i + 2 < len(bordas) else n
+        media_x = x[fim:fim_seguinte].mean()
+        media_y = y[fim:fim_seguinte].mean()
+
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+
+    return indices
+
+
+def construir_figura_serie(df_serie, coluna_x, coluna_y, coluna_cor, titulo, limite_pontos=LIMITE_PONTOS_SERIE):
+    """
+    Gráfico de linhas com um traço por valor de `coluna_cor`.
+
+    Traços com mais de `limite_pontos` pontos são reduzidos com LTTB e, se
+    a figura passar de LIMITE_PONTOS_WEBGL pontos, os traços viram
+    Scattergl; assim o tamanho da figura não cresce com o histórico.
+    """
+    grupos = list(df_serie.groupby(coluna_cor, sort=False))
+    total_pontos = sum(min(len(linhas), limite_pontos) for _, linhas in grupos)
+    Traco = go.Scattergl if total_pontos > LIMITE_PONTOS_WEBGL else go.Scatter
+
+    fig = go.Figure()
+    for nome, linhas in grupos:
+        if len(linhas) > limite_pontos:
+            linhas = linhas.iloc[reduzir_lttb(np.arange(len(linhas)), linhas[coluna_y], limite_pontos)]
+        fig.add_trace(Traco(x=linhas[coluna_x], y=linhas[coluna_y], mode="lines", name=str(nome)))
+
+    fig.update_layout(title=titulo, height=400)
+    return fig
+
+
+def construir_figura_evolucao_mensal(serie, metrica="SALDO ATUAL"):
+    """Uma métrica de cada grupo mês a mês, a partir da série longa"""
+    df_serie = serie.xs(metrica, level="METRICA").reset_index()
+    df_serie["COMPETENCIA"] = df_serie["COMPETENCIA"].dt.to_timestamp()
+    df_serie["VALOR"] = df_serie["VALOR"] / 100
+
+    fig = construir_figura_serie(
+        df_serie, "COMPETENCIA", "VALOR", "GRUPO SALDO", f"Evolução do {metrica.title()} por Grupo"
+    )
+    fig.update_layout(xaxis_title="Competência", yaxis_title="Valor (R$)")
+    return fig
+
+
+def construir_figura_fluxo_caixa(fluxo):
+    """Resultado de cada mês em barras e o acumulado em linha"""
+    x = fluxo.index.to_timestamp()
+    liquido = fluxo["LÍQUIDO"].to_numpy()
+    Traco = go.Scattergl if len(fluxo) > LIMITE_PONTOS_WEBGL else go.Scatter
+
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=x,
+                y=liquido / 100,
+                name="Resultado do mês",
+                marker_color=np.where(liquido < 0, "red", "green"),
+            ),
+            Traco(x=x, y=fluxo["ACUMULADO"] / 100, mode="lines", name="Acumulado"),
+        ]
+    )
+    fig.update_layout(
+        title="Fluxo de Caixa Acumulado",
+        xaxis_title="Competência",
+        yaxis_title="Valor (R$)",
+        height=400,
+    )
+    return fig
+
+
+def construir_figuras_series(serie):
+    """
+    Figuras mês a mês da série longa (já filtrada).
+
+    Returns:
+        dict: Figuras "evolucao" e "fluxo".
+    """
+    return {
+        "evolucao": construir_figura_evolucao_mensal(serie),
+        "fluxo": construir_figura_fluxo_caixa(fluxo_caixa_acumulado(serie)),
+    }
+
+
+def construir_figuras_balancete(df, serie=None):
+    """
+    Monta as quatro figuras do balancete, sem a linha Total.
+
+    Com a série longa (montar_serie_longa) de mais de um mês, a evolução
+    mostra o saldo atual de cada grupo mês a mês; senão, compara o saldo
+    anterior com o atual.
+
+    Returns:
+        dict: Figuras "saldo", "movimentacao", "evolucao" e "variacao".
+    """
+    # Remove linha total para os gráficos
+    df_grafico = df[~df["GRUPO SALDO"].str.contains("Total", case=False, na=False)].copy()
+
+    # Cria cores baseadas em valores positivos/negativos
+    cores = np.where(df_grafico["SALDO ATUAL"] < 0, "red", "green")
+
+    fig_saldo = go.Figure(
+        data=[
+            go.Bar(
+                x=df_grafico["GRUPO SALDO"],
+                y=df_grafico["SALDO ATUAL"] / 100,
+                marker_color=cores,
+                text=formatar_moeda_vetor(df_grafico["SALDO ATUAL"]),
+                textposition="outside",
+            )
+        ]
+    )
+
+    fig_saldo.update_layout(
+        title="Saldo Atual por Grupo",
+        xaxis_title="Grupos",
+        yaxis_title="Valor (R$)",
+        xaxis_tickangle=-45,
+        height=400,
+    )
+
+    # Agrupa créditos e débitos
+    movimentacao = pd.DataFrame(
+        {
+            "Tipo": ["CRÉDITOS", "DÉBITOS"],
+            "Valor": [df_grafico["CRÉDITOS"].sum() / 100, df_grafico["DÉBITOS"].sum() / 100],
+        }
+    )
+
+    fig_mov = px.pie(
+        movimentacao,
+        values="Valor",
+        names="Tipo",
+        title="Distribuição Créditos vs Débitos",
+        color_discrete_map={"CRÉDITOS": "green", "DÉBITOS": "red"},
+    )
+
+    if serie is not None and len(competencias_da_serie(serie)) > 1:
+        fig_evolucao = construir_figura_evolucao_mensal(serie)
+    else:
+        # Cria gráfico comparativo saldo anterior vs atual
+        fig_evolucao = go.Figure(
+            data=[
+                go.Bar(x=df_grafico["GRUPO SALDO"], y=df_grafico[coluna] / 100, name=coluna)
+                for coluna in ("SALDO ANTERIOR", "SALDO ATUAL")
+            ]
+        )
+        fig_evolucao.update_layout(
+            title="Comparação Saldo Anterior vs Atual",
+            barmode="group",
+            legend_title_text="Período",
+        )
+
+    fig_evolucao.update_layout(xaxis_tickangle=-45, height=400)
+
+    # Calcula variação
+    df_grafico["Variacao"] = (
+        df_grafico["SALDO ATUAL"] - df_grafico["SALDO ANTERIOR"]
+    )
+
+    cores_var = np.where(df_grafico["Variacao"] < 0, "red", "green")
+
+    fig_var = go.Figure(
+        data=[
+            go.Bar(
+                x=df_grafico["GRUPO SALDO"],
+                y=df_grafico["Variacao"] / 100,
+                marker_color=cores_var,
+                text=formatar_moeda_vetor(df_grafico["Variacao"]),
+                textposition="outside",
+            )
+        ]
+    )
+
+    fig_var.update_layout(
+        title="Variação do Período",
+        xaxis_title="Grupos",
+        yaxis_title="Variação (R$)",
+        xaxis_tickangle=-45,
+        height=400,
+    )
+
+    return {
+        "saldo": fig_saldo,
+        "movimentacao": fig_mov,
+        "evolucao": fig_evolucao,
+        "variacao": fig_var,
+    }
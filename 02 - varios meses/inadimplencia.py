@@ -0,0 +1,315 @@
+"""
+Inadimplência por unidade: cobranças, pagamentos e faixas de atraso.
+
+Os arquivos ficam numa pasta (por padrão dados/inadimplencia), um ou mais
+por mês, em CSV separado por ponto e vírgula. O tipo vem do começo do nome:
+
+    cobrancas_2025-03.csv
+        UNIDADE;COMPETENCIA;VENCIMENTO;VALOR
+        101;03/2025;10/03/2025;R$ 450,00
+
+    pagamentos_2025-03.csv
+        UNIDADE;DATA;VALOR
+        101;12/03/2025;R$ 450,00
+
+Os pagamentos de cada unidade quitam as cobranças mais antigas primeiro.
+O que sobra em aberto de cada cobrança é classificado pelos dias desde o
+vencimento (a vencer, até 30, 31 a 60, 61 a 90 e mais de 90 dias).
+
+A carteira é incremental: cada arquivo é lembrado pelo hash, e um arquivo
+novo ou alterado só refaz a alocação das unidades que aparecem nele (ou
+que apareciam na versão anterior). As demais unidades não são tocadas.
+"""
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import obter_logger
+from processamento import calcular_hash_arquivo, decodificar_coluna_moeda
+
+
+logger = obter_logger(__name__)
+
+PREFIXO_COBRANCAS = "cobrancas"
+PREFIXO_PAGAMENTOS = "pagamentos"
+
+COLUNAS_COBRANCAS = ["ARQUIVO", "UNIDADE", "COMPETENCIA", "VENCIMENTO", "VALOR"]
+COLUNAS_PAGAMENTOS = ["ARQUIVO", "UNIDADE", "DATA", "VALOR"]
+COLUNAS_EM_ABERTO = ["UNIDADE", "COMPETENCIA", "VENCIMENTO", "ABERTO"]
+
+# Limites superiores (em dias de atraso) de cada faixa; o resto é "Mais de 90 dias"
+LIMITES_ATRASO = [0, 30, 60, 90]
+FAIXAS_ATRASO = ["A vencer", "Até 30 dias", "31 a 60 dias", "61 a 90 dias", "Mais de 90 dias"]
+
+
+class CarteiraInadimplencia(NamedTuple):
+    """Cobranças, pagamentos e o que está em aberto de cada cobrança"""
+
+    cobrancas: pd.DataFrame
+    pagamentos: pd.DataFrame
+    em_aberto: pd.DataFrame
+    arquivos: dict
+
+
+def carteira_vazia():
+    return CarteiraInadimplencia(
+        cobrancas=pd.DataFrame(columns=COLUNAS_COBRANCAS),
+        pagamentos=pd.DataFrame(columns=COLUNAS_PAGAMENTOS),
+        em_aberto=pd.DataFrame(columns=COLUNAS_EM_ABERTO),
+        arquivos={},
+    )
+
+
+def _ler_csv(caminho):
+    df = pd.read_csv(caminho, sep=";", dtype=str, encoding="utf-8-sig", keep_default_na=False)
+    df.columns = [coluna.strip().upper() for coluna in df.columns]
+    df["UNIDADE"] = df["UNIDADE"].str.strip()
+
+    valores, invalidos = decodificar_coluna_moeda(df["VALOR"].to_numpy(), centavos=True)
+    if invalidos:
+        logger.warning("%s: %d valores inválidos considerados zero", caminho, len(invalidos))
+    df["VALOR"] = valores
+    df.insert(0, "ARQUIVO", caminho)
+    return df
+
+
+def _descartar_sem_data(df, coluna, caminho):
+    sem_data = df[coluna].isna()
+    if sem_data.any():
+        logger.warning("%s: %d linhas sem %s válida descartadas", caminho, int(sem_data.sum()), coluna)
+    return df[~sem_data].reset_index(drop=True)
+
+
+def ler_cobrancas_csv(caminho):
+    """Cobranças de um arquivo; VALOR em centavos e VENCIMENTO como data"""
+    df = _ler_csv(caminho)
+    df["VENCIMENTO"] = pd.to_datetime(df["VENCIMENTO"], format="%d/%m/%Y", errors="coerce")
+    df["COMPETENCIA"] = pd.PeriodIndex(
+        pd.to_datetime(df["COMPETENCIA"], format="%m/%Y", errors="coerce"), freq="M"
+    )
+    return _descartar_sem_data(df[COLUNAS_COBRANCAS], "VENCIMENTO", caminho)
+
+
+def ler_pagamentos_csv(caminho):
+    """Pagamentos de um arquivo; VALOR em centavos e DATA como data"""
+    df = _ler_csv(caminho)
+    df["DATA"] = pd.to_datetime(df["DATA"], format="%d/%m/%Y", errors="coerce")
+    return _descartar_sem_data(df[COLUNAS_PAGAMENTOS], "DATA", caminho)
+
+
+def _concatenar(partes, colunas):
+    """pd.concat ignorando as partes vazias (que perderiam os tipos das colunas)"""
+    partes = [parte for parte in partes if parte is not None and not parte.empty]
+    if not partes:
+        return pd.DataFrame(columns=colunas)
+    return pd.concat(partes, ignore_index=True)
+
+
+def _alocar_pagamentos(cobrancas, pagamentos):
+    """
+    Valor em aberto de cada cobrança, quitando as mais antigas primeiro.
+
+    Com as cobranças de uma unidade em ordem de vencimento, a parte em
+    aberto da i-ésima é o quanto a soma acumulada até ela passa do total
+    pago, limitado ao valor dela; tudo vetorizado por unidade.
+    """
+    cobrancas = cobrancas.sort_values(["UNIDADE", "VENCIMENTO"], kind="stable")
+    pago = pagamentos.groupby("UNIDADE")["VALOR"].sum()
+
+    valores = cobrancas["VALOR"].to_numpy(dtype="int64")
+    acumulado = cobrancas.groupby("UNIDADE", sort=False)["VALOR"].cumsum().to_numpy(dtype="int64")
+    pago_unidade = cobrancas["UNIDADE"].map(pago).fillna(0).to_numpy(dtype="int64")
+    aberto = np.clip(acumulado - pago_unidade, 0, valores)
+
+    em_aberto = cobrancas[["UNIDADE", "COMPETENCIA", "VENCIMENTO"]].assign(ABERTO=aberto)
+    return em_aberto[aberto > 0]
+
+
+def registrar_arquivos(carteira, cobrancas=None, pagamentos=None, substituidos=()):
+    """
+    Acrescenta cobranças e pagamentos à carteira e refaz a alocação só das
+    unidades afetadas.
+
+    Args:
+        cobrancas, pagamentos (DataFrame, opcionais): Linhas novas, como as
+            de ler_cobrancas_csv e ler_pagamentos_csv.
+        substituidos (iterable): Arquivos cujas linhas antigas devem sair
+            da carteira (porque foram relidos).
+
+    Returns:
+        CarteiraInadimplencia
+    """
+    substituidos = set(substituidos)
+    antigas_cobrancas = carteira.cobrancas["ARQUIVO"].isin(substituidos)
+    antigos_pagamentos = carteira.pagamentos["ARQUIVO"].isin(substituidos)
+
+    afetadas = set(carteira.cobrancas.loc[antigas_cobrancas, "UNIDADE"].unique())
+    afetadas.update(carteira.pagamentos.loc[antigos_pagamentos, "UNIDADE"].unique())
+    for novas in (cobrancas, pagamentos):
+        if novas is not None:
+            afetadas.update(novas["UNIDADE"].unique())
+
+    todas_cobrancas = _concatenar([carteira.cobrancas[~antigas_cobrancas], cobrancas], COLUNAS_COBRANCAS)
+    todos_pagamentos = _concatenar([carteira.pagamentos[~antigos_pagamentos], pagamentos], COLUNAS_PAGAMENTOS)
+
+    if not afetadas:
+        return carteira._replace(cobrancas=todas_cobrancas, pagamentos=todos_pagamentos)
+
+    em_aberto_afetadas = _alocar_pagamentos(
+        todas_cobrancas[todas_cobrancas["UNIDADE"].isin(afetadas)],
+        todos_pagamentos[todos_pagamentos["UNIDADE"].isin(afetadas)],
+    )
+    mantidas = carteira.em_aberto[~carteira.em_aberto["UNIDADE"].isin(afetadas)]
+    em_aberto = _concatenar([mantidas, em_aberto_afetadas], COLUNAS_EM_ABERTO)
+    logger.info("Inadimplência: %d unidades recalculadas", len(afetadas))
+
+    return carteira._replace(cobrancas=todas_cobrancas, pagamentos=todos_pagamentos, em_aberto=em_aberto)
+
+
+def ingerir_pasta(diretorio, carteira=None):
+    """
+    Lê os arquivos novos ou alterados da pasta e atualiza a carteira.
+
+    Arquivos já lidos e sem mudança (mesmo hash) não são abertos de novo;
+    sem nada novo, a mesma carteira é devolvida.
+
+    Returns:
+        CarteiraInadimplencia
+    """
+    carteira = carteira if carteira is not None else carteira_vazia()
+    if not os.path.isdir(diretorio):
+        return carteira
+
+    arquivos = dict(carteira.arquivos)
+    alterados = {}
+    for nome in sorted(os.listdir(diretorio)):
+        minusculo = nome.lower()
+        if not minusculo.endswith(".csv") or not minusculo.startswith((PREFIXO_COBRANCAS, PREFIXO_PAGAMENTOS)):
+            continue
+        caminho = os.path.join(diretorio, nome)
+        hash_conteudo = calcular_hash_arquivo(caminho)
+        if arquivos.get(caminho) != hash_conteudo:
+            alterados[caminho] = hash_conteudo
+
+    # Arquivos apagados saem da carteira
+    removidos = [caminho for caminho in arquivos if not os.path.exists(caminho)]
+    if not alterados and not removidos:
+        return carteira
+
+    cobrancas = []
+    pagamentos = []
+    for caminho in alterados:
+        if os.path.basename(caminho).lower().startswith(PREFIXO_COBRANCAS):
+            cobrancas.append(ler_cobrancas_csv(caminho))
+        else:
+            pagamentos.append(ler_pagamentos_csv(caminho))
+
+    carteira = registrar_arquivos(
+        carteira,
+        pd.concat(cobrancas, ignore_index=True) if cobrancas else None,
+        pd.concat(pagamentos, ignore_index=True) if pagamentos else None,
+        substituidos=[c for c in alterados if c in arquivos] + removidos,
+    )
+
+    for caminho in removidos:
+        del arquivos[caminho]
+    arquivos.update(alterados)
+    return carteira._replace(arquivos=arquivos)
+
+
+def _emissao(cobrancas):
+    """Data a partir da qual cada cobrança existe: o primeiro dia da competência (ou o vencimento, sem ela)"""
+    if cobrancas.empty:
+        return np.empty(0, dtype="datetime64[D]")
+
+    emissao = pd.PeriodIndex(cobrancas["COMPETENCIA"], freq="M").start_time.to_numpy(dtype="datetime64[D]")
+    vencimento = cobrancas["VENCIMENTO"].to_numpy(dtype="datetime64[D]")
+    return np.where(np.isnat(emissao), vencimento, emissao)
+
+
+def faixas_de_atraso(dias):
+    """Índice em FAIXAS_ATRASO para cada número de dias desde o vencimento"""
+    return np.searchsorted(LIMITES_ATRASO, dias, side="left")
+
+
+def posicao_inadimplencia(carteira, data_referencia=None):
+    """
+    Situação de cada unidade numa data.
+
+    Só contam as cobranças emitidas (competência iniciada) e os pagamentos
+    feitos até a data; numa data anterior a algum deles, a alocação é
+    refeita só com o que existia nela.
+
+    Args:
+        data_referencia (date, opcional): Data da posição; por padrão, hoje.
+
+    Returns:
+        DataFrame: Uma linha por unidade com COBRADO, PAGO, SALDO (cobrado
+                   menos pago; negativo é crédito da unidade), os valores
+                   em aberto em cada faixa de FAIXAS_ATRASO e DIAS EM
+                   ATRASO (da cobrança aberta mais antiga), em centavos,
+                   das maiores dívidas vencidas para as menores.
+    """
+    referencia = np.datetime64(pd.Timestamp(data_referencia or pd.Timestamp.today()).normalize(), "D")
+
+    cobrancas = carteira.cobrancas
+    pagamentos = carteira.pagamentos
+    emitidas = _emissao(cobrancas) <= referencia
+    feitos = pagamentos["DATA"].to_numpy(dtype="datetime64[D]") <= referencia
+
+    if emitidas.all() and feitos.all():
+        # A alocação guardada na carteira já é a desta data
+        aberto = carteira.em_aberto
+    else:
+        cobrancas = cobrancas[emitidas]
+        pagamentos = pagamentos[feitos]
+        aberto = _alocar_pagamentos(cobrancas, pagamentos)
+
+    cobrado = cobrancas.groupby("UNIDADE")["VALOR"].sum()
+    pago = pagamentos.groupby("UNIDADE")["VALOR"].sum()
+    unidades = cobrado.index.union(pago.index)
+    dias = (referencia - aberto["VENCIMENTO"].to_numpy(dtype="datetime64[D]")).astype("int64")
+    faixas = pd.Categorical.from_codes(faixas_de_atraso(dias), categories=FAIXAS_ATRASO)
+
+    por_faixa = (
+        pd.DataFrame({"UNIDADE": aberto["UNIDADE"].to_numpy(), "FAIXA": faixas, "ABERTO": aberto["ABERTO"].to_numpy()})
+        .pivot_table(index="UNIDADE", columns="FAIXA", values="ABERTO", aggfunc="sum", fill_value=0, observed=False)
+        .reindex(index=unidades, columns=FAIXAS_ATRASO, fill_value=0)
+    )
+    atraso = pd.Series(np.where(dias > 0, dias, 0), index=aberto["UNIDADE"].to_numpy()).groupby(level=0).max()
+
+    posicao = pd.DataFrame(
+        {
+            "COBRADO": cobrado.reindex(unidades, fill_value=0),
+            "PAGO": pago.reindex(unidades, fill_value=0),
+        }
+    )
+    posicao["SALDO"] = posicao["COBRADO"] - posicao["PAGO"]
+    posicao = posicao.join(por_faixa).astype("int64")
+    posicao["DIAS EM ATRASO"] = atraso.reindex(unidades, fill_value=0).astype("int64")
+    posicao.index.name = "UNIDADE"
+
+    vencido = posicao[FAIXAS_ATRASO[1:]].sum(axis=1)
+    return posicao.iloc[np.argsort(-vencido.to_numpy(), kind="stable")].reset_index()
+
+
+def resumir_inadimplencia(posicao):
+    """
+    Totais da posição.
+
+    Returns:
+        dict: vencido, a_vencer e credito (centavos), unidades_inadimplentes,
+              unidades e taxa (fração das unidades com valor vencido).
+    """
+    vencido = posicao[FAIXAS_ATRASO[1:]].sum(axis=1)
+    inadimplentes = int((vencido > 0).sum())
+    return {
+        "vencido": int(vencido.sum()),
+        "a_vencer": int(posicao[FAIXAS_ATRASO[0]].sum()),
+        "credito": int(-posicao["SALDO"].clip(upper=0).sum()),
+        "unidades_inadimplentes": inadimplentes,
+        "unidades": len(posicao),
+        "taxa": inadimplentes / len(posicao) if len(posicao) else 0.0,
+    }
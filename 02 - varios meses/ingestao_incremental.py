@@ -0,0 +1,407 @@
+"""
+Leitura incremental do arquivo de balancetes.
+
+O dados.txt cresce um bloco por mês. Em vez de separar e processar o
+arquivo inteiro a cada execução, guardamos a posição (em bytes) e o hash de
+cada bloco já processado e o resultado consolidado até ali. Na próxima
+leitura só os blocos acrescentados depois do último são processados e
+mesclados ao consolidado salvo.
+
+Os meses processados também vão para o armazenamento colunar; quando o
+arquivo precisa ser relido do começo, só os blocos que ainda não estão lá
+passam pelo parser de TXT.
+
+O estado guarda ainda o hash do arquivo inteiro com a data de modificação
+e o tamanho. Ao reiniciar o dashboard com o arquivo igual, o hash sai do
+estado e o arquivo não é lido de ponta a ponta.
+"""
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import acrescentar_armazem, caminho_armazem, carregar_armazem, hashes_do_armazem
+from consolidacao import (
+    consolidar_balancetes_mensais,
+    formatar_periodo,
+    mesclar_consolidados,
+    ordenar_por_competencia,
+)
+from instrumentacao import medir_etapa, obter_logger
+from processamento import (
+    BufferBalancetes,
+    calcular_hash_arquivo,
+    competencia_do_periodo,
+    competencia_dos_periodos,
+)
+
+
+logger = obter_logger(__name__)
+
+VERSAO_ESTADO = 3
+NOME_DIRETORIO_CACHE = ".balancete_cache"
+ARQUIVO_ESTADO = "estado_ingestao.json"
+ARQUIVO_CONSOLIDADO = "consolidado.pkl"
+
+
+def iterar_blocos_com_posicao(arquivo_binario, inicio=0):
+    """
+    Separa os blocos de um arquivo aberto em modo binário a partir de uma
+    posição, usando as mesmas regras de ler_arquivo_e_separar_por_blocos.
+
+    Yields:
+        tuple: (posição inicial, posição final, bytes do bloco), com as
+               posições em bytes a partir do início do arquivo.
+    """
+    arquivo_binario.seek(inicio)
+    posicao = inicio
+    bloco_inicio = bloco_fim = None
+    linhas = []
+
+    for linha in arquivo_binario:
+        fim_linha = posicao + len(linha)
+
+        if linha.strip():
+            if bloco_inicio is None:
+                bloco_inicio = posicao
+            linhas.append(linha)
+            bloco_fim = fim_linha
+        elif linhas:
+            yield bloco_inicio, bloco_fim, b"".join(linhas)
+            bloco_inicio = None
+            linhas = []
+
+        posicao = fim_linha
+
+    if linhas:
+        yield bloco_inicio, bloco_fim, b"".join(linhas)
+
+
+def _hash_bytes(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+def _diretorio_cache_padrao(caminho_do_arquivo):
+    return os.path.join(os.path.dirname(os.path.abspath(caminho_do_arquivo)), NOME_DIRETORIO_CACHE)
+
+
+def _estado_vazio(caminho_do_arquivo):
+    return {
+        "versao": VERSAO_ESTADO,
+        "arquivo": os.path.abspath(caminho_do_arquivo),
+        "blocos": [],
+        "periodos": [],
+    }
+
+
+def _carregar_estado(diretorio_cache, caminho_do_arquivo):
+    caminho_estado = os.path.join(diretorio_cache, ARQUIVO_ESTADO)
+    caminho_consolidado = os.path.join(diretorio_cache, ARQUIVO_CONSOLIDADO)
+
+    try:
+        with open(caminho_estado, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+        consolidado = pd.read_pickle(caminho_consolidado)
+    except (OSError, ValueError, EOFError):
+        return _estado_vazio(caminho_do_arquivo), None
+
+    if (
+        estado.get("versao") != VERSAO_ESTADO
+        or estado.get("arquivo") != os.path.abspath(caminho_do_arquivo)
+    ):
+        return _estado_vazio(caminho_do_arquivo), None
+
+    return estado, consolidado
+
+
+def _salvar_estado(diretorio_cache, estado, consolidado):
+    """Grava estado e consolidado em arquivos temporários e depois os troca"""
+    os.makedirs(diretorio_cache, exist_ok=True)
+    caminho_estado = os.path.join(diretorio_cache, ARQUIVO_ESTADO)
+    caminho_consolidado = os.path.join(diretorio_cache, ARQUIVO_CONSOLIDADO)
+
+    consolidado.to_pickle(caminho_consolidado + ".tmp")
+    # json.dumps usa o codificador em C; json.dump, não
+    with open(caminho_estado + ".tmp", "w", encoding="utf-8") as f:
+        f.write(json.dumps(estado, ensure_ascii=False))
+
+    os.replace(caminho_consolidado + ".tmp", caminho_consolidado)
+    os.replace(caminho_estado + ".tmp", caminho_estado)
+
+
+def _bloco_intacto(arquivo_binario, bloco):
+    arquivo_binario.seek(bloco["inicio"])
+    dados = arquivo_binario.read(bloco["fim"] - bloco["inicio"])
+    return _hash_bytes(dados) == bloco["sha256"]
+
+
+def _prefixo_intacto(arquivo_binario, blocos):
+    """
+    Confere se os blocos já processados continuam no mesmo lugar.
+
+    Todos os blocos são relidos e comparados pelo hash: uma correção no
+    meio do arquivo, mesmo sem mudar o tamanho, faz o arquivo ser
+    reprocessado (os blocos que não mudaram saem do armazenamento, sem
+    passar pelo parser).
+    """
+    if not blocos:
+        return False
+
+    tamanho = arquivo_binario.seek(0, os.SEEK_END)
+    if tamanho < blocos[-1]["fim"]:
+        return False
+
+    return all(_bloco_intacto(arquivo_binario, bloco) for bloco in blocos)
+
+
+def _iterar_blocos_novos(arquivo_binario, inicio, estado):
+    """
+    Gera (hash, bytes do bloco) a partir de `inicio`, registrando cada
+    bloco no estado à medida que ele é lido.
+    """
+    for bloco_inicio, bloco_fim, dados in iterar_blocos_com_posicao(arquivo_binario, inicio):
+        sha = _hash_bytes(dados)
+        estado["blocos"].append({"inicio": bloco_inicio, "fim": bloco_fim, "sha256": sha})
+        yield sha, dados
+
+
+def _balancetes_dos_blocos(blocos, diretorio_cache):
+    """
+    Monta os balancetes mensais de um iterável de (hash, bytes do bloco),
+    consumido um bloco por vez.
+
+    Blocos cujo hash já está no armazenamento colunar são lidos de lá; só
+    os demais passam pelo parser de TXT, direto para um BufferBalancetes
+    (sem um DataFrame por bloco), e são acrescentados ao armazenamento.
+    """
+    # Sem blocos novos, o armazenamento nem é aberto
+    blocos = iter(blocos)
+    primeiro = next(blocos, None)
+    if primeiro is None:
+        return None, []
+
+    # Do armazenamento só a coluna de hashes é lida aqui
+    caminho = caminho_armazem(diretorio_cache)
+    hashes_guardados = hashes_do_armazem(caminho)
+
+    buffer = BufferBalancetes()
+    # hash -> ordem do bloco no arquivo
+    ordem = {}
+
+    for sha, dados in itertools.chain([primeiro], blocos):
+        ordem.setdefault(sha, len(ordem))
+        if sha not in hashes_guardados:
+            buffer.acrescentar_bloco(dados.decode("utf-8").strip(), chave=sha)
+
+    logger.info("%d blocos lidos, %d processados", len(ordem), len(buffer.periodos))
+
+    partes = []
+    if hashes_guardados.intersection(ordem):
+        encontrados = carregar_armazem(caminho, hashes=hashes_guardados.intersection(ordem))
+        if encontrados is not None:
+            partes.append(encontrados)
+
+    if buffer.linhas:
+        df_processados = buffer.para_dataframe(coluna_chave="HASH_BLOCO")
+        acrescentar_armazem(df_processados, caminho)
+        partes.append(df_processados)
+
+    if not partes:
+        return None, []
+
+    # Meses guardados e processados voltam à ordem dos blocos no arquivo
+    df = pd.concat(partes, ignore_index=True)
+    posicoes = df["HASH_BLOCO"].map(ordem).to_numpy()
+    df = df.iloc[np.argsort(posicoes, kind="stable")].reset_index(drop=True)
+
+    periodos = df.drop_duplicates("HASH_BLOCO")["PERIODO"].tolist()
+    return df, periodos
+
+
+def ingerir_incremental(caminho_do_arquivo, diretorio_cache=None):
+    """
+    Consolida o arquivo de balancetes processando apenas os blocos novos.
+
+    Se o início do arquivo mudou (edição, troca de arquivo ou estado
+    corrompido), o arquivo é reprocessado do começo.
+
+    Args:
+        caminho_do_arquivo (Path ou str): O caminho para o dados.txt.
+        diretorio_cache (Path ou str, opcional): Onde guardar o estado.
+            Por padrão, a pasta .balancete_cache ao lado do arquivo.
+
+    Returns:
+        tuple: (DataFrame consolidado, período consolidado), ou (None, None)
+               se o arquivo não tiver nenhum bloco válido.
+    """
+    if diretorio_cache is None:
+        diretorio_cache = _diretorio_cache_padrao(caminho_do_arquivo)
+
+    estado, consolidado = _carregar_estado(diretorio_cache, caminho_do_arquivo)
+    # Tomada antes da leitura: se o arquivo mudar durante a ingestão, a
+    # assinatura registrada não confere na próxima vez
+    assinatura = _assinatura_arquivo(caminho_do_arquivo)
+
+    with open(caminho_do_arquivo, "rb") as f:
+        with medir_etapa("separar"):
+            # Com a mesma data de modificação e tamanho da última ingestão,
+            # o arquivo não mudou e os blocos nem são relidos
+            if estado["blocos"] and (
+                estado.get("assinatura") == assinatura or _prefixo_intacto(f, estado["blocos"])
+            ):
+                inicio = estado["blocos"][-1]["fim"]
+            else:
+                if estado["blocos"]:
+                    logger.info("Blocos de '%s' mudaram; reprocessando o arquivo", caminho_do_arquivo)
+                estado, consolidado = _estado_vazio(caminho_do_arquivo), None
+                inicio = 0
+
+        # Os blocos são lidos e processados um de cada vez
+        blocos_antes = len(estado["blocos"])
+        with medir_etapa("processar"):
+            df_novos, periodos_novos = _balancetes_dos_blocos(
+                _iterar_blocos_novos(f, inicio, estado), diretorio_cache
+            )
+        blocos_novos = len(estado["blocos"]) - blocos_antes
+
+    logger.info("%d blocos novos em '%s'", blocos_novos, caminho_do_arquivo)
+
+    if df_novos is not None:
+        depois_dos_guardados = _periodos_depois(estado["periodos"], periodos_novos)
+        if depois_dos_guardados:
+            # Só os meses novos precisam ser ordenados
+            estado["periodos"] = estado["periodos"] + _ordenar_periodos(periodos_novos)
+        else:
+            estado["periodos"] = _ordenar_periodos(estado["periodos"] + periodos_novos)
+
+        with medir_etapa("consolidar"):
+            if consolidado is None:
+                consolidado, _ = consolidar_balancetes_mensais(df_novos)
+            elif depois_dos_guardados:
+                # Consolidar os meses novos e juntar ao consolidado salvo dá o
+                # mesmo resultado de reprocessar tudo: o saldo anterior
+                # continua o do primeiro mês, os movimentos somam e o saldo
+                # atual passa a ser o do último mês novo.
+                consolidado_novos, _ = consolidar_balancetes_mensais(df_novos)
+                consolidado = mesclar_consolidados(consolidado, consolidado_novos)
+            else:
+                # Um mês anterior aos guardados muda o saldo anterior (ou o
+                # atual) do período: consolida de novo todos os meses, lidos
+                # do armazenamento, sem reprocessar o texto
+                logger.info("Meses fora de ordem em '%s'; consolidando de novo", caminho_do_arquivo)
+                consolidado, _ = consolidar_balancetes_mensais(
+                    _balancetes_do_estado(estado, diretorio_cache)
+                )
+
+    if consolidado is not None:
+        hash_registrado = _registrar_hash_arquivo(estado, caminho_do_arquivo, assinatura)
+        if blocos_novos or hash_registrado:
+            _salvar_estado(diretorio_cache, estado, consolidado)
+
+    if consolidado is None:
+        return None, None
+
+    periodos = estado["periodos"]
+    return consolidado, formatar_periodo(periodos[0], periodos[-1])
+
+
+def _ordenar_periodos(periodos):
+    """Períodos em ordem de competência (os sem data no fim)"""
+    return ordenar_por_competencia(pd.DataFrame({"PERIODO": periodos}))["PERIODO"].tolist()
+
+
+def _periodos_depois(guardados, novos):
+    """Se todos os meses novos vêm depois (ou no mesmo mês) do último guardado"""
+    if not guardados:
+        return True
+
+    ultima = competencia_do_periodo(guardados[-1])
+    competencias = competencia_dos_periodos(novos)
+    return not pd.isna(ultima) and not competencias.isna().any() and competencias.min() >= ultima
+
+
+def _assinatura_arquivo(caminho_do_arquivo):
+    info = os.stat(caminho_do_arquivo)
+    return [info.st_mtime_ns, info.st_size]
+
+
+def _registrar_hash_arquivo(estado, caminho_do_arquivo, assinatura):
+    """
+    Guarda no estado o hash do arquivo e a assinatura (data de modificação
+    e tamanho) do arquivo ingerido.
+
+    Returns:
+        bool: Se o estado mudou.
+    """
+    if estado.get("assinatura") == assinatura:
+        return False
+
+    estado["assinatura"] = assinatura
+    estado["sha256_arquivo"] = calcular_hash_arquivo(caminho_do_arquivo)
+    return True
+
+
+def hash_do_arquivo(caminho_do_arquivo, diretorio_cache=None):
+    """
+    SHA-256 do arquivo, como calcular_hash_arquivo, mas sem lê-lo quando o
+    estado da ingestão registrou o hash com a mesma data de modificação e
+    o mesmo tamanho.
+
+    Raises:
+        FileNotFoundError: Se o arquivo não existir.
+    """
+    if diretorio_cache is None:
+        diretorio_cache = _diretorio_cache_padrao(caminho_do_arquivo)
+
+    assinatura = _assinatura_arquivo(caminho_do_arquivo)
+    try:
+        with open(os.path.join(diretorio_cache, ARQUIVO_ESTADO), "r", encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        estado = {}
+
+    if (
+        estado.get("arquivo") == os.path.abspath(caminho_do_arquivo)
+        and estado.get("assinatura") == assinatura
+        and estado.get("sha256_arquivo")
+    ):
+        return estado["sha256_arquivo"]
+    return calcular_hash_arquivo(caminho_do_arquivo)
+
+
+def carregar_balancetes_mensais(caminho_do_arquivo, diretorio_cache=None):
+    """
+    Balancetes mensais do arquivo, lidos do armazenamento colunar.
+
+    Só o que ingerir_incremental já guardou é lido; chame-a antes para o
+    armazenamento estar em dia com o arquivo. Meses de blocos que não estão
+    mais no arquivo ficam de fora.
+
+    Returns:
+        DataFrame: Colunas PERIODO, COMPETENCIA e as do balancete, em ordem
+                   de competência, ou None se nada foi guardado.
+    """
+    if diretorio_cache is None:
+        diretorio_cache = _diretorio_cache_padrao(caminho_do_arquivo)
+
+    estado, _ = _carregar_estado(diretorio_cache, caminho_do_arquivo)
+    return _balancetes_do_estado(estado, diretorio_cache)
+
+
+def _balancetes_do_estado(estado, diretorio_cache):
+    if not estado["blocos"]:
+        return None
+
+    # Só os meses dos blocos do arquivo saem da tabela mapeada
+    hashes = {bloco["sha256"] for bloco in estado["blocos"]}
+    armazem = carregar_armazem(caminho_armazem(diretorio_cache), hashes=hashes)
+    if armazem is None or armazem.empty:
+        return None
+
+    df_mensal = armazem.drop(columns="HASH_BLOCO")
+
+    df_mensal.insert(1, "COMPETENCIA", competencia_dos_periodos(df_mensal["PERIODO"]))
+    return ordenar_por_competencia(df_mensal).reset_index(drop=True)
@@ -0,0 +1,202 @@
+"""
+Leitura dos balancetes em PDF enviados pela administradora.
+
+O texto de cada PDF é extraído, normalizado para o mesmo formato do
+dados.txt (um rótulo ou valor por linha) e processado pelo mesmo parser
+dos arquivos TXT. O texto normalizado fica guardado pelo hash do PDF, então
+um PDF que não mudou não é extraído de novo.
+
+Depende do pypdf. PDFs sem camada de texto (gerados como imagem, como o
+"Microsoft: Print To PDF" de uma tela) só podem ser lidos com OCR, que é
+usado quando pytesseract e Pillow estão instalados.
+"""
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from processamento import (
+    COLUNAS_BALANCETE,
+    COLUNAS_VALORES,
+    calcular_hash_arquivo,
+    processar_linhas_balancetes,
+)
+
+
+NOME_DIRETORIO_CACHE = os.path.join(".balancete_cache", "pdf")
+
+_PADRAO_VALOR_PDF = re.compile(r"R\$\s*-?\s*[\d.,]+")
+
+
+def _extrair_texto_ocr(pagina):
+    try:
+        import pytesseract
+    except ImportError:
+        return ""
+
+    textos = []
+    for imagem in pagina.images:
+        textos.append(pytesseract.image_to_string(imagem.image, lang="por"))
+    return "\n".join(textos)
+
+
+def extrair_texto_pdf(caminho_pdf):
+    """
+    Extrai o texto de todas as páginas de um PDF.
+
+    Args:
+        caminho_pdf (Path, str ou arquivo binário): O PDF em disco ou já
+            aberto (ex.: io.BytesIO).
+
+    Raises:
+        ImportError: Se o pypdf não estiver instalado.
+        ValueError: Se o PDF não tiver texto e o OCR não estiver disponível.
+    """
+    from pypdf import PdfReader
+
+    leitor = PdfReader(caminho_pdf)
+    paginas = []
+
+    for pagina in leitor.pages:
+        texto = pagina.extract_text() or ""
+        if not texto.strip():
+            texto = _extrair_texto_ocr(pagina)
+        paginas.append(texto)
+
+    texto = "\n".join(paginas)
+    if not texto.strip():
+        raise ValueError(
+            "PDF sem camada de texto; instale pytesseract e Pillow para usar OCR"
+        )
+
+    return texto
+
+
+def normalizar_texto_pdf(texto):
+    """
+    Converte o texto extraído do PDF para o formato do dados.txt.
+
+    No PDF o cabeçalho e cada grupo costumam vir numa linha só
+    ("Fundo de Obras R$ 1.654,67 R$ 133,34 R$ 0,00 R$ 1.788,01"); aqui cada
+    rótulo e cada valor passam a ocupar uma linha.
+    """
+    linhas = []
+
+    for linha in texto.splitlines():
+        linha = " ".join(linha.split())
+        if not linha:
+            continue
+
+        if linha.startswith("GRUPO SALDO") and "SALDO ATUAL" in linha:
+            linhas.extend(COLUNAS_BALANCETE)
+            continue
+
+        valores = _PADRAO_VALOR_PDF.findall(linha)
+        if not valores:
+            linhas.append(linha)
+            continue
+
+        grupo = linha[: _PADRAO_VALOR_PDF.search(linha).start()].strip()
+        if grupo:
+            linhas.append(grupo)
+        linhas.extend(" ".join(v.split()) for v in valores)
+
+    return "\n".join(linhas)
+
+
+def texto_normalizado_pdf(caminho_pdf, diretorio_cache=None):
+    """
+    Texto normalizado de um PDF, lido do cache quando o PDF não mudou.
+
+    Args:
+        caminho_pdf (Path ou str): O caminho para o PDF.
+        diretorio_cache (Path ou str, opcional): Por padrão, a pasta
+            .balancete_cache/pdf ao lado do PDF.
+    """
+    if diretorio_cache is None:
+        diretorio_cache = os.path.join(
+            os.path.dirname(os.path.abspath(caminho_pdf)), NOME_DIRETORIO_CACHE
+        )
+
+    caminho_cache = os.path.join(diretorio_cache, calcular_hash_arquivo(caminho_pdf) + ".txt")
+
+    if os.path.exists(caminho_cache):
+        with open(caminho_cache, "r", encoding="utf-8") as f:
+            return f.read()
+
+    texto = normalizar_texto_pdf(extrair_texto_pdf(caminho_pdf))
+
+    os.makedirs(diretorio_cache, exist_ok=True)
+    with open(caminho_cache + ".tmp", "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(caminho_cache + ".tmp", caminho_cache)
+
+    return texto
+
+
+def processar_pdf_balancetes(caminho_pdf, diretorio_cache=None):
+    """
+    Processa um PDF de balancete.
+
+    Returns:
+        DataFrame: Mesmo formato de processar_arquivo_balancetes.
+    """
+    texto = texto_normalizado_pdf(caminho_pdf, diretorio_cache)
+    return processar_linhas_balancetes(texto.splitlines())
+
+
+def processar_pdf_bytes(dados):
+    """
+    Processa um PDF que já está em memória (ex.: enviado pelo navegador),
+    sem gravar nada em disco.
+
+    Returns:
+        DataFrame: Mesmo formato de processar_arquivo_balancetes.
+    """
+    texto = normalizar_texto_pdf(extrair_texto_pdf(io.BytesIO(dados)))
+    return processar_linhas_balancetes(texto.splitlines())
+
+
+def _processar_pdf(caminho_pdf):
+    """Executado nos processos do pool; nunca deixa a exceção escapar"""
+    try:
+        return caminho_pdf, processar_pdf_balancetes(caminho_pdf), None
+    except Exception as e:
+        return caminho_pdf, None, f"{type(e).__name__}: {e}"
+
+
+def processar_pdfs(caminhos_pdf, processos=None):
+    """
+    Processa vários PDFs em paralelo.
+
+    Returns:
+        tuple: (DataFrame com a coluna ARQUIVO e as linhas de todos os PDFs,
+                dicionário caminho -> erro dos PDFs que falharam).
+    """
+    caminhos_pdf = list(caminhos_pdf)
+
+    if processos == 1 or len(caminhos_pdf) <= 1:
+        resultados = [_processar_pdf(caminho) for caminho in caminhos_pdf]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_processar_pdf, caminhos_pdf))
+
+    partes = []
+    falhas = {}
+
+    for caminho, df, erro in resultados:
+        if erro is not None:
+            falhas[caminho] = erro
+        elif df.empty:
+            falhas[caminho] = "nenhum balancete encontrado"
+        else:
+            df.insert(0, "ARQUIVO", caminho)
+            partes.append(df)
+
+    if not partes:
+        colunas = ["ARQUIVO", "PERIODO", "COMPETENCIA", "GRUPO SALDO"] + COLUNAS_VALORES
+        return pd.DataFrame(columns=colunas), falhas
+
+    return pd.concat(partes, ignore_index=True), falhas
@@ -0,0 +1,59 @@
+"""
+Logging e medição de tempo das etapas do balancete.
+
+Todos os módulos registram mensagens em loggers abaixo de "balancete". O
+nível vem da variável de ambiente BALANCETE_LOG (DEBUG, INFO, WARNING...),
+com WARNING como padrão. Em INFO aparece o tempo de cada etapa (ler,
+separar, processar, consolidar, renderizar); em DEBUG também os
+DataFrames intermediários.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+
+NOME_LOGGER = "balancete"
+
+# Última duração, em segundos, de cada etapa medida neste processo
+TEMPOS_ETAPAS = {}
+
+
+def obter_logger(nome):
+    """Logger filho de "balancete" para o módulo informado"""
+    return logging.getLogger(f"{NOME_LOGGER}.{nome}")
+
+
+def configurar_logging(nivel=None):
+    """
+    Configura o logger "balancete" uma única vez por processo.
+
+    Args:
+        nivel (str ou int, opcional): Nível do log; por padrão, o valor de
+            BALANCETE_LOG ou WARNING.
+    """
+    logger = logging.getLogger(NOME_LOGGER)
+    nivel = nivel or os.environ.get("BALANCETE_LOG", "WARNING")
+    logger.setLevel(nivel.upper() if isinstance(nivel, str) else nivel)
+
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+        logger.addHandler(handler)
+        logger.propagate = False
+
+    return logger
+
+
+@contextmanager
+def medir_etapa(etapa):
+    """Mede o tempo do bloco `with` e o registra em INFO"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        TEMPOS_ETAPAS[etapa] = duracao
+        logging.getLogger(NOME_LOGGER).info("etapa %s: %.1f ms", etapa, duracao * 1000)
@@ -0,0 +1,299 @@
+"""
+Livro de lançamentos: receitas e despesas individuais do condomínio.
+
+Os lançamentos vêm em CSV (separado por ponto e vírgula, como o Excel em
+português exporta), um por linha:
+
+    DATA;GRUPO;CATEGORIA;DESCRICAO;VALOR
+    05/03/2025;Condomínio;Taxa condominial;Apto 101;R$ 450,00
+    10/03/2025;Condomínio;Energia;Conta de março;R$ -1.234,56
+
+Valores positivos são créditos e negativos, débitos, em centavos inteiros
+como no resto do projeto. O livro guarda os lançamentos numa tabela
+colunar ordenada por data, com três índices:
+
+* por data: a própria ordenação, consultada com busca binária;
+* por categoria e por grupo: as posições das linhas de cada um, também em
+  ordem de data;
+* somas acumuladas de créditos e débitos por grupo e por categoria de
+  cada grupo, para a soma de qualquer intervalo sair de duas buscas
+  binárias, sem somar os lançamentos de novo.
+
+A partir dele saem os totais do GRUPO SALDO no mesmo formato dos
+balancetes mensais do TXT.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from processamento import COLUNAS_BALANCETE, MESES, decodificar_coluna_moeda
+from instrumentacao import obter_logger
+
+
+logger = obter_logger(__name__)
+
+COLUNAS_LANCAMENTOS = ["DATA", "GRUPO SALDO", "CATEGORIA", "DESCRICAO", "VALOR"]
+
+NOMES_MESES = {numero: nome for nome, numero in MESES.items() if nome != "marco"}
+
+
+class SomasGrupo(NamedTuple):
+    """
+    Posições e datas dos lançamentos de um grupo (ou de uma categoria do
+    grupo) e as somas acumuladas até cada um (com 0 na frente)
+    """
+
+    posicoes: np.ndarray
+    datas: np.ndarray
+    creditos: np.ndarray
+    debitos: np.ndarray
+
+
+class LivroLancamentos(NamedTuple):
+    """Lançamentos ordenados por data e os índices sobre eles"""
+
+    tabela: pd.DataFrame
+    datas: np.ndarray
+    por_categoria: dict
+    por_grupo: dict
+    somas: dict
+    somas_categoria: dict
+
+    def __len__(self):
+        return len(self.tabela)
+
+
+def ler_lancamentos_csv(caminho, encoding="utf-8-sig"):
+    """
+    Lê um CSV de lançamentos.
+
+    Returns:
+        DataFrame: Colunas COLUNAS_LANCAMENTOS, DATA como datetime e VALOR
+                   em centavos (int64). Linhas com data inválida são
+                   descartadas e registradas em WARNING.
+    """
+    bruto = pd.read_csv(caminho, sep=";", dtype=str, encoding=encoding, keep_default_na=False)
+    bruto.columns = [coluna.strip().upper() for coluna in bruto.columns]
+    return normalizar_lancamentos(bruto.rename(columns={"GRUPO": "GRUPO SALDO"}))
+
+
+def normalizar_lancamentos(df):
+    """Converte datas ("dd/mm/aaaa") e valores ("R$ -1.234,56") de um DataFrame de texto"""
+    valores, invalidos = decodificar_coluna_moeda(df["VALOR"].to_numpy(), centavos=True)
+    if invalidos:
+        logger.warning("Valores inválidos em %d lançamentos; considerados zero", len(invalidos))
+
+    datas = pd.to_datetime(df["DATA"], format="%d/%m/%Y", errors="coerce")
+    sem_data = datas.isna()
+    if sem_data.any():
+        logger.warning("%d lançamentos sem data válida foram descartados", int(sem_data.sum()))
+
+    lancamentos = pd.DataFrame(
+        {
+            "DATA": datas,
+            "GRUPO SALDO": df["GRUPO SALDO"].astype(str).str.strip(),
+            "CATEGORIA": df.get("CATEGORIA", pd.Series("", index=df.index)).astype(str).str.strip(),
+            "DESCRICAO": df.get("DESCRICAO", pd.Series("", index=df.index)).astype(str).str.strip(),
+            "VALOR": valores,
+        }
+    )
+    return lancamentos[~sem_data.to_numpy()].reset_index(drop=True)
+
+
+def _posicoes_por_valor(coluna):
+    codigos, unicos = pd.factorize(coluna)
+    ordem = np.argsort(codigos, kind="stable")
+    limites = np.searchsorted(codigos[ordem], np.arange(len(unicos) + 1))
+    return {
+        valor: ordem[limites[i] : limites[i + 1]] for i, valor in enumerate(unicos)
+    }
+
+
+def _somas_acumuladas(datas, valores, posicoes):
+    valores = valores[posicoes]
+    return SomasGrupo(
+        posicoes=posicoes,
+        datas=datas[posicoes],
+        creditos=np.concatenate([[0], np.cumsum(np.where(valores > 0, valores, 0))]),
+        debitos=np.concatenate([[0], np.cumsum(np.where(valores < 0, -valores, 0))]),
+    )
+
+
+def montar_livro(lancamentos):
+    """
+    Ordena os lançamentos por data e monta os índices.
+
+    Args:
+        lancamentos (DataFrame): Colunas COLUNAS_LANCAMENTOS, como as de
+            ler_lancamentos_csv.
+
+    Returns:
+        LivroLancamentos
+    """
+    tabela = lancamentos[COLUNAS_LANCAMENTOS].sort_values("DATA", kind="stable").reset_index(drop=True)
+    tabela["GRUPO SALDO"] = tabela["GRUPO SALDO"].astype("category")
+    tabela["CATEGORIA"] = tabela["CATEGORIA"].astype("category")
+    tabela["VALOR"] = tabela["VALOR"].astype("int64")
+
+    datas = tabela["DATA"].to_numpy(dtype="datetime64[ns]")
+    valores = tabela["VALOR"].to_numpy()
+    por_grupo = _posicoes_por_valor(tabela["GRUPO SALDO"].astype(str))
+
+    somas = {grupo: _somas_acumuladas(datas, valores, posicoes) for grupo, posicoes in por_grupo.items()}
+
+    # Chave (grupo, categoria), para os totais por categoria respeitarem o filtro de grupos
+    codigos_grupo, nomes_grupo = pd.factorize(tabela["GRUPO SALDO"].astype(str))
+    codigos_categoria, nomes_categoria = pd.factorize(tabela["CATEGORIA"].astype(str))
+    pares = codigos_grupo * len(nomes_categoria) + codigos_categoria
+    somas_categoria = {
+        (nomes_grupo[par // len(nomes_categoria)], nomes_categoria[par % len(nomes_categoria)]):
+            _somas_acumuladas(datas, valores, posicoes)
+        for par, posicoes in _posicoes_por_valor(pares).items()
+    }
+
+    return LivroLancamentos(
+        tabela=tabela,
+        datas=datas,
+        por_categoria=_posicoes_por_valor(tabela["CATEGORIA"].astype(str)),
+        por_grupo=por_grupo,
+        somas=somas,
+        somas_categoria=somas_categoria,
+    )
+
+
+def acrescentar_lancamentos(livro, novos):
+    """Livro com os lançamentos novos acrescentados (em lote)"""
+    if livro is None or not len(livro):
+        return montar_livro(novos)
+
+    tabela = livro.tabela.astype({"GRUPO SALDO": str, "CATEGORIA": str})
+    return montar_livro(pd.concat([tabela, novos[COLUNAS_LANCAMENTOS]], ignore_index=True))
+
+
+def _limites(datas, inicio=None, fim=None):
+    """Posições [a, b) das datas em [inicio, fim], com fim inclusive no dia"""
+    a = 0 if inicio is None else np.searchsorted(datas, np.datetime64(pd.Timestamp(inicio), "ns"), "left")
+    if fim is None:
+        b = len(datas)
+    else:
+        limite = pd.Timestamp(fim).normalize() + pd.Timedelta(days=1)
+        b = np.searchsorted(datas, np.datetime64(limite, "ns"), "left")
+    return a, b
+
+
+def consultar_lancamentos(livro, inicio=None, fim=None, categorias=None, grupos=None):
+    """
+    Lançamentos entre as datas `inicio` e `fim` (inclusive), filtrados por
+    categorias e grupos, em ordem de data. None não filtra.
+    """
+    a, b = _limites(livro.datas, inicio, fim)
+    posicoes = np.arange(a, b)
+
+    for indice, chaves in ((livro.por_categoria, categorias), (livro.por_grupo, grupos)):
+        if chaves is None:
+            continue
+        # As posições de cada índice estão em ordem; basta recortar a faixa de datas
+        selecionadas = [indice.get(chave, np.empty(0, dtype="int64")) for chave in chaves]
+        selecionadas = np.sort(np.concatenate(selecionadas)) if selecionadas else np.empty(0, dtype="int64")
+        selecionadas = selecionadas[np.searchsorted(selecionadas, a) : np.searchsorted(selecionadas, b)]
+        posicoes = np.intersect1d(posicoes, selecionadas, assume_unique=True)
+
+    return livro.tabela.iloc[posicoes].reset_index(drop=True)
+
+
+def totais_por_categoria(livro, inicio=None, fim=None, grupos=None):
+    """
+    Receitas (créditos) e despesas (débitos) de cada categoria no período.
+
+    Returns:
+        DataFrame: CATEGORIA, RECEITAS, DESPESAS e SALDO em centavos,
+                   das maiores despesas para as menores.
+    """
+    # categoria -> [primeira posição no período, receitas, despesas]
+    totais = {}
+    for (grupo, categoria), somas in livro.somas_categoria.items():
+        if grupos is not None and grupo not in grupos:
+            continue
+        a, b = _limites(somas.datas, inicio, fim)
+        if a == b:
+            continue
+        total = totais.setdefault(categoria, [somas.posicoes[a], 0, 0])
+        total[0] = min(total[0], somas.posicoes[a])
+        total[1] += int(somas.creditos[b] - somas.creditos[a])
+        total[2] += int(somas.debitos[b] - somas.debitos[a])
+
+    # Empates ficam na ordem em que a categoria aparece no período
+    linhas = sorted(totais.items(), key=lambda item: item[1][0])
+    df = pd.DataFrame(
+        [(categoria, receitas, despesas) for categoria, (_, receitas, despesas) in linhas],
+        columns=["CATEGORIA", "RECEITAS", "DESPESAS"],
+    ).astype({"CATEGORIA": str, "RECEITAS": "int64", "DESPESAS": "int64"})
+    df["SALDO"] = df["RECEITAS"] - df["DESPESAS"]
+    return df.sort_values(["DESPESAS", "RECEITAS"], ascending=False, kind="stable").reset_index(drop=True)
+
+
+def _soma_intervalo(somas, inicio, fim):
+    a, b = _limites(somas.datas, inicio, fim)
+    return int(somas.creditos[b] - somas.creditos[a]), int(somas.debitos[b] - somas.debitos[a])
+
+
+def formatar_periodo_mes(competencia):
+    """Texto do período como no TXT: "01 de março de 2025 até 31 de março de 2025" """
+    nome = NOMES_MESES[competencia.month]
+    ultimo_dia = competencia.days_in_month
+    return f"01 de {nome} de {competencia.year} até {ultimo_dia} de {nome} de {competencia.year}"
+
+
+def derivar_balancete(livro, competencia, saldos_iniciais=None):
+    """
+    Balancete de um mês calculado a partir dos lançamentos.
+
+    Args:
+        competencia (str ou pandas.Period): Mês ("2025-03").
+        saldos_iniciais (dict, opcional): Saldo de cada grupo (centavos)
+            antes do primeiro lançamento do livro.
+
+    Returns:
+        DataFrame: Colunas COLUNAS_BALANCETE, um grupo por linha e a linha
+                   Total no fim, como o balancete exportado.
+    """
+    competencia = pd.Period(competencia, freq="M")
+    inicio = competencia.start_time
+    fim = competencia.end_time
+    saldos_iniciais = saldos_iniciais or {}
+
+    linhas = []
+    for grupo, somas in livro.somas.items():
+        creditos_antes, debitos_antes = _soma_intervalo(somas, None, inicio - pd.Timedelta(days=1))
+        creditos, debitos = _soma_intervalo(somas, inicio, fim)
+        saldo_anterior = saldos_iniciais.get(grupo, 0) + creditos_antes - debitos_antes
+        linhas.append([grupo, saldo_anterior, creditos, debitos, saldo_anterior + creditos - debitos])
+
+    df = pd.DataFrame(linhas, columns=COLUNAS_BALANCETE)
+    total = ["Total", *df[COLUNAS_BALANCETE[1:]].sum().astype("int64").tolist()]
+    df.loc[len(df)] = total
+    df[COLUNAS_BALANCETE[1:]] = df[COLUNAS_BALANCETE[1:]].astype("int64")
+    return df
+
+
+def derivar_balancetes_mensais(livro, inicio=None, fim=None, saldos_iniciais=None):
+    """
+    Balancetes mensais derivados dos lançamentos, no formato de
+    montar_balancetes_mensais (com PERIODO e COMPETENCIA), para consolidar
+    com as mesmas funções dos arquivos TXT.
+    """
+    if not len(livro):
+        return None
+
+    inicio = pd.Period(inicio if inicio is not None else livro.datas[0], freq="M")
+    fim = pd.Period(fim if fim is not None else livro.datas[-1], freq="M")
+
+    partes = []
+    for competencia in pd.period_range(inicio, fim, freq="M"):
+        df = derivar_balancete(livro, competencia, saldos_iniciais)
+        df.insert(0, "PERIODO", formatar_periodo_mes(competencia))
+        df.insert(1, "COMPETENCIA", competencia)
+        partes.append(df)
+
+    return pd.concat(partes, ignore_index=True)
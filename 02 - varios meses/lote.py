@@ -0,0 +1,170 @@
+"""
+Processamento em lote dos balancetes de vários condomínios.
+
+Espera uma pasta com uma subpasta por condomínio, cada uma com seus
+arquivos TXT exportados ou PDFs da administradora:
+
+    exportacoes/
+        Edificio Aurora/dados.txt
+        Residencial Ipê/2024.txt
+        Residencial Ipê/2025-01.pdf
+
+Os arquivos são processados em paralelo, um processo por núcleo, e o
+resultado é um único DataFrame indexado por condomínio e competência.
+
+Uso:
+    python lote.py exportacoes --saida consolidado.csv
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import pandas as pd
+
+from ingestao_pdf import processar_pdf_balancetes
+from processamento import COLUNAS_BALANCETE, processar_arquivo_balancetes
+
+
+class RelatorioLote(NamedTuple):
+    """Resumo de uma execução em lote"""
+
+    arquivos: int
+    linhas: int
+    bytes_lidos: int
+    segundos: float
+    falhas: dict
+
+    @property
+    def arquivos_por_segundo(self):
+        return self.arquivos / self.segundos if self.segundos else 0.0
+
+    @property
+    def megabytes_por_segundo(self):
+        return self.bytes_lidos / 1e6 / self.segundos if self.segundos else 0.0
+
+    def __str__(self):
+        texto = (
+            f"{self.arquivos} arquivos, {self.linhas} linhas em {self.segundos:.2f}s "
+            f"({self.arquivos_por_segundo:.1f} arquivos/s, "
+            f"{self.megabytes_por_segundo:.2f} MB/s), {len(self.falhas)} falhas"
+        )
+        for caminho, erro in self.falhas.items():
+            texto += f"\n  {caminho}: {erro}"
+        return texto
+
+
+def listar_exportacoes(diretorio_raiz, extensoes=(".txt", ".pdf")):
+    """
+    Lista os arquivos de exportação de cada condomínio.
+
+    O nome do condomínio é o da subpasta de primeiro nível; arquivos
+    soltos na raiz são ignorados, assim como as pastas ocultas (o texto
+    dos PDFs guardado em .balancete_cache/pdf não é uma exportação).
+
+    Returns:
+        list: Pares (condomínio, caminho), em ordem alfabética.
+    """
+    arquivos = []
+
+    for condominio in sorted(os.listdir(diretorio_raiz)):
+        pasta = os.path.join(diretorio_raiz, condominio)
+        if condominio.startswith(".") or not os.path.isdir(pasta):
+            continue
+
+        for raiz, pastas, nomes in os.walk(pasta):
+            pastas[:] = sorted(p for p in pastas if not p.startswith("."))
+            for nome in sorted(nomes):
+                if nome.lower().endswith(extensoes):
+                    arquivos.append((condominio, os.path.join(raiz, nome)))
+
+    return arquivos
+
+
+def _processar_exportacao(item):
+    """Executado nos processos do pool; nunca deixa a exceção escapar"""
+    condominio, caminho = item
+    try:
+        if caminho.lower().endswith(".pdf"):
+            df = processar_pdf_balancetes(caminho)
+        else:
+            df = processar_arquivo_balancetes(caminho)
+        df.insert(0, "CONDOMINIO", condominio)
+        return caminho, os.path.getsize(caminho), df, None
+    except Exception as e:
+        return caminho, 0, None, f"{type(e).__name__}: {e}"
+
+
+def processar_lote(diretorio_raiz, processos=None):
+    """
+    Processa todas as exportações de uma pasta de condomínios.
+
+    Args:
+        diretorio_raiz (Path ou str): Pasta com uma subpasta por condomínio.
+        processos (int, opcional): Número de processos; por padrão, um por
+            núcleo. Com 1, tudo roda no processo atual.
+
+    Returns:
+        tuple: (DataFrame indexado por CONDOMINIO e COMPETENCIA,
+                RelatorioLote com a vazão e as falhas por arquivo).
+    """
+    inicio = time.perf_counter()
+    arquivos = listar_exportacoes(diretorio_raiz)
+
+    if processos == 1 or len(arquivos) <= 1:
+        resultados = [_processar_exportacao(item) for item in arquivos]
+    else:
+        processos = processos or os.cpu_count()
+        # Lotes de arquivos por tarefa diluem o custo de comunicação
+        tamanho_lote = max(1, len(arquivos) // (processos * 4))
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(
+                executor.map(_processar_exportacao, arquivos, chunksize=tamanho_lote)
+            )
+
+    partes = []
+    falhas = {}
+    bytes_lidos = 0
+
+    for caminho, tamanho, df, erro in resultados:
+        if erro is not None:
+            falhas[caminho] = erro
+            continue
+        if df.empty:
+            falhas[caminho] = "nenhum balancete encontrado"
+            continue
+        partes.append(df)
+        bytes_lidos += tamanho
+
+    if partes:
+        df_lote = pd.concat(partes, ignore_index=True)
+    else:
+        df_lote = pd.DataFrame(
+            columns=["CONDOMINIO", "PERIODO", "COMPETENCIA"] + COLUNAS_BALANCETE
+        )
+
+    df_lote = df_lote.set_index(["CONDOMINIO", "COMPETENCIA"]).sort_index(kind="stable")
+
+    relatorio = RelatorioLote(
+        arquivos=len(arquivos),
+        linhas=len(df_lote),
+        bytes_lidos=bytes_lidos,
+        segundos=time.perf_counter() - inicio,
+        falhas=falhas,
+    )
+    return df_lote, relatorio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Processa balancetes de vários condomínios.")
+    parser.add_argument("diretorio", help="Pasta com uma subpasta por condomínio")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos")
+    parser.add_argument("--saida", help="Grava o resultado consolidado em CSV")
+    args = parser.parse_args()
+
+    df_lote, relatorio = processar_lote(args.diretorio, args.processos)
+    print(relatorio)
+
+    if args.saida:
+        df_lote.to_csv(args.saida, encoding="utf-8-sig")
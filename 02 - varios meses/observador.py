@@ -0,0 +1,163 @@
+"""
+Observador das pastas de exportação, em segundo plano.
+
+Uma thread verifica de tempos em tempos a data de modificação e o tamanho
+dos arquivos TXT e PDF das pastas. Quando um arquivo aparece ou muda, ele é
+processado ali mesmo, fora da execução do dashboard, e o resultado fica
+guardado pelo hash do conteúdo. Quem pede um arquivo já processado recebe
+o resultado na hora; se o arquivo ainda está sendo processado, espera por
+ele em vez de processá-lo de novo em paralelo.
+"""
+import os
+import threading
+
+from instrumentacao import medir_etapa, obter_logger
+from processamento import calcular_hash_arquivo
+
+
+logger = obter_logger(__name__)
+
+INTERVALO_PADRAO = 2.0
+
+
+class ObservadorExportacoes:
+    """
+    Processa as exportações novas ou alteradas de algumas pastas.
+
+    Args:
+        diretorios (list): Pastas observadas (com as subpastas).
+        preparar (callable): Recebe o caminho de um arquivo e devolve o
+            resultado a guardar; chamado numa thread sem o Streamlit.
+        extensoes (tuple): Extensões observadas.
+        intervalo (float): Segundos entre duas verificações.
+        calcular_hash (callable): Hash do conteúdo de um caminho.
+    """
+
+    def __init__(
+        self,
+        diretorios,
+        preparar,
+        extensoes=(".txt", ".pdf"),
+        intervalo=INTERVALO_PADRAO,
+        calcular_hash=calcular_hash_arquivo,
+    ):
+        self.diretorios = [os.path.abspath(d) for d in diretorios]
+        self.preparar = preparar
+        self.extensoes = extensoes
+        self.intervalo = intervalo
+        self.calcular_hash = calcular_hash
+
+        # caminho -> (mtime_ns, tamanho) visto na última verificação
+        self._assinaturas = {}
+        # caminho -> (hash do conteúdo, resultado)
+        self._resultados = {}
+        # caminho -> Lock, para um arquivo ser processado uma vez só
+        self._travas = {}
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Inicia a thread (uma só, mesmo chamado várias vezes)"""
+        with self._trava:
+            if self._thread is None or not self._thread.is_alive():
+                self._parar.clear()
+                self._thread = threading.Thread(
+                    target=self._executar, name="observador-exportacoes", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def parar(self, espera=None):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(espera)
+
+    def _listar(self):
+        for diretorio in self.diretorios:
+            for raiz, pastas, nomes in os.walk(diretorio):
+                # Pastas ocultas (.balancete_cache) não têm exportações
+                pastas[:] = [p for p in pastas if not p.startswith(".")]
+                for nome in nomes:
+                    if nome.lower().endswith(self.extensoes):
+                        yield os.path.join(raiz, nome)
+
+    def verificar(self):
+        """
+        Uma passada pelas pastas: processa o que é novo ou mudou e esquece
+        os arquivos apagados.
+
+        Returns:
+            list: Caminhos processados nesta passada.
+        """
+        vistos = set()
+        processados = []
+
+        for caminho in self._listar():
+            vistos.add(caminho)
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+
+            assinatura = (info.st_mtime_ns, info.st_size)
+            if self._assinaturas.get(caminho) == assinatura:
+                continue
+
+            try:
+                self.obter(caminho, self.calcular_hash(caminho))
+            except Exception:
+                logger.exception("Falha ao processar '%s' em segundo plano", caminho)
+            else:
+                processados.append(caminho)
+            # Com falha também: só tenta de novo quando o arquivo mudar
+            self._assinaturas[caminho] = assinatura
+
+        with self._trava:
+            for caminho in set(self._assinaturas) - vistos:
+                del self._assinaturas[caminho]
+                self._resultados.pop(caminho, None)
+                self._travas.pop(caminho, None)
+
+        return processados
+
+    def _executar(self):
+        while not self._parar.is_set():
+            self.verificar()
+            self._parar.wait(self.intervalo)
+
+    def pronto(self, caminho, hash_conteudo):
+        """Se o resultado desse conteúdo do arquivo já está guardado"""
+        guardado = self._resultados.get(os.path.abspath(caminho))
+        return guardado is not None and guardado[0] == hash_conteudo
+
+    def obter(self, caminho, hash_conteudo):
+        """
+        Resultado de `preparar` para o arquivo com esse conteúdo,
+        processando-o agora (nesta thread) se ainda não foi.
+
+        Raises:
+            Exception: O que `preparar` levantar.
+        """
+        caminho = os.path.abspath(caminho)
+        with self._trava:
+            trava_arquivo = self._travas.setdefault(caminho, threading.Lock())
+
+        with trava_arquivo:
+            guardado = self._resultados.get(caminho)
+            if guardado is not None and guardado[0] == hash_conteudo:
+                return guardado[1]
+
+            # O arquivo pode ter mudado depois que quem pediu calculou o
+            # hash: o resultado é guardado pelo hash do que foi lido, e só
+            # se o arquivo não mudou de novo durante o processamento
+            hash_lido = self.calcular_hash(caminho)
+            with medir_etapa("preparar"):
+                resultado = self.preparar(caminho)
+
+            if self.calcular_hash(caminho) == hash_lido:
+                self._resultados[caminho] = (hash_lido, resultado)
+                logger.info("Exportação processada: %s", caminho)
+            else:
+                logger.info("'%s' mudou durante o processamento; resultado não guardado", caminho)
+            return resultado
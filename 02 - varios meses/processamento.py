@@ -0,0 +1,601 @@
+"""
+Leitura e processamento dos balancetes exportados em TXT.
+
+Este módulo não depende do Streamlit, para que o mesmo parser possa ser
+usado pelo dashboard e por rotinas que processam vários arquivos.
+"""
+import hashlib
+import io
+import os
+import re
+from typing import Iterable, Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import obter_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+    pc = None
+
+
+logger = obter_logger(__name__)
+
+COLUNAS_VALORES = ["SALDO ANTERIOR", "CRÉDITOS", "DÉBITOS", "SALDO ATUAL"]
+COLUNAS_BALANCETE = ["GRUPO SALDO"] + COLUNAS_VALORES
+
+# Linhas de cabeçalho da tabela, uma por linha no TXT exportado
+ROTULOS_CABECALHO = frozenset(COLUNAS_BALANCETE)
+
+# Linha com valor monetário, ex.: "R$ -1.827,39"
+_PADRAO_VALOR = re.compile(r"^(R\$)?\s*-?\s*[\d.,]+$")
+
+# Data por extenso, ex.: "28 de fevereiro de 2025"
+_PADRAO_DATA = re.compile(r"(\d{1,2}) de (\w+) de (\d{4})")
+
+MESES = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4,
+    "maio": 5, "junho": 6, "julho": 7, "agosto": 8, "setembro": 9,
+    "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+# caminho absoluto -> ((mtime_ns, tamanho), sha256)
+_HASHES_ARQUIVOS = {}
+
+
+class LinhaBalancete(NamedTuple):
+    """Registro de um grupo do balancete em um período, valores em centavos"""
+
+    periodo: str
+    grupo: str
+    saldo_anterior: int
+    creditos: int
+    debitos: int
+    saldo_atual: int
+
+
+def converter_valor_moeda(texto):
+    """Converte string de moeda para float"""
+    if pd.isna(texto) or texto == "":
+        return 0.0
+
+    # Remove R$, espaços e converte vírgula para ponto
+    valor_limpo = str(texto).replace("R$", "").replace(" ", "").strip()
+
+    # Trata valores negativos
+    negativo = valor_limpo.startswith("-")
+    if negativo:
+        valor_limpo = valor_limpo[1:]
+
+    # Converte pontos de milhares e vírgula decimal
+    if "," in valor_limpo and "." in valor_limpo:
+        # Formato brasileiro: 1.234.567,89
+        valor_limpo = valor_limpo.replace(".", "").replace(",", ".")
+    elif "," in valor_limpo:
+        # Apenas vírgula decimal: 1234,89
+        valor_limpo = valor_limpo.replace(",", ".")
+
+    try:
+        valor = float(valor_limpo)
+        return -valor if negativo else valor
+    except:
+        return 0.0
+
+
+def converter_valor_centavos(texto):
+    """Converte string de moeda para centavos inteiros"""
+    return int(round(converter_valor_moeda(texto) * 100))
+
+
+def _decodificar_generico(texto):
+    """
+    Float64 de cada célula e máscara das inválidas, com as regras de
+    converter_valor_moeda; usado para os formatos fora do padrão exportado.
+    """
+    texto = texto.str.replace(r"R\$|\s", "", regex=True)
+    vazio = texto.isna() | (texto == "")
+
+    # Formato brasileiro: remove pontos de milhares e troca a vírgula decimal
+    tem_virgula = texto.str.contains(",", regex=False, na=False)
+    texto = texto.where(
+        ~tem_virgula,
+        texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+    )
+
+    numeros = pd.to_numeric(texto, errors="coerce").astype("float64")
+    invalidos = numeros.isna() & ~vazio
+    return numeros.fillna(0.0).to_numpy(), invalidos.to_numpy()
+
+
+# Formato exportado: "R$ ", sinal opcional, milhares com ponto e duas casas
+_PADRAO_MOEDA_EXPORTADA = r"^R\$ -?[\d.]+,\d\d$"
+
+
+def _decodificar_centavos_arrow(valores):
+    """
+    Centavos das células no formato exportado ("R$ -1.234,56"), lidos como
+    inteiros: sem o "R$ ", os pontos e a vírgula sobram o sinal e os
+    dígitos, que o pyarrow converte para int64 de uma vez.
+
+    Returns:
+        tuple: (numpy.ndarray int64, máscara das células no formato; as
+               outras ficam com zero)
+    """
+    texto = pa.array(valores, type=pa.string(), from_pandas=True)
+    no_formato = pc.fill_null(pc.match_substring_regex(texto, _PADRAO_MOEDA_EXPORTADA), False)
+
+    # A vírgula está sempre a três caracteres do fim e o "R$ " no começo
+    digitos = pc.replace_substring(texto, ".", "")
+    digitos = pc.utf8_replace_slice(digitos, -3, -2, "")
+    digitos = pc.utf8_replace_slice(digitos, 0, 3, "")
+
+    centavos = pc.cast(pc.if_else(no_formato, digitos, "0"), pa.int64())
+    return np.array(centavos), no_formato.to_numpy(zero_copy_only=False)
+
+
+def decodificar_coluna_moeda(valores, centavos=False):
+    """
+    Converte uma coluna inteira de strings de moeda ("R$ -1.234,56") em
+    números numa única passada vetorizada.
+
+    Com o pyarrow, as células no formato exportado são lidas como
+    inteiros em centavos, sem passar por float; só as demais (vazias, sem
+    as duas casas decimais ou inválidas) usam a conversão genérica.
+
+    Args:
+        valores (array-like): Strings de moeda; vazios valem zero.
+        centavos (bool): Se True, devolve inteiros exatos em centavos (int64).
+
+    Returns:
+        tuple: (numpy.ndarray com float64 ou int64, lista com as posições
+               das células que não puderam ser lidas). As células inválidas
+               ficam com zero no array, mas são sempre reportadas.
+    """
+    if pa is not None:
+        try:
+            inteiros, no_formato = _decodificar_centavos_arrow(valores)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Células que não são texto: tudo pela conversão genérica
+            pass
+        else:
+            resultado = inteiros if centavos else inteiros / 100
+            restantes = np.flatnonzero(~no_formato)
+            if not len(restantes):
+                return resultado, []
+
+            texto = pd.Series(np.asarray(valores, dtype=object)[restantes], dtype="string")
+            numeros, mascara = _decodificar_generico(texto)
+            resultado[restantes] = np.rint(numeros * 100).astype(np.int64) if centavos else numeros
+            return resultado, restantes[mascara].tolist()
+
+    numeros, mascara = _decodificar_generico(pd.Series(valores, dtype="string"))
+    if centavos:
+        numeros = np.rint(numeros * 100).astype(np.int64)
+
+    return numeros, np.flatnonzero(mascara).tolist()
+
+
+def _eh_linha_periodo(linha):
+    texto = linha.lower()
+    return "até" in texto or "período" in texto
+
+
+def _iterar_linhas_brutas(linhas: Iterable[str]) -> Iterator[tuple]:
+    """
+    Percorre as linhas uma única vez e devolve (periodo, grupo, valores),
+    onde valores são as quatro strings monetárias do grupo.
+
+    Funciona como uma máquina de estados: só lê grupos depois do
+    cabeçalho da tabela; qualquer linha que não seja valor passa a ser o
+    grupo corrente, e o grupo é emitido ao completar quatro valores.
+    Um novo período reinicia a leitura, então vários blocos podem ser
+    processados na mesma passada.
+    """
+    periodo = ""
+    dentro_tabela = False
+    grupo = None
+    valores = []
+
+    for linha in linhas:
+        linha = linha.strip()
+        if not linha:
+            continue
+
+        if linha in ROTULOS_CABECALHO:
+            dentro_tabela = True
+            grupo = None
+            valores = []
+            continue
+
+        if _PADRAO_VALOR.match(linha):
+            if dentro_tabela and grupo is not None:
+                valores.append(linha)
+                if len(valores) == len(COLUNAS_VALORES):
+                    yield periodo, grupo, valores
+                    grupo = None
+                    valores = []
+            continue
+
+        if _eh_linha_periodo(linha):
+            periodo = linha
+            dentro_tabela = False
+            grupo = None
+            valores = []
+            continue
+
+        if dentro_tabela:
+            # Nome de grupo (ou linha extra de título, substituída pela próxima)
+            grupo = linha
+            valores = []
+
+
+class BufferBalancetes:
+    """
+    Linhas dos balancetes mensais acumuladas em arrays pré-alocados.
+
+    Os grupos de cada bloco vão direto para os arrays, sem um DataFrame por
+    bloco nem a lista de todos os blocos. As strings monetárias esperam num
+    lote de tamanho fixo e são convertidas de uma vez por
+    decodificar_coluna_moeda quando ele enche. Período, grupo e chave são
+    guardados como códigos inteiros. Os arrays dobram de tamanho quando
+    enchem, então a memória acompanha o número de linhas do resultado, e
+    não o tamanho do texto lido.
+
+    Args:
+        capacidade (int): Linhas alocadas no início.
+        tamanho_lote (int): Linhas de strings monetárias convertidas por vez.
+    """
+
+    def __init__(self, capacidade=1024, tamanho_lote=4096):
+        self._centavos = np.zeros((capacidade, len(COLUNAS_VALORES)), dtype=np.int64)
+        # Código do período, do grupo e da chave de cada linha
+        self._codigos = np.zeros((capacidade, 3), dtype=np.int32)
+        self._pendentes = np.empty((tamanho_lote, len(COLUNAS_VALORES)), dtype=object)
+        self._n_pendentes = 0
+        # Texto (ou chave) -> código, na ordem em que apareceu
+        self._textos = ({}, {}, {})
+        self.linhas = 0
+        # Período de cada bloco aceito por acrescentar_bloco
+        self.periodos = []
+
+    def _codigo(self, coluna, valor):
+        textos = self._textos[coluna]
+        codigo = textos.get(valor)
+        if codigo is None:
+            codigo = textos[valor] = len(textos)
+        return codigo
+
+    def _crescer(self):
+        capacidade = 2 * len(self._centavos)
+        for nome in ("_centavos", "_codigos"):
+            antigo = getattr(self, nome)
+            novo = np.zeros((capacidade, antigo.shape[1]), dtype=antigo.dtype)
+            novo[: self.linhas] = antigo[: self.linhas]
+            setattr(self, nome, novo)
+
+    def _converter_pendentes(self):
+        n = self._n_pendentes
+        if not n:
+            return
+
+        inicio = self.linhas - n
+        numeros, invalidos = decodificar_coluna_moeda(self._pendentes[:n].ravel(), centavos=True)
+        self._centavos[inicio : self.linhas] = numeros.reshape(n, len(COLUNAS_VALORES))
+
+        if invalidos:
+            linhas_invalidas = sorted({inicio + i // len(COLUNAS_VALORES) for i in invalidos})
+            textos_periodos = list(self._textos[0])
+            periodos = list(dict.fromkeys(textos_periodos[c] for c in self._codigos[linhas_invalidas, 0]))
+            logger.warning(
+                "Valores monetários inválidos nas linhas %s dos períodos %s", linhas_invalidas, periodos
+            )
+
+        self._pendentes[:n] = None
+        self._n_pendentes = 0
+
+    def acrescentar(self, periodo, grupo, valores, chave=None):
+        """Acrescenta um grupo, com as quatro strings monetárias"""
+        if self._n_pendentes == len(self._pendentes):
+            self._converter_pendentes()
+        if self.linhas == len(self._centavos):
+            self._crescer()
+
+        self._codigos[self.linhas] = (
+            self._codigo(0, periodo), self._codigo(1, grupo), self._codigo(2, chave)
+        )
+        self._pendentes[self._n_pendentes] = valores
+        self._n_pendentes += 1
+        self.linhas += 1
+
+    def acrescentar_bloco(self, bloco, chave=None):
+        """
+        Processa o texto de um bloco (um mês); todos os grupos ficam com o
+        período do primeiro, como em processar_balancete_txt.
+
+        Returns:
+            str: Período do bloco, ou None se não houver grupos (ou o bloco
+                 não puder ser lido; nada é acrescentado).
+        """
+        try:
+            registros = list(_iterar_linhas_brutas(bloco.splitlines()))
+        except Exception as e:
+            logger.error("Erro ao processar bloco: %s", e)
+            return None
+
+        if not registros:
+            return None
+
+        periodo = registros[0][0]
+        for _, grupo, valores in registros:
+            self.acrescentar(periodo, grupo, valores, chave)
+
+        self.periodos.append(periodo)
+        return periodo
+
+    def acrescentar_linhas(self, linhas):
+        """Acrescenta os grupos de um iterável de linhas, cada um com o período corrente"""
+        for periodo, grupo, valores in _iterar_linhas_brutas(linhas):
+            self.acrescentar(periodo, grupo, valores)
+
+    def _coluna_texto(self, coluna):
+        textos = np.empty(len(self._textos[coluna]), dtype=object)
+        textos[:] = list(self._textos[coluna])
+        return textos[self._codigos[: self.linhas, coluna]]
+
+    def para_dataframe(self, coluna_chave=None):
+        """
+        DataFrame mensal (PERIODO e as colunas do balancete, em centavos).
+
+        Args:
+            coluna_chave (str, opcional): Nome da coluna com a chave de
+                cada linha, logo depois de PERIODO.
+        """
+        self._converter_pendentes()
+
+        dados = {"PERIODO": self._coluna_texto(0)}
+        if coluna_chave is not None:
+            dados[coluna_chave] = self._coluna_texto(2)
+        dados["GRUPO SALDO"] = self._coluna_texto(1)
+        for i, coluna in enumerate(COLUNAS_VALORES):
+            dados[coluna] = self._centavos[: self.linhas, i]
+
+        return pd.DataFrame(dados)
+
+
+def iterar_registros_balancete(linhas: Iterable[str]) -> Iterator[LinhaBalancete]:
+    """
+    Gera um LinhaBalancete para cada grupo encontrado nas linhas.
+
+    Aceita qualquer iterável de linhas, inclusive um arquivo aberto, sem
+    carregar o conteúdo inteiro na memória.
+    """
+    for periodo, grupo, valores in _iterar_linhas_brutas(linhas):
+        yield LinhaBalancete(periodo, grupo, *(converter_valor_centavos(v) for v in valores))
+
+
+def processar_balancete_txt(conteudo):
+    """Processa arquivo TXT de balancete (valores em centavos)"""
+    try:
+        buffer = BufferBalancetes(capacidade=64)
+        periodo = buffer.acrescentar_bloco(conteudo)
+
+        if periodo is None:
+            return None, None
+
+        return buffer.para_dataframe().drop(columns="PERIODO"), periodo
+
+    except Exception as e:
+        logger.error("Erro ao processar arquivo: %s", e)
+        return None, None
+
+
+def processar_arquivo_balancetes(caminho_do_arquivo):
+    """
+    Lê um arquivo com um ou mais blocos mensais numa única passada, sem
+    separá-lo em blocos antes.
+
+    Returns:
+        DataFrame: Uma linha por grupo e período, com as colunas PERIODO,
+                   COMPETENCIA e as colunas do balancete.
+    """
+    with open(caminho_do_arquivo, "r", encoding="utf-8") as f:
+        return processar_linhas_balancetes(f)
+
+
+def processar_linhas_balancetes(linhas):
+    """Mesmo que processar_arquivo_balancetes, para um iterável de linhas"""
+    buffer = BufferBalancetes()
+    buffer.acrescentar_linhas(linhas)
+    df = buffer.para_dataframe()
+    df.insert(1, "COMPETENCIA", competencia_dos_periodos(df["PERIODO"]))
+    return df
+
+
+def competencia_do_periodo(periodo):
+    """
+    Mês de referência de um período, pela data final.
+
+    Ex.: "01 de fevereiro de 2025 até 28 de fevereiro de 2025" -> 2025-02.
+
+    Returns:
+        pandas.Period: Período mensal, ou NaT se não houver data no texto.
+    """
+    datas = _PADRAO_DATA.findall(str(periodo).lower())
+    if not datas:
+        return pd.NaT
+
+    _, mes, ano = datas[-1]
+    if mes not in MESES:
+        return pd.NaT
+
+    return pd.Period(year=int(ano), month=MESES[mes], freq="M")
+
+
+def competencia_dos_periodos(periodos):
+    """Aplica competencia_do_periodo uma vez por período distinto"""
+    periodos = pd.Series(periodos)
+    unicos = periodos.unique()
+    competencias = {p: competencia_do_periodo(p) for p in unicos}
+    return pd.PeriodIndex(periodos.map(competencias), freq="M")
+
+
+def calcular_hash_arquivo(caminho_do_arquivo):
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo.
+
+    O hash fica guardado junto com a data de modificação e o tamanho do
+    arquivo; enquanto eles não mudam, o arquivo não é lido de novo.
+
+    Raises:
+        FileNotFoundError: Se o arquivo não existir.
+    """
+    chave = os.path.abspath(caminho_do_arquivo)
+    info = os.stat(chave)
+    assinatura = (info.st_mtime_ns, info.st_size)
+
+    em_cache = _HASHES_ARQUIVOS.get(chave)
+    if em_cache is not None and em_cache[0] == assinatura:
+        return em_cache[1]
+
+    sha = hashlib.sha256()
+    with open(chave, "rb") as f:
+        for pedaco in iter(lambda: f.read(1 << 20), b""):
+            sha.update(pedaco)
+
+    _HASHES_ARQUIVOS[chave] = (assinatura, sha.hexdigest())
+    return sha.hexdigest()
+
+
+def iterar_blocos(linhas):
+    """
+    Divide um iterável de linhas em blocos de texto, separados por uma ou
+    mais linhas em branco, gerando um bloco de cada vez.
+
+    Só as linhas do bloco atual ficam na memória.
+    """
+    bloco_atual = []
+
+    for linha in linhas:
+        # Remove espaços e quebras de linha no final para verificar se a linha está vazia
+        linha_limpa = linha.strip()
+
+        if linha_limpa:
+            # Se a linha não está em branco, adicione-a ao bloco atual
+            bloco_atual.append(linha) # Adiciona a linha original com sua quebra de linha
+        else:
+            # Se a linha está em branco e temos um bloco acumulado
+            if bloco_atual:
+                # Junte as linhas do bloco atual em uma única string e entregue o bloco
+                yield "".join(bloco_atual).strip() # .strip() final para remover quebras de linha extras no final do bloco
+                bloco_atual = [] # Reinicia o bloco atual
+
+    # Após o loop, entregue o último bloco se houver
+    if bloco_atual:
+        yield "".join(bloco_atual).strip()
+
+
+def separar_blocos(linhas):
+    """
+    Divide um iterável de linhas em blocos de texto, separados por uma ou
+    mais linhas em branco.
+
+    Returns:
+        list: Uma lista de strings, uma por bloco.
+    """
+    return list(iterar_blocos(linhas))
+
+
+def iterar_blocos_de_bytes(dados, encoding="utf-8"):
+    """Mesmo que iterar_blocos_do_arquivo, para o conteúdo já em memória"""
+    with io.TextIOWrapper(io.BytesIO(dados), encoding=encoding) as texto:
+        yield from iterar_blocos(texto)
+
+
+def separar_blocos_de_bytes(dados, encoding="utf-8"):
+    """
+    Mesmo que ler_arquivo_e_separar_por_blocos, para o conteúdo já em
+    memória (ex.: um arquivo enviado pelo navegador); nada é gravado em
+    disco.
+    """
+    return list(iterar_blocos_de_bytes(dados, encoding))
+
+
+def ler_arquivo_e_separar_por_blocos(caminho_do_arquivo):
+    """
+    Lê um arquivo de texto e o divide em blocos de texto,
+    onde cada bloco é separado por uma ou mais linhas em branco.
+
+    Args:
+        caminho_do_arquivo (Path ou str): O caminho para o arquivo de texto.
+
+    Returns:
+        list: Uma lista de strings, onde cada string é um bloco de texto.
+              Linhas vazias dentro dos blocos são mantidas, mas linhas
+              em branco que separam os blocos são usadas como delimitadores.
+    """
+    try:
+        with open(caminho_do_arquivo, 'r', encoding='utf-8') as f:
+            return separar_blocos(f)
+
+    except FileNotFoundError:
+        logger.error("Erro: O arquivo '%s' não foi encontrado.", caminho_do_arquivo)
+        return []
+    except Exception as e:
+        logger.error("Ocorreu um erro ao ler o arquivo '%s': %s", caminho_do_arquivo, e)
+        return []
+
+
+def iterar_blocos_do_arquivo(caminho_do_arquivo):
+    """
+    Gera os blocos de um arquivo de texto à medida que ele é lido, sem
+    guardar a lista de blocos. Se o arquivo não puder ser aberto, o erro é
+    registrado e nenhum bloco é gerado, como em
+    ler_arquivo_e_separar_por_blocos.
+
+    Raises:
+        Exception: Erros no meio da leitura (ex.: UnicodeDecodeError) são
+            registrados e repassados; parar em silêncio entregaria só
+            parte dos meses como se fosse o arquivo inteiro.
+    """
+    try:
+        f = open(caminho_do_arquivo, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        logger.error("Erro: O arquivo '%s' não foi encontrado.", caminho_do_arquivo)
+        return
+    except Exception as e:
+        logger.error("Ocorreu um erro ao ler o arquivo '%s': %s", caminho_do_arquivo, e)
+        return
+
+    with f:
+        try:
+            yield from iterar_blocos(f)
+        except Exception as e:
+            logger.error("Ocorreu um erro ao ler o arquivo '%s': %s", caminho_do_arquivo, e)
+            raise
+
+
+def montar_balancetes_mensais(blocos):
+    """
+    Processa cada bloco e empilha os balancetes mensais num único DataFrame.
+
+    Args:
+        blocos (iterable): Textos dos blocos; pode ser um gerador (ex.:
+            iterar_blocos_do_arquivo), consumido um bloco por vez.
+
+    Returns:
+        tuple: (DataFrame com a coluna PERIODO antes das colunas do
+               balancete, ou None se nenhum bloco for válido; lista dos
+               períodos na ordem dos blocos).
+    """
+    buffer = BufferBalancetes()
+    for bloco in blocos:
+        buffer.acrescentar_bloco(bloco)
+
+    if not buffer.linhas:
+        return None, []
+
+    return buffer.para_dataframe(), buffer.periodos
@@ -0,0 +1,296 @@
+"""
+Relatórios mensais estáticos (HTML ou PDF) de todos os condomínios.
+
+Cada relatório tem o mesmo conteúdo do dashboard: as métricas de
+criar_metricas_financeiras (resumir_balancete), a tabela de
+criar_tabela_balancete (formatar_tabela_balancete) e as quatro figuras de
+construir_figuras_balancete, preenchidos num único template compartilhado.
+Os arquivos são gerados em paralelo, um processo por núcleo.
+
+As figuras entram de duas formas:
+
+* HTML (padrão): o JSON de cada figura é embutido no relatório e todos os
+  relatórios usam um único plotly.min.js, gravado uma vez na pasta de
+  saída.
+* PDF: PNGs gerados pelo kaleido e guardados em .imagens/ pelo hash da
+  figura, então uma figura igual em outro relatório (ou numa nova
+  execução) não é gerada de novo.
+
+PDF depende do weasyprint; os dois pacotes são importados só quando usados.
+
+Uso:
+    python relatorios.py exportacoes --saida relatorios
+    python relatorios.py exportacoes --saida relatorios --competencia 2025-04 --formato pdf
+"""
+import argparse
+import hashlib
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+
+import pandas as pd
+
+from consolidacao import resumir_balancete
+from formatacao import formatar_moeda, formatar_tabela_balancete
+from graficos import construir_figuras_balancete
+from lote import processar_lote
+from processamento import COLUNAS_BALANCETE
+from series_temporais import montar_serie_longa
+
+
+NOME_PLOTLY_JS = "plotly.min.js"
+DIRETORIO_IMAGENS = ".imagens"
+
+TITULOS_FIGURAS = {
+    "saldo": "📊 Saldo Atual por Grupo",
+    "movimentacao": "🔄 Movimentação Financeira",
+    "evolucao": "📈 Evolução dos Saldos",
+    "variacao": "💹 Variação por Grupo",
+}
+
+TEMPLATE_RELATORIO = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Balancete $condominio - $competencia</title>
+$scripts
+<style>
+body { font-family: sans-serif; margin: 2em; color: #222; }
+.metricas { display: flex; gap: 1em; }
+.metrica { flex: 1; border: 1px solid #ddd; border-radius: 6px; padding: 0.8em; }
+.metrica .rotulo { font-size: 0.9em; color: #555; }
+.metrica .valor { font-size: 1.4em; font-weight: bold; }
+.metrica .delta { font-size: 0.9em; }
+.positivo { color: green; } .negativo { color: red; }
+table { border-collapse: collapse; width: 100%; margin: 1em 0; }
+th, td { padding: 0.4em 0.6em; border-bottom: 1px solid #eee; }
+td.valor { text-align: right; white-space: nowrap; }
+tr.total { background-color: #f0f0f0; font-weight: bold; }
+.graficos { display: grid; grid-template-columns: 1fr 1fr; gap: 1em; }
+.graficos img { width: 100%; }
+@media print { .graficos { grid-template-columns: 1fr; } }
+</style>
+</head>
+<body>
+<h1>💰 Balancete Financeiro — $condominio</h1>
+<h2>📅 $periodo</h2>
+<h3>📊 Resumo Financeiro</h3>
+$metricas
+<h3>📋 Balancete Detalhado</h3>
+$tabela
+<h3>📈 Análises Visuais</h3>
+<div class="graficos">
+$graficos
+</div>
+</body>
+</html>
+""")
+
+
+def _html_metricas(resumo):
+    variacao = resumo["variacao_saldo"]
+    classe = "negativo" if variacao < 0 else "positivo"
+    cartoes = [
+        ("💰 Total Créditos", resumo["creditos"], ""),
+        ("💸 Total Débitos", resumo["debitos"], ""),
+        (
+            "📊 Saldo Atual",
+            resumo["saldo_atual"],
+            f'<div class="delta {classe}">{formatar_moeda(variacao)}</div>',
+        ),
+        ("🔄 Movimento Total", resumo["movimento"], ""),
+    ]
+    return '<div class="metricas">' + "".join(
+        f'<div class="metrica"><div class="rotulo">{rotulo}</div>'
+        f'<div class="valor">{formatar_moeda(valor)}</div>{delta}</div>'
+        for rotulo, valor, delta in cartoes
+    ) + "</div>"
+
+
+def _html_tabela(df):
+    df_formatado = formatar_tabela_balancete(df)
+    colunas = list(df_formatado.columns)
+    cabecalho = "".join(f"<th>{html.escape(c)}</th>" for c in colunas)
+    linhas = [f"<table><thead><tr>{cabecalho}</tr></thead><tbody>"]
+
+    for registro in df_formatado.itertuples(index=False):
+        classe = ' class="total"' if "Total" in str(registro[0]) else ""
+        # A primeira coluna é o grupo; as demais, valores alinhados à direita
+        celulas = "".join(
+            (f'<td class="valor">{html.escape(str(v))}</td>' if i else f"<td>{html.escape(str(v))}</td>")
+            for i, v in enumerate(registro)
+        )
+        linhas.append(f"<tr{classe}>{celulas}</tr>")
+
+    linhas.append("</tbody></table>")
+    return "\n".join(linhas)
+
+
+def _imagem_figura(fig, diretorio_saida):
+    """PNG da figura em .imagens/, reaproveitado pelo hash do conteúdo"""
+    conteudo = fig.to_json()
+    nome = hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:32] + ".png"
+    caminho = os.path.join(diretorio_saida, DIRETORIO_IMAGENS, nome)
+
+    if not os.path.exists(caminho):
+        fig.write_image(caminho + ".tmp", format="png", width=800, height=450)
+        os.replace(caminho + ".tmp", caminho)
+
+    return f"{DIRETORIO_IMAGENS}/{nome}"
+
+
+def _html_graficos(figuras, diretorio_saida, imagens):
+    partes = []
+    for chave, titulo in TITULOS_FIGURAS.items():
+        fig = figuras[chave]
+        if imagens:
+            conteudo = f'<img src="{_imagem_figura(fig, diretorio_saida)}" alt="{titulo}">'
+        else:
+            conteudo = fig.to_html(full_html=False, include_plotlyjs=False)
+        partes.append(f"<div><h4>{titulo}</h4>{conteudo}</div>")
+    return "\n".join(partes)
+
+
+def renderizar_relatorio(
+    df_mes, periodo, condominio, competencia, serie=None, diretorio_saida=".", imagens=False
+):
+    """
+    HTML do relatório de um condomínio num mês.
+
+    Args:
+        df_mes (DataFrame): Balancete do mês (GRUPO SALDO e valores).
+        serie (Series, opcional): Série longa do histórico, para a figura
+            de evolução mês a mês.
+        imagens (bool): Figuras como PNG (em diretorio_saida/.imagens) em
+            vez de JSON para o plotly.js.
+    """
+    figuras = construir_figuras_balancete(df_mes, serie)
+    scripts = "" if imagens else f'<script src="{NOME_PLOTLY_JS}"></script>'
+
+    return TEMPLATE_RELATORIO.substitute(
+        condominio=html.escape(condominio),
+        competencia=competencia,
+        periodo=html.escape(periodo),
+        scripts=scripts,
+        metricas=_html_metricas(resumir_balancete(df_mes)),
+        tabela=_html_tabela(df_mes),
+        graficos=_html_graficos(figuras, diretorio_saida, imagens),
+    )
+
+
+def _gerar_relatorio(tarefa):
+    """Executado nos processos do pool; nunca deixa a exceção escapar"""
+    condominio, competencia, df_mes, periodo, serie, diretorio_saida, formato = tarefa
+    try:
+        conteudo = renderizar_relatorio(
+            df_mes, periodo, condominio, competencia, serie, diretorio_saida,
+            imagens=formato == "pdf",
+        )
+        caminho = os.path.join(diretorio_saida, f"{condominio} - {competencia}.{formato}")
+
+        if formato == "pdf":
+            from weasyprint import HTML
+
+            HTML(string=conteudo, base_url=diretorio_saida).write_pdf(caminho)
+        else:
+            with open(caminho, "w", encoding="utf-8") as f:
+                f.write(conteudo)
+
+        return condominio, caminho, None
+    except Exception as e:
+        return condominio, None, f"{type(e).__name__}: {e}"
+
+
+def _tarefas(df_lote, competencia, diretorio_saida, formato):
+    """Uma tarefa por condomínio, com o mês pedido ou o último disponível"""
+    competencia = pd.Period(competencia, freq="M") if competencia is not None else None
+
+    for condominio, df_condominio in df_lote.groupby(level="CONDOMINIO", sort=False):
+        df_condominio = df_condominio.reset_index()
+        mes = competencia if competencia is not None else df_condominio["COMPETENCIA"].max()
+        df_mes = df_condominio[df_condominio["COMPETENCIA"] == mes]
+        if df_mes.empty:
+            continue
+
+        df_mes = df_mes.drop_duplicates("GRUPO SALDO", keep="last")
+        historico = df_condominio[df_condominio["COMPETENCIA"] <= mes]
+
+        yield (
+            condominio,
+            str(mes),
+            df_mes[COLUNAS_BALANCETE].reset_index(drop=True),
+            df_mes["PERIODO"].iloc[-1],
+            montar_serie_longa(historico),
+            diretorio_saida,
+            formato,
+        )
+
+
+def gerar_relatorios(diretorio_raiz, diretorio_saida, competencia=None, formato="html", processos=None):
+    """
+    Gera o relatório mensal de cada condomínio de uma pasta de exportações.
+
+    Args:
+        diretorio_raiz (Path ou str): Pasta com uma subpasta por condomínio.
+        diretorio_saida (Path ou str): Onde gravar os relatórios.
+        competencia (str, opcional): Mês dos relatórios ("2025-04"); por
+            padrão, o último mês de cada condomínio.
+        formato (str): "html" ou "pdf".
+        processos (int, opcional): Número de processos; com 1, tudo roda no
+            processo atual.
+
+    Returns:
+        tuple: (lista dos arquivos gerados, dicionário condomínio -> erro,
+                segundos).
+    """
+    inicio = time.perf_counter()
+    df_lote, relatorio_lote = processar_lote(diretorio_raiz, processos)
+
+    diretorio_saida = os.path.abspath(diretorio_saida)
+    os.makedirs(diretorio_saida, exist_ok=True)
+
+    if formato == "pdf":
+        os.makedirs(os.path.join(diretorio_saida, DIRETORIO_IMAGENS), exist_ok=True)
+    else:
+        # Um único plotly.js para todos os relatórios da pasta
+        caminho_js = os.path.join(diretorio_saida, NOME_PLOTLY_JS)
+        if not os.path.exists(caminho_js):
+            from plotly.offline import get_plotlyjs
+
+            with open(caminho_js, "w", encoding="utf-8") as f:
+                f.write(get_plotlyjs())
+
+    tarefas = list(_tarefas(df_lote, competencia, diretorio_saida, formato))
+
+    if processos == 1 or len(tarefas) <= 1:
+        resultados = [_gerar_relatorio(tarefa) for tarefa in tarefas]
+    else:
+        processos = processos or os.cpu_count()
+        tamanho_lote = max(1, len(tarefas) // (processos * 4))
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_gerar_relatorio, tarefas, chunksize=tamanho_lote))
+
+    gerados = [caminho for _, caminho, erro in resultados if erro is None]
+    falhas = dict(relatorio_lote.falhas)
+    falhas.update((condominio, erro) for condominio, _, erro in resultados if erro is not None)
+
+    return gerados, falhas, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os relatórios mensais de vários condomínios.")
+    parser.add_argument("diretorio", help="Pasta com uma subpasta por condomínio")
+    parser.add_argument("--saida", required=True, help="Pasta dos relatórios")
+    parser.add_argument("--competencia", help="Mês dos relatórios (AAAA-MM); padrão: o último")
+    parser.add_argument("--formato", choices=["html", "pdf"], default="html")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos")
+    args = parser.parse_args()
+
+    gerados, falhas, segundos = gerar_relatorios(
+        args.diretorio, args.saida, args.competencia, args.formato, args.processos
+    )
+    print(f"{len(gerados)} relatórios em {segundos:.2f}s, {len(falhas)} falhas")
+    for origem, erro in falhas.items():
+        print(f"  {origem}: {erro}")
@@ -0,0 +1,111 @@
+"""
+Séries mensais do balancete em formato longo.
+
+Os balancetes mensais viram uma única Series de centavos indexada por
+(COMPETENCIA, GRUPO SALDO, METRICA), montada uma vez e com o índice
+ordenado. Os filtros de período e de grupo do dashboard são fatias desse
+índice, sem reprocessar o arquivo, e as tabelas dos gráficos (evolução,
+fluxo de caixa acumulado, sparklines) saem dela.
+"""
+import pandas as pd
+
+from processamento import COLUNAS_VALORES
+
+
+NIVEIS_SERIE = ["COMPETENCIA", "GRUPO SALDO", "METRICA"]
+
+
+def montar_serie_longa(df_mensal):
+    """
+    Converte os balancetes mensais para o formato longo, sem a linha Total.
+
+    Se o mesmo mês aparecer em mais de um bloco, vale o último, como no
+    armazenamento colunar.
+
+    Args:
+        df_mensal (DataFrame): Balancetes mensais com a coluna COMPETENCIA.
+
+    Returns:
+        Series: Valores em centavos (int64) com índice NIVEIS_SERIE ordenado.
+    """
+    df = df_mensal.loc[
+        ~df_mensal["GRUPO SALDO"].str.contains("Total", case=False, na=False)
+        & df_mensal["COMPETENCIA"].notna(),
+        ["COMPETENCIA", "GRUPO SALDO"] + COLUNAS_VALORES,
+    ].drop_duplicates(["COMPETENCIA", "GRUPO SALDO"], keep="last")
+
+    serie = (
+        df.set_index(["COMPETENCIA", "GRUPO SALDO"])
+        .rename_axis(columns="METRICA")
+        .stack()
+        .astype("int64")
+        .rename("VALOR")
+    )
+    return serie.sort_index()
+
+
+def competencias_da_serie(serie):
+    """Competências presentes na série, em ordem"""
+    return serie.index.get_level_values("COMPETENCIA").unique()
+
+
+def grupos_da_serie(serie):
+    """Grupos presentes na série, em ordem alfabética"""
+    return serie.index.get_level_values("GRUPO SALDO").unique().sort_values().tolist()
+
+
+def filtrar_serie(serie, inicio=None, fim=None, grupos=None, metricas=None):
+    """
+    Fatia a série por período (inclusive nas duas pontas), grupos e
+    métricas; None não filtra.
+    """
+    fatia = pd.IndexSlice[
+        inicio:fim,
+        slice(None) if grupos is None else list(grupos),
+        slice(None) if metricas is None else list(metricas),
+    ]
+    return serie.loc[fatia]
+
+
+def tabela_metrica(serie, metrica):
+    """
+    Uma métrica em formato largo: competências nas linhas, grupos nas
+    colunas. Meses em que o grupo não aparece ficam NaN.
+    """
+    return serie.xs(metrica, level="METRICA").unstack("GRUPO SALDO")
+
+
+def fluxo_caixa_acumulado(serie):
+    """
+    Créditos, débitos, resultado do mês (LÍQUIDO) e resultado acumulado,
+    somando todos os grupos da série.
+
+    Returns:
+        DataFrame: Indexado por COMPETENCIA, valores em centavos.
+    """
+    movimentos = filtrar_serie(serie, metricas=["CRÉDITOS", "DÉBITOS"])
+    fluxo = (
+        movimentos.groupby(level=["COMPETENCIA", "METRICA"])
+        .sum()
+        .unstack("METRICA", fill_value=0)
+        .reindex(columns=["CRÉDITOS", "DÉBITOS"], fill_value=0)
+    )
+    fluxo.columns.name = None
+    fluxo["LÍQUIDO"] = fluxo["CRÉDITOS"] - fluxo["DÉBITOS"]
+    fluxo["ACUMULADO"] = fluxo["LÍQUIDO"].cumsum()
+    return fluxo
+
+
+def sparklines_por_grupo(serie, metrica="SALDO ATUAL"):
+    """
+    Uma linha por grupo com o último valor da métrica (centavos) e a lista
+    dos valores mês a mês em reais, para colunas de minigráfico.
+    """
+    tabela = tabela_metrica(serie, metrica)
+    return pd.DataFrame(
+        {
+            "GRUPO SALDO": tabela.columns,
+            metrica: [tabela[grupo].dropna().iloc[-1] for grupo in tabela.columns],
+            "EVOLUÇÃO": [(tabela[grupo].dropna() / 100).tolist() for grupo in tabela.columns],
+        }
+    )
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos ficam na pasta de cima e são importados pelo nome, como nos scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,63 @@
+from inadimplencia import FAIXAS_ATRASO, ingerir_pasta, posicao_inadimplencia
+
+
+def _escrever(caminho, texto):
+    caminho.write_text(texto, encoding="utf-8")
+
+
+def _pasta_unidade_101(tmp_path):
+    _escrever(
+        tmp_path / "cobrancas_2025-01.csv",
+        "UNIDADE;COMPETENCIA;VENCIMENTO;VALOR\n"
+        "101;01/2025;10/01/2025;R$ 450,00\n"
+        "102;01/2025;10/01/2025;R$ 450,00\n",
+    )
+    _escrever(
+        tmp_path / "cobrancas_2025-05.csv",
+        "UNIDADE;COMPETENCIA;VENCIMENTO;VALOR\n"
+        "101;05/2025;10/05/2025;R$ 450,00\n",
+    )
+    _escrever(
+        tmp_path / "pagamentos_2025-04.csv",
+        "UNIDADE;DATA;VALOR\n"
+        "101;15/04/2025;R$ 450,00\n",
+    )
+    return ingerir_pasta(str(tmp_path))
+
+
+def _linha(posicao, unidade):
+    return posicao.set_index("UNIDADE").loc[unidade]
+
+
+def test_pagamento_posterior_nao_quita_na_data_de_referencia(tmp_path):
+    carteira = _pasta_unidade_101(tmp_path)
+
+    linha = _linha(posicao_inadimplencia(carteira, "2025-03-31"), "101")
+
+    assert linha["PAGO"] == 0
+    assert linha["COBRADO"] == 45000
+    assert linha["61 a 90 dias"] == 45000
+    assert linha["DIAS EM ATRASO"] == 80
+
+
+def test_cobranca_emitida_depois_da_referencia_nao_conta(tmp_path):
+    carteira = _pasta_unidade_101(tmp_path)
+
+    linha = _linha(posicao_inadimplencia(carteira, "2025-04-20"), "101")
+
+    assert linha["COBRADO"] == 45000
+    assert linha["PAGO"] == 45000
+    assert linha[FAIXAS_ATRASO].sum() == 0
+
+
+def test_posicao_atual_usa_todos_os_lancamentos(tmp_path):
+    carteira = _pasta_unidade_101(tmp_path)
+
+    posicao = posicao_inadimplencia(carteira, "2025-06-30")
+    linha = _linha(posicao, "101")
+
+    assert linha["COBRADO"] == 90000
+    assert linha["PAGO"] == 45000
+    assert linha["Até 30 dias"] == 0
+    assert linha["31 a 60 dias"] == 45000
+    assert _linha(posicao, "102")["Mais de 90 dias"] == 45000
@@ -0,0 +1,27 @@
+import ingestao_pdf
+from lote import listar_exportacoes, processar_lote
+
+# Texto como o extraído de um PDF da administradora
+TEXTO_PDF = """Balancete Analítico
+01 de maio de 2024 até 31 de maio de 2024
+05/2024
+GRUPO SALDO SALDO ANTERIOR CRÉDITOS DÉBITOS SALDO ATUAL
+Condomínio R$ 10.423,70 R$ 37.992,27 R$ 50.243,36 R$ -1.827,39
+Fundo de Obras R$ 1.654,67 R$ 133,34 R$ 0,00 R$ 1.788,01
+"""
+
+
+def test_lote_rodado_duas_vezes_nao_duplica_o_pdf(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestao_pdf, "extrair_texto_pdf", lambda caminho: TEXTO_PDF)
+    pasta = tmp_path / "Edificio Aurora"
+    pasta.mkdir()
+    (pasta / "2024-05.pdf").write_bytes(b"%PDF-1.4 balancete de maio")
+
+    primeiro, relatorio = processar_lote(str(tmp_path), processos=1)
+    # A segunda execução encontra o texto do PDF guardado em .balancete_cache/pdf
+    segundo, _ = processar_lote(str(tmp_path), processos=1)
+
+    assert not relatorio.falhas
+    assert len(primeiro) == 2
+    assert segundo.equals(primeiro)
+    assert listar_exportacoes(str(tmp_path)) == [("Edificio Aurora", str(pasta / "2024-05.pdf"))]